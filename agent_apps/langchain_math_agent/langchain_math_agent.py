@@ -1,14 +1,18 @@
 # SPDX-FileCopyrightText: (c) 2025 Tenstorrent AI ULC
 #
 # SPDX-License-Identifier: Apache-2.0
+from pathlib import Path
 from urllib.parse import urljoin
+import sys
 
 from langchain_core.tools import tool
 from langchain_openai import ChatOpenAI
 from langchain_core.messages import HumanMessage
 from langgraph.prebuilt import create_react_agent
 import streamlit as st
-import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from common.models import get_models  # noqa: E402
 
 
 @tool
@@ -35,16 +39,6 @@ def subtract(a: int, b: int) -> int:
     return a - b
 
 
-@st.cache_data
-def get_model_id(base_url):
-    res = requests.get(urljoin(base_url, "/v1/models"), headers={"accept": "application/json"})
-
-    if res.status_code != 200:
-        st.error("Error fetching model name from instance.", icon="🚨")
-    else:
-        return res.json()['data'][0]['id']
-
-
 def main():
     st.title("➗ LangChain Math Agent")
     st.caption("Ask in natural language to add, subtract, multiply, or divide two numbers.")
@@ -52,7 +46,11 @@ def main():
     tt_base_url = st.text_input("Enter the public URL of your Tenstorrent instance on Koyeb.")
 
     if tt_base_url:
-        model_id = get_model_id(tt_base_url)
+        models = get_models(tt_base_url)
+        if models.model_id is None:
+            st.error(f"Error fetching model name from instance: {models.error}", icon="🚨")
+            return
+        model_id = models.model_id
         st.info(f"Using model: {model_id}", icon="✅")
 
         example_str = "What is 12,852 divided by 4,284?"  # 3
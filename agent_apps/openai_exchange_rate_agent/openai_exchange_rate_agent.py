@@ -1,25 +1,18 @@
 # SPDX-FileCopyrightText: (c) 2025 Tenstorrent AI ULC
 #
 # SPDX-License-Identifier: Apache-2.0
-import asyncio
-import os
+from pathlib import Path
 import json
-from urllib.parse import urljoin
+import os
+import sys
 
 import requests
 import streamlit as st
-from openai import AsyncOpenAI
 from agents import Agent, Runner, OpenAIChatCompletionsModel, set_tracing_disabled, function_tool
 
-
-@st.cache_data
-def get_model_id(base_url):
-    res = requests.get(urljoin(base_url, "/v1/models"), headers={"accept": "application/json"})
-
-    if res.status_code != 200:
-        st.error("Error fetching model name from instance.", icon="🚨")
-    else:
-        return res.json()['data'][0]['id']
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from common.client import get_async_openai, run_async  # noqa: E402
+from common.models import get_models  # noqa: E402
 
 
 @function_tool
@@ -55,13 +48,18 @@ def main():
     tt_base_url = st.text_input("Enter the public URL of your Tenstorrent instance on Koyeb.")
 
     if tt_base_url:
-        model_id = get_model_id(tt_base_url)
+        models = get_models(tt_base_url)
+        if models.model_id is None:
+            st.error(f"Error fetching model name from instance: {models.error}", icon="🚨")
+            return
+        model_id = models.model_id
         st.info(f"Using model: {model_id}", icon="✅")
 
         user_query = st.text_input("Ask a question about exchange rates.", placeholder="What is 1,000 USD worth in JPY?")
 
         if user_query:
-            custom_client = AsyncOpenAI(base_url=urljoin(tt_base_url, "v1"), api_key="null")
+            # Shared across queries, reruns and sessions, so the connection to the instance is reused
+            custom_client = get_async_openai(tt_base_url)
             set_tracing_disabled(True)
 
             agent = Agent(
@@ -78,7 +76,8 @@ def main():
             )
 
             with st.spinner("🤖 Running agent..."):
-                response = asyncio.run(run_agent(agent, user_query))
+                # On the shared event loop that the client's pooled connections belong to
+                response = run_async(run_agent(agent, user_query))
 
                 st.markdown(response)
 
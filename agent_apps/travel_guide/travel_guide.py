@@ -1,19 +1,19 @@
 # SPDX-FileCopyrightText: (c) 2025 Tenstorrent AI ULC
 #
 # SPDX-License-Identifier: Apache-2.0
+from pathlib import Path
 from urllib.parse import urljoin
 import json
 import re
+import sys
 
-import requests
 import serpapi
 import streamlit as st
 
-
-@st.cache_data
-def get_available_models(base_url):
-    res = requests.get(urljoin(base_url, "/v1/models"), headers={"accept": "application/json"})
-    return res
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from common import streaming  # noqa: E402
+from common.client import get_client  # noqa: E402
+from common.models import get_models  # noqa: E402
 
 
 def search_web(query, location, api_key):
@@ -22,7 +22,7 @@ def search_web(query, location, api_key):
 
 
 def call_tool_completion(endpoint, payload):
-    return requests.post(
+    return get_client().post(
         endpoint,
         headers={"Content-Type": "application/json"},
         json=payload
@@ -30,6 +30,7 @@ def call_tool_completion(endpoint, payload):
 
 
 def call_final_response(user_query, endpoint, model_id, context, tool_call):
+    """Stream the final answer text as it is generated."""
     system_message = {
         "role": "system",
         "content":
@@ -57,11 +58,7 @@ def call_final_response(user_query, endpoint, model_id, context, tool_call):
         "max_tokens": 200
     }
 
-    res = requests.post(endpoint, headers={"Content-Type": "application/json"}, json=payload)
-
-    if res.status_code != 200:
-        return f"Error: {res.status_code} - {res.text}"
-    return res.json()["choices"][0]["message"]["content"].strip()
+    return streaming.stream_chat_completion(endpoint, payload)
 
 
 def get_search_tool():
@@ -120,17 +117,17 @@ def main():
     CHAT_ENDPOINT = urljoin(tt_base_url, "/v1/chat/completions")
 
     if tt_base_url:
-        model_id_response = get_available_models(tt_base_url)
+        models = get_models(tt_base_url)
 
-        if model_id_response.status_code != 200:
-            st.write("Error fetching model names from instance.")
+        if not models.ids:
+            st.write(f"Error fetching model names from instance: {models.error}")
             model_id = st.text_input("Enter the name of the model")
         else:
-            available_models = [m['id'] for m in model_id_response.json()['data']]
-
+            if models.error:
+                st.warning(f"The instance did not answer ({models.error}), showing the models it listed last.", icon="⚠️")
             model_id = st.selectbox(
                 "Select the LLM to use.",
-                available_models,
+                models.ids,
                 help=f"These are the available models on {tt_base_url}"
             )
         
@@ -168,9 +165,7 @@ def main():
                         context += f"{title} ||| {address} ||| {rating} stars ||| {description}\n"
                 st.success("✅ Retrieved search results and prepared context!")
 
-                with st.spinner("💬 Generating final answer..."):
-                    final_response = call_final_response(user_query, CHAT_ENDPOINT, model_id, context, tool_call)
-                    st.write(final_response)
+                st.write_stream(call_final_response(user_query, CHAT_ENDPOINT, model_id, context, tool_call))
                 st.success("✅ Done!")
 
 
@@ -1,14 +1,19 @@
 # SPDX-FileCopyrightText: (c) 2025 Tenstorrent AI ULC
 #
 # SPDX-License-Identifier: Apache-2.0
-from urllib.parse import urljoin
+from pathlib import Path
 import json
 import re
+import sys
 
-from openai import OpenAI
 import requests
 import streamlit as st
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from common.client import get_openai  # noqa: E402
+from common.models import get_models  # noqa: E402
+from common.stream_metrics import StreamRecorder, show_in_sidebar  # noqa: E402
+
 
 def get_weather(location, unit, api_key):
     params = {
@@ -37,9 +42,13 @@ def main():
 
     tt_base_url = st.text_input("Enter the public URL of your Tenstorrent instance on Koyeb.")
     if tt_base_url:
-        client = OpenAI(base_url=urljoin(tt_base_url, "v1"), api_key="null")
-        models = client.models.list()
-        model_id = models.data[0].id
+        models = get_models(tt_base_url)
+        if models.model_id is None:
+            st.error(f"Error fetching model name from instance: {models.error}", icon="🚨")
+            return
+        model_id = models.model_id
+        # Shared across reruns and sessions, so the connection to the instance is reused
+        client = get_openai(tt_base_url)
         
         weather_api_key = st.text_input("Enter your Weather API key.", type="password")
         if weather_api_key:
@@ -128,12 +137,16 @@ def main():
                 messages = [system_message, user_message, assistant_message, tool_call_message]
 
                 with st.chat_message("assistant"):
+                    recorder = StreamRecorder("weather_agent", model_id)
                     stream = client.chat.completions.create(
                         model=model_id,
                         messages=messages,
                         stream=True
                     )
-                    response = st.write_stream(stream)
+                    response = st.write_stream(recorder.wrap(stream))
+                st.session_state.last_stream_metrics = recorder.record
+
+        show_in_sidebar("weather_agent", st.session_state.get("last_stream_metrics"))
 
 
 if __name__ == "__main__":
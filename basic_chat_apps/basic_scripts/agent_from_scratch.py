@@ -1,12 +1,17 @@
 # SPDX-FileCopyrightText: (c) 2025 Tenstorrent AI ULC
 #
 # SPDX-License-Identifier: Apache-2.0
+from pathlib import Path
 import json
 import os
+import sys
 
 from openai import OpenAI
 import requests
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from common.stream_metrics import StreamRecorder, format_record  # noqa: E402
+
 
 def fetch_weather(location):
     params = {
@@ -117,11 +122,15 @@ def main():
 
     messages = [system_message, user_message, assistant_message, tool_call_message]
 
+    # Set TT_STREAM_METRICS=1 to print and log the latency of the response
+    recorder = StreamRecorder("agent_from_scratch", model_id) if os.environ.get("TT_STREAM_METRICS") == "1" else None
     stream = client.chat.completions.create(
         model=model_id,
         messages=messages,
         stream=True
     )
+    if recorder is not None:
+        stream = recorder.wrap(stream)
 
     print("Generating final response...\n")
 
@@ -129,6 +138,9 @@ def main():
         delta = chunk.choices[0].delta.content or ""
         print(delta, end="", flush=True)
 
+    if recorder is not None:
+        print(f"\n\n[{format_record(recorder.record)}]")
+
 
 if __name__ == "__main__":
     main()
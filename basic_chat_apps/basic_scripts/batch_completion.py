@@ -0,0 +1,170 @@
+# SPDX-FileCopyrightText: (c) 2025 Tenstorrent AI ULC
+#
+# SPDX-License-Identifier: Apache-2.0
+"""
+Send a JSONL file of prompts to a Tenstorrent instance as concurrent chat completions.
+
+Every input line is a JSON object with a "prompt" string or a "messages" list. Its
+other fields, such as an id, are copied to the output line, which adds the `answer`
+(or `error`), `usage`, `model`, `attempts` and `latency_ms`. Output lines are written
+in input order as soon as they and all lines before them are done.
+
+Concurrency starts low and grows while the server keeps up. It is halved when the
+server answers 429 or 5xx, or stops answering. Those requests are retried.
+
+If the run stops partway, or some prompts failed, run it again with --resume: the
+prompts already answered in the output file are kept, and the failed and missing
+ones are sent again.
+
+    python batch_completion.py prompts.jsonl -o answers.jsonl --base-url $TT_BASE_URL
+"""
+
+from pathlib import Path
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from common import client  # noqa: E402
+from common.batch import (  # noqa: E402
+    BatchCompleter,
+    DEFAULT_INITIAL_CONCURRENCY,
+    DEFAULT_MAX_CONCURRENCY,
+    DEFAULT_MAX_RETRIES,
+)
+from common.models import get_models  # noqa: E402
+
+
+def read_prompts(path, system=None):
+    with open(path) as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if "messages" in record:
+                messages = record["messages"]
+            elif "prompt" in record:
+                messages = [{"role": "user", "content": record["prompt"]}]
+            else:
+                raise ValueError(f"{path}:{line_number}: expected a \"prompt\" or \"messages\" field")
+            if system and messages[0].get("role") != "system":
+                messages = [{"role": "system", "content": system}, *messages]
+            yield record, messages
+
+
+def read_previous(path):
+    """
+    The lines of a previous run's output, up to the first one cut short by a crash,
+    as `(line, answered)` pairs. A line with an `error` is not answered.
+    """
+    previous = []
+    if not os.path.exists(path):
+        return previous
+
+    with open(path) as f:
+        for line in f:
+            if not line.endswith("\n"):
+                break
+            try:
+                result = json.loads(line)
+            except ValueError:
+                break
+            previous.append((line, "error" not in result))
+    return previous
+
+
+async def run(args, model_id, prompts, write):
+    params = {key: value for key, value in (("max_tokens", args.max_tokens), ("temperature", args.temperature)) if value is not None}
+
+    # asyncio.run() gives the batch its own event loop, so it needs its own async client
+    async with client.new_client(max_connections=args.max_concurrency) as http:
+        completer = BatchCompleter(
+            http,
+            args.base_url,
+            model_id,
+            max_concurrency=args.max_concurrency,
+            initial_concurrency=args.initial_concurrency,
+            max_retries=args.max_retries,
+            **params
+        )
+        async for (index, record), result in completer.map(prompts):
+            write(index, json.dumps({**record, **result, "model": model_id}) + "\n")
+    return completer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("prompts", help="JSONL file, one {\"prompt\": ...} or {\"messages\": [...]} object per line")
+    parser.add_argument("-o", "--output", default="-", help="JSONL file for the answers (default: stdout)")
+    parser.add_argument("--resume", action="store_true", help="Keep the prompts already answered in --output and send the failed and missing ones")
+    parser.add_argument("--base-url", default=os.environ.get("TT_BASE_URL"), help="Tenstorrent instance URL (default: $TT_BASE_URL)")
+    parser.add_argument("--model", help="Model id (default: the first model the instance lists)")
+    parser.add_argument("--system", help="System message added to prompts that do not start with one")
+    parser.add_argument("--max-tokens", type=int)
+    parser.add_argument("--temperature", type=float)
+    parser.add_argument("--max-concurrency", type=int, default=DEFAULT_MAX_CONCURRENCY, help="Most requests ever in flight")
+    parser.add_argument("--initial-concurrency", type=int, default=DEFAULT_INITIAL_CONCURRENCY, help="Requests in flight at the start")
+    parser.add_argument("--max-retries", type=int, default=DEFAULT_MAX_RETRIES, help="Retries of a prompt the server turned away")
+    args = parser.parse_args()
+
+    if not args.base_url:
+        parser.error("--base-url or TT_BASE_URL is required")
+    if args.resume and args.output == "-":
+        parser.error("--resume needs an --output file")
+
+    model_id = args.model
+    if model_id is None:
+        models = get_models(args.base_url)
+        if models.model_id is None:
+            parser.error(f"could not fetch the model list from {args.base_url}: {models.error}")
+        model_id = models.model_id
+
+    previous = read_previous(args.output) if args.resume else []
+    answered = sum(done for _, done in previous)
+    if previous:
+        print(f"Resuming: {answered} prompts answered, {len(previous) - answered} failed ones sent again", file=sys.stderr)
+    prompts = (
+        ((index, record), messages)
+        for index, (record, messages) in enumerate(read_prompts(args.prompts, args.system))
+        if index >= len(previous) or not previous[index][1]
+    )
+
+    # A resumed run merges the kept lines and the new ones in input order into a new
+    # file, which replaces the old one at the end
+    path = args.output + ".tmp" if args.resume else args.output
+    out = sys.stdout if path == "-" else open(path, "w")
+    kept = 0
+
+    def write(index, line):
+        nonlocal kept
+        for old_line, _ in previous[kept:index]:
+            out.write(old_line)
+        out.write(line)
+        out.flush()
+        kept = max(kept, index + 1)
+
+    started = time.perf_counter()
+    try:
+        completer = asyncio.run(run(args, model_id, prompts, write))
+    finally:
+        # Lines not reached, or reached before a crash, stay as they were
+        for old_line, _ in previous[kept:]:
+            out.write(old_line)
+        if out is not sys.stdout:
+            out.close()
+        if args.resume:
+            os.replace(path, args.output)
+
+    limiter = completer.limiter
+    print(
+        f"{completer.stats.report(time.perf_counter() - started)}, "
+        f"concurrency peaked at {int(limiter.peak)} and ended at {int(limiter.limit)} after {limiter.decreases} backoffs",
+        file=sys.stderr
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -3,13 +3,23 @@
 # SPDX-License-Identifier: Apache-2.0
 """This is an extremely simple chatbot that streams its responses and remembers previous messages."""
 
+from pathlib import Path
+import os
+import sys
+
 from openai import OpenAI
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from common.stream_metrics import StreamRecorder, format_record  # noqa: E402
+
 tt_base_url = "https://<YOUR_DOMAIN_PREFIX>.koyeb.app/v1"
 model_id = "meta-llama/Llama-3.1-8B-Instruct"
 
 client = OpenAI(base_url=tt_base_url, api_key="null")
 
+# Set TT_STREAM_METRICS=1 to print and log the latency of every reply
+show_metrics = os.environ.get("TT_STREAM_METRICS") == "1"
+
 conversation = [
     {"role": "system", "content": "You are a helpful assistant."}
 ]
@@ -21,11 +31,14 @@ while True:
 
     conversation.append({"role": "user", "content": user_query})
 
+    recorder = StreamRecorder("chatbot", model_id) if show_metrics else None
     response = client.chat.completions.create(
         model=model_id,
         messages=conversation,
         stream=True
     )
+    if recorder is not None:
+        response = recorder.wrap(response)
 
     assistant_reply = ""
     print("Assistant:", end=" ", flush=True)
@@ -35,5 +48,5 @@ while True:
         print(delta, end="", flush=True)
         assistant_reply += delta
 
-    print("\n")
+    print(f"\n[{format_record(recorder.record)}]\n" if recorder is not None else "\n")
     conversation.append({"role": "assistant", "content": assistant_reply})
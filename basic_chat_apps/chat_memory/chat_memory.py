@@ -1,11 +1,16 @@
 # SPDX-FileCopyrightText: (c) 2025 Tenstorrent AI ULC
 #
 # SPDX-License-Identifier: Apache-2.0
-from urllib.parse import urljoin
+from pathlib import Path
+import sys
 
-from openai import OpenAI
 import streamlit as st
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from common.client import get_openai  # noqa: E402
+from common.models import get_models  # noqa: E402
+from common.stream_metrics import StreamRecorder, show_in_sidebar  # noqa: E402
+
 
 def main():
     st.title("🤖 Streaming Chatbot with Memory")
@@ -19,13 +24,16 @@ def main():
     )
 
     if st.session_state.tt_base_url:
-        client = OpenAI(base_url=urljoin(st.session_state.tt_base_url, "v1"), api_key="null")
-
-        if "model_id" not in st.session_state:
-            models = client.models.list()
-            st.session_state.model_id = models.data[0].id
+        # Cached for the whole process, so reruns do not ask the instance again
+        models = get_models(st.session_state.tt_base_url)
+        if models.model_id is None:
+            st.error(f"Error fetching model name from instance: {models.error}", icon="🚨")
+            return
+        model_id = models.model_id
+        # Shared across reruns and sessions, so the connection to the instance is reused
+        client = get_openai(st.session_state.tt_base_url)
 
-        st.info(f"Using model: {st.session_state.model_id}", icon="✅")
+        st.info(f"Using model: {model_id}", icon="✅")
 
         if "messages" not in st.session_state:
             st.session_state.messages = [{"role": "system", "content": "You are a helpful assistant."}]
@@ -41,16 +49,20 @@ def main():
                 st.markdown(user_query)
 
             with st.chat_message("assistant"):
+                recorder = StreamRecorder("chat_memory", model_id)
                 stream = client.chat.completions.create(
-                    model=st.session_state.model_id,
+                    model=model_id,
                     messages=[
                         {"role": m["role"], "content": m["content"]}
                         for m in st.session_state.messages
                     ],
                     stream=True,
                 )
-                response = st.write_stream(stream)
+                response = st.write_stream(recorder.wrap(stream))
             st.session_state.messages.append({"role": "assistant", "content": response})
+            st.session_state.last_stream_metrics = recorder.record
+
+        show_in_sidebar("chat_memory", st.session_state.get("last_stream_metrics"))
 
 
 if __name__ == "__main__":
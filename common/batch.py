@@ -0,0 +1,218 @@
+# SPDX-FileCopyrightText: (c) 2025 Tenstorrent AI ULC
+#
+# SPDX-License-Identifier: Apache-2.0
+"""Concurrent chat completions for large prompt sets, with adaptive concurrency."""
+
+from email.utils import parsedate_to_datetime
+from urllib.parse import urljoin
+import asyncio
+import random
+import statistics
+import time
+
+import httpx
+
+from common.client import RETRY_STATUS_CODES
+
+
+DEFAULT_MAX_CONCURRENCY = 32
+DEFAULT_INITIAL_CONCURRENCY = 4
+DEFAULT_MAX_RETRIES = 5
+
+
+class AdaptiveLimiter:
+    """
+    Bounds the requests in flight with a limit that adapts to the server (AIMD).
+
+    Every request that succeeds raises the limit by 1/limit, so by about one after a
+    full window of successes, up to `max_limit`. A request the server turns away as
+    overloaded halves it, down to `min_limit`. Only requests started after the last
+    decrease can lower it again, so one burst of rejections halves it once.
+    """
+
+    def __init__(self, initial=DEFAULT_INITIAL_CONCURRENCY, min_limit=1, max_limit=DEFAULT_MAX_CONCURRENCY):
+        self.limit = float(min(max(initial, min_limit), max_limit))
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.in_flight = 0
+        self.peak = self.limit
+        self.decreases = 0
+        self._generation = 0
+        self._condition = asyncio.Condition()
+
+    async def acquire(self):
+        """Wait for a free slot. Returns the token to pass to `release()`."""
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+            return self._generation
+
+    async def release(self, token, overloaded=False):
+        async with self._condition:
+            self.in_flight -= 1
+            if not overloaded:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+                self.peak = max(self.peak, self.limit)
+            elif token == self._generation:
+                self.limit = max(self.min_limit, self.limit / 2)
+                self._generation += 1
+                self.decreases += 1
+            self._condition.notify_all()
+
+
+class BatchStats:
+    def __init__(self):
+        self.completed = 0
+        self.failed = 0
+        self.retries = 0
+        self.latencies = []
+
+    def report(self, elapsed):
+        done = self.completed + self.failed
+        summary = f"{done} prompts in {elapsed:.1f}s ({done / elapsed if elapsed else 0:.1f}/s), {self.failed} failed, {self.retries} retries"
+        if self.latencies:
+            latencies = sorted(self.latencies)
+            p99 = latencies[min(len(latencies) - 1, int(0.99 * len(latencies)))]
+            summary += f", latency p50 {1000 * statistics.median(latencies):.0f} ms, p99 {1000 * p99:.0f} ms"
+        return summary
+
+
+def retry_after_seconds(res):
+    """The delay a `Retry-After` header asks for, in seconds, or None."""
+    value = res.headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class BatchCompleter:
+    """
+    Sends chat completions to an OpenAI-compatible `/v1/chat/completions` endpoint
+    with as many requests in flight as the server keeps up with.
+
+    Concurrency starts at `initial_concurrency` and is adapted by an
+    `AdaptiveLimiter` up to `max_concurrency`. Connection errors, timeouts and
+    408, 429 or 5xx responses count as overload. The request is retried up to
+    `max_retries` times, after the `Retry-After` delay if the server sent one,
+    or else after an exponential backoff with jitter. Other failures are returned
+    as an `error` without retrying. `params`, such as `max_tokens` and
+    `temperature`, are added to every request.
+
+    `client` is an `httpx.AsyncClient`, used only from the event loop that runs the batch.
+    """
+
+    def __init__(
+        self,
+        client,
+        base_url,
+        model,
+        max_concurrency=DEFAULT_MAX_CONCURRENCY,
+        initial_concurrency=DEFAULT_INITIAL_CONCURRENCY,
+        max_retries=DEFAULT_MAX_RETRIES,
+        backoff=0.5,
+        **params
+    ):
+        self.client = client
+        self.url = urljoin(base_url, "/v1/chat/completions")
+        self.model = model
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.params = params
+        self.limiter = AdaptiveLimiter(initial_concurrency, max_limit=max_concurrency)
+        self.stats = BatchStats()
+
+    async def complete(self, messages):
+        """
+        Complete one conversation. Returns a dict with `answer` and `usage`, or
+        `error`, plus the number of `attempts` and the `latency_ms` from the first attempt
+        to the last one's response.
+        """
+        payload = {"model": self.model, "messages": messages, **self.params}
+        started = None
+        for attempt in range(self.max_retries + 1):
+            delay = None
+            token = await self.limiter.acquire()
+            # Time spent waiting for the first slot is queueing in this process, not latency
+            started = started or time.perf_counter()
+            try:
+                res = await self.client.post(self.url, json=payload)
+            except httpx.TransportError as e:
+                await self.limiter.release(token, overloaded=True)
+                error = str(e) or type(e).__name__
+            else:
+                overloaded = res.status_code in RETRY_STATUS_CODES
+                await self.limiter.release(token, overloaded)
+                if not overloaded:
+                    return self._result(res, attempt + 1, started)
+                error = f"{res.status_code} - {res.text[:200]}"
+                delay = retry_after_seconds(res)
+
+            if attempt == self.max_retries:
+                break
+            self.stats.retries += 1
+            await asyncio.sleep(delay if delay is not None else random.uniform(0, self.backoff * 2 ** attempt))
+
+        self.stats.failed += 1
+        return {"error": error, "attempts": self.max_retries + 1, "latency_ms": _ms_since(started)}
+
+    async def map(self, prompts, window=None):
+        """
+        Complete every `(record, messages)` pair of `prompts` and yield
+        `(record, result)` pairs in input order. `record` is passed through untouched.
+
+        Results that finish early are held until every earlier one is yielded. At
+        most `window` records (by default four times `max_concurrency`) are started
+        ahead of the oldest unfinished one, so one slow request does not let the
+        buffer grow without bound.
+        """
+        window = asyncio.Semaphore(window or 4 * self.limiter.max_limit)
+        queue = asyncio.Queue()
+
+        async def start_all():
+            try:
+                for record, messages in prompts:
+                    await window.acquire()
+                    await queue.put((record, asyncio.create_task(self.complete(messages))))
+            finally:
+                # An error reading `prompts` is raised by `await producer` below
+                await queue.put(None)
+
+        producer = asyncio.create_task(start_all())
+        try:
+            while (item := await queue.get()) is not None:
+                record, task = item
+                yield record, await task
+                window.release()
+            await producer
+        finally:
+            # Stops the requests still running if the caller stopped reading early or the run was cancelled
+            producer.cancel()
+            while not queue.empty():
+                item = queue.get_nowait()
+                if item is not None:
+                    item[1].cancel()
+
+    def _result(self, res, attempts, started):
+        try:
+            if res.status_code != 200:
+                raise ValueError(f"{res.status_code} - {res.text[:200]}")
+            body = res.json()
+            result = {"answer": body["choices"][0]["message"]["content"], "usage": body.get("usage")}
+        except (ValueError, KeyError, IndexError, TypeError) as e:
+            self.stats.failed += 1
+            return {"error": str(e), "attempts": attempts, "latency_ms": _ms_since(started)}
+
+        self.stats.completed += 1
+        self.stats.latencies.append(time.perf_counter() - started)
+        return {**result, "attempts": attempts, "latency_ms": _ms_since(started)}
+
+
+def _ms_since(started):
+    return round(1000 * (time.perf_counter() - started), 1)
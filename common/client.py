@@ -0,0 +1,118 @@
+# SPDX-FileCopyrightText: (c) 2025 Tenstorrent AI ULC
+#
+# SPDX-License-Identifier: Apache-2.0
+"""
+Process-wide HTTP clients for calls to the Tenstorrent inference server.
+
+Every call used to open its own connection, paying the TCP and TLS handshakes to the
+remote host again on each request, rerun and session. The clients here are created
+once per process and keep their connections alive, so they are reused across
+Streamlit reruns and sessions. HTTP/2 is negotiated when the `h2` package is
+installed (`pip install httpx[http2]`) and the server supports it.
+
+Set TT_CLIENT_POOLING=0 to give every call a fresh connection again, e.g. to measure
+the difference with tools/bench_client.py.
+"""
+
+from urllib.parse import urljoin
+import asyncio
+import importlib.util
+import os
+import threading
+
+import httpx
+
+
+# Connect timeout, and the longest wait for any read or write; long enough for a full completion
+TIMEOUT = httpx.Timeout(300, connect=10)
+LIMITS = httpx.Limits(max_connections=32, max_keepalive_connections=16, keepalive_expiry=120)
+HTTP2 = importlib.util.find_spec("h2") is not None
+POOLING = os.environ.get("TT_CLIENT_POOLING", "1") != "0"
+# Responses worth retrying: rate limiting and transient server errors
+RETRY_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+_lock = threading.Lock()
+_client = None
+_async_client = None
+_loop = None
+_openai = {}
+
+
+def new_client(cls=httpx.AsyncClient, max_connections=None):
+    """
+    A new client of `cls` with the shared clients' timeout, pooling and HTTP/2 settings,
+    optionally allowing `max_connections` connections.
+
+    Only for code that owns its event loop, such as a CLI under `asyncio.run()` or a
+    web server: async connections belong to the loop that opened them, so such code
+    cannot use `get_async_client()`. Close the client when the loop ends.
+    """
+    if not POOLING:
+        # No keep-alive: every request opens, and afterwards closes, its own connection
+        return cls(timeout=TIMEOUT, limits=httpx.Limits(max_keepalive_connections=0), http2=False)
+    limits = LIMITS
+    if max_connections is not None:
+        limits = httpx.Limits(
+            max_connections=max_connections, max_keepalive_connections=max_connections, keepalive_expiry=LIMITS.keepalive_expiry
+        )
+    return cls(timeout=TIMEOUT, limits=limits, http2=HTTP2)
+
+
+def get_client():
+    """The shared `httpx.Client`. It is thread-safe, and its responses work like `requests` responses."""
+    global _client
+    with _lock:
+        if _client is None:
+            _client = new_client(httpx.Client)
+        return _client
+
+
+def get_async_client():
+    """The shared `httpx.AsyncClient`. Only use it in coroutines run with `run_async()`."""
+    global _async_client
+    with _lock:
+        if _async_client is None:
+            _async_client = new_client(httpx.AsyncClient)
+        return _async_client
+
+
+def _get_loop():
+    global _loop
+    with _lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="tt-client-loop", daemon=True).start()
+        return _loop
+
+
+def run_async(coro):
+    """
+    Run `coro` on the shared event loop and return its result.
+
+    Use it instead of `asyncio.run()`, which creates a new loop on every call.
+    Connections of the async client belong to the loop they were opened on, so
+    pooled connections would not outlive the call.
+    """
+    return asyncio.run_coroutine_threadsafe(coro, _get_loop()).result()
+
+
+def get_openai(base_url):
+    """An `openai.OpenAI` client for the server at `base_url` that uses the shared connection pool."""
+    from openai import OpenAI
+    return _get_openai(OpenAI, base_url, get_client)
+
+
+def get_async_openai(base_url):
+    """An `openai.AsyncOpenAI` client for the server at `base_url`; run its calls with `run_async()`."""
+    from openai import AsyncOpenAI
+    return _get_openai(AsyncOpenAI, base_url, get_async_client)
+
+
+def _get_openai(cls, base_url, http_client):
+    key = (cls.__name__, base_url)
+    client = _openai.get(key)
+    if client is None:
+        client = cls(base_url=urljoin(base_url, "v1"), api_key="null", http_client=http_client())
+        with _lock:
+            client = _openai.setdefault(key, client)
+    return client
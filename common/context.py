@@ -0,0 +1,111 @@
+# SPDX-FileCopyrightText: (c) 2025 Tenstorrent AI ULC
+#
+# SPDX-License-Identifier: Apache-2.0
+"""Pack retrieved chunks into a prompt context under a token budget."""
+
+
+def estimate_tokens(text):
+    """Rough token count, about four characters per token for English text."""
+    return (len(text) + 3) // 4
+
+
+class _Span:
+    def __init__(self, start, units):
+        self.start = start
+        self.units = units
+
+    @property
+    def end(self):
+        return self.start + len(self.units)
+
+    def merge(self, other):
+        """Absorb an overlapping or adjacent span of the same source."""
+        first, second = (self, other) if self.start <= other.start else (other, self)
+        units = first.units
+        if second.end > first.end:
+            units = units + second.units[first.end - second.start:]
+        self.start, self.units = first.start, units
+
+
+def pack_context(passages, max_tokens, unit="word", count_tokens=estimate_tokens, separator="\n\n"):
+    """
+    Build a context string from retrieved passages without repeating text.
+
+    `passages` is a best-first list of dicts with the chunk `text`, the `source` it
+    came from and `start`, the offset of the chunk in its source in `unit`s
+    ("word" or "char"), or None if unknown. Passages are taken in rank order.
+    Chunks that overlap or touch a chunk already taken from the same source are
+    merged by offset, so only their new text counts against `max_tokens`. Passages
+    whose new text does not fit are skipped. The result lists each source's text
+    in document order.
+    """
+    join = " ".join if unit == "word" else "".join
+    split = str.split if unit == "word" else str
+
+    spans = {}  # source -> list of _Span sorted by start
+    loose = []  # passages without offsets, deduplicated by text only
+    used = 0
+
+    for passage in passages:
+        text, source, start = passage["text"], passage.get("source"), passage.get("start")
+
+        if start is None:
+            if any(text in kept for kept in loose) or any(text in join(s.units) for s in spans.get(source, [])):
+                continue
+            cost = count_tokens(text)
+            if used + cost > max_tokens:
+                continue
+            loose = [kept for kept in loose if kept not in text] + [text]
+            used += cost
+            continue
+
+        span = _Span(start, split(text))
+        source_spans = spans.setdefault(source, [])
+
+        new_text = join(_uncovered(span, source_spans))
+        if not new_text:
+            continue
+
+        cost = count_tokens(new_text)
+        if used + cost > max_tokens:
+            if used:
+                continue
+            # Not even the best passage fits, keep as much of it as the budget allows
+            span.units = _truncate(span.units, max_tokens, join, count_tokens)
+            cost = count_tokens(join(span.units))
+
+        used += cost
+        for other in [s for s in source_spans if s.start <= span.end and span.start <= s.end]:
+            source_spans.remove(other)
+            span.merge(other)
+        source_spans.append(span)
+        source_spans.sort(key=lambda s: s.start)
+
+    blocks = [join(span.units) for source_spans in spans.values() for span in source_spans]
+    return separator.join(blocks + loose)
+
+
+def _uncovered(span, source_spans):
+    """Units of `span` that are not already covered by `source_spans`."""
+    uncovered = []
+    position = span.start
+    for other in source_spans:
+        if other.end <= position or other.start >= span.end:
+            continue
+        if other.start > position:
+            uncovered.extend(span.units[position - span.start:other.start - span.start])
+        position = max(position, other.end)
+    if position < span.end:
+        uncovered.extend(span.units[position - span.start:])
+    return uncovered
+
+
+def _truncate(units, max_tokens, join, count_tokens):
+    low, high = 0, len(units)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if count_tokens(join(units[:middle])) <= max_tokens:
+            low = middle
+        else:
+            high = middle - 1
+    return units[:low]
@@ -0,0 +1,103 @@
+# SPDX-FileCopyrightText: (c) 2025 Tenstorrent AI ULC
+#
+# SPDX-License-Identifier: Apache-2.0
+"""Near-duplicate detection for chunks with MinHash signatures and LSH banding."""
+
+import re
+import threading
+import zlib
+
+import numpy as np
+
+
+DEFAULT_THRESHOLD = 0.9
+DEFAULT_NUM_PERM = 128
+DEFAULT_BANDS = 16
+DEFAULT_SHINGLE_SIZE = 5
+
+# A prime above 2**32: with 32-bit shingle hashes and coefficients, a * x + b fits in uint64
+_PRIME = np.uint64(4294967311)
+
+
+def tokens(text):
+    return re.findall(r"\w+", text.lower())
+
+
+def shingles(text, size=DEFAULT_SHINGLE_SIZE):
+    """CRC32 hashes of the lowercased `size`-word windows of `text`, which must have at least `size` words."""
+    words = tokens(text)
+    return {zlib.crc32(" ".join(words[i:i + size]).encode("utf-8")) for i in range(len(words) - size + 1)}
+
+
+class NearDuplicateFilter:
+    """
+    Drops texts whose estimated Jaccard similarity to a text already kept is at least
+    `threshold`.
+
+    Each text is reduced to a MinHash signature of `num_perm` values over its word
+    shingles. The signature is cut into `bands` bands, and only kept texts sharing a
+    whole band with the new one are compared to it, so a check costs about the same
+    however many texts have been kept. With the defaults, pairs above 0.9 similarity
+    are caught with near certainty and pairs below 0.5 are rarely even compared.
+
+    Texts with fewer words than `shingle_size` have no shingle to compare, so they
+    are always kept. A filter remembers every text it kept, so use one per document
+    or crawl.
+    `removed` counts the texts dropped so far.
+    """
+
+    def __init__(self, threshold=DEFAULT_THRESHOLD, num_perm=DEFAULT_NUM_PERM, bands=DEFAULT_BANDS,
+                 shingle_size=DEFAULT_SHINGLE_SIZE, seed=1):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, 2**32, size=(num_perm, 1), dtype=np.uint64)
+        self._b = rng.integers(0, 2**32, size=(num_perm, 1), dtype=np.uint64)
+
+        self._buckets = [{} for _ in range(bands)]  # band bytes -> indexes into _signatures
+        self._signatures = []
+        self._lock = threading.Lock()
+        self.kept = 0
+        self.removed = 0
+
+    def signature(self, text):
+        hashes = np.fromiter(shingles(text, self.shingle_size), dtype=np.uint64)
+        return ((self._a * hashes + self._b) % _PRIME).min(axis=1)
+
+    def is_duplicate(self, text):
+        """Return True if `text` is a near-duplicate of a kept text, otherwise keep it and return False."""
+        if len(tokens(text)) < self.shingle_size:
+            with self._lock:
+                self.kept += 1
+            return False
+
+        signature = self.signature(text)
+        bands = [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+        with self._lock:
+            candidates = set()
+            for buckets, band in zip(self._buckets, bands):
+                candidates.update(buckets.get(band, ()))
+
+            for index in candidates:
+                if np.mean(self._signatures[index] == signature) >= self.threshold:
+                    self.removed += 1
+                    return True
+
+            index = len(self._signatures)
+            self._signatures.append(signature)
+            for buckets, band in zip(self._buckets, bands):
+                buckets.setdefault(band, []).append(index)
+            self.kept += 1
+            return False
+
+    def filter(self, items, key=None):
+        """Yield the items of `items` that are not near-duplicates, comparing `key(item)` or the item itself."""
+        for item in items:
+            if not self.is_duplicate(key(item) if key else item):
+                yield item
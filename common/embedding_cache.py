@@ -0,0 +1,144 @@
+# SPDX-FileCopyrightText: (c) 2025 Tenstorrent AI ULC
+#
+# SPDX-License-Identifier: Apache-2.0
+"""Content-addressed, disk-backed cache of text embeddings."""
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+
+import numpy as np
+
+
+QUERY_PREFIX = "\x00query\x00"
+
+
+class EmbeddingCache:
+    """
+    Embeddings of one model, keyed by the SHA-256 of the embedded text.
+
+    Vectors are appended as raw float16 rows to `vectors.f16` and an SQLite index maps
+    each text hash to its row, both under `path/<model>/`. The SQLite write lock also
+    serializes row allocation, so several processes can share one cache directory.
+    """
+
+    def __init__(self, path, model):
+        self.model = model
+        directory = os.path.join(path, re.sub(r"[^A-Za-z0-9_.-]+", "_", model))
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(directory, "index.sqlite"), check_same_thread=False)
+        self._db.execute("CREATE TABLE IF NOT EXISTS vectors (hash TEXT PRIMARY KEY, row INTEGER NOT NULL)")
+        self._db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._db.commit()
+        self._fd = os.open(os.path.join(directory, "vectors.f16"), os.O_RDWR | os.O_CREAT, 0o644)
+
+        row = self._db.execute("SELECT value FROM meta WHERE key = 'dim'").fetchone()
+        self.dim = int(row[0]) if row else None
+
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+
+    @staticmethod
+    def text_hash(text):
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def get_many(self, texts):
+        """Return a float32 vector for every cached text and None for the rest."""
+        hashes = [self.text_hash(text) for text in texts]
+        with self._lock:
+            rows = {}
+            for start in range(0, len(hashes), 500):
+                batch = hashes[start:start + 500]
+                query = f"SELECT hash, row FROM vectors WHERE hash IN ({','.join('?' * len(batch))})"
+                rows.update(self._db.execute(query, batch).fetchall())
+
+            vectors = []
+            for text, text_hash in zip(texts, hashes):
+                row = rows.get(text_hash)
+                if row is None:
+                    self.misses += 1
+                    vectors.append(None)
+                    continue
+
+                self.hits += 1
+                self.bytes_saved += len(text.encode("utf-8"))
+                data = os.pread(self._fd, 2 * self.dim, row * 2 * self.dim)
+                vectors.append(np.frombuffer(data, dtype="<f2").astype(np.float32))
+            return vectors
+
+    def put_many(self, texts, vectors):
+        vectors = np.asarray(vectors, dtype="<f2")
+        if not len(vectors):
+            return
+
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                if self.dim is None:
+                    self.dim = vectors.shape[1]
+                    self._db.execute("INSERT OR IGNORE INTO meta VALUES ('dim', ?)", (str(self.dim),))
+                if vectors.shape[1] != self.dim:
+                    raise ValueError(f"expected {self.dim}-dimensional embeddings for {self.model}, got {vectors.shape[1]}")
+
+                row_bytes = 2 * self.dim
+                next_row = os.fstat(self._fd).st_size // row_bytes
+                os.pwrite(self._fd, vectors.tobytes(), next_row * row_bytes)
+
+                self._db.executemany(
+                    "INSERT OR IGNORE INTO vectors VALUES (?, ?)",
+                    [(self.text_hash(text), next_row + i) for i, text in enumerate(texts)]
+                )
+                self._db.commit()
+            except BaseException:
+                self._db.rollback()
+                raise
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "bytes_saved": self.bytes_saved,
+        }
+
+
+class CachedEmbeddings:
+    """
+    Wraps any LangChain-style embeddings object (`embed_documents`/`embed_query`)
+    so that every text is looked up in an `EmbeddingCache` before it is sent to
+    the model. Only cache misses reach the wrapped embeddings.
+    """
+
+    def __init__(self, embeddings, cache):
+        self.embeddings = embeddings
+        self.cache = cache
+
+    def embed_documents(self, texts):
+        return self._embed(texts, self.embeddings.embed_documents)
+
+    def embed_query(self, text):
+        # Some models embed queries differently, so they get their own keys
+        return self._embed([QUERY_PREFIX + text], lambda texts: [self.embeddings.embed_query(text)])[0]
+
+    def _embed(self, texts, embed):
+        vectors = self.cache.get_many(texts)
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+
+        if missing:
+            # Identical texts in one batch are embedded once
+            unique_texts = list(dict.fromkeys(texts[i] for i in missing))
+            computed = np.asarray(embed(unique_texts), dtype="<f2")
+            self.cache.put_many(unique_texts, computed)
+
+            # Return what the cache will return next time, not the full-precision vectors
+            by_text = dict(zip(unique_texts, computed.astype(np.float32)))
+            for i in missing:
+                vectors[i] = by_text[texts[i]]
+
+        return [vector.tolist() for vector in vectors]
@@ -0,0 +1,168 @@
+# SPDX-FileCopyrightText: (c) 2025 Tenstorrent AI ULC
+#
+# SPDX-License-Identifier: Apache-2.0
+"""Batched, concurrent client for embedding servers."""
+
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin
+import os
+import threading
+import time
+
+import httpx
+
+from common.client import RETRY_STATUS_CODES, get_client
+
+
+DEFAULT_BATCH_SIZE = 64
+DEFAULT_CONCURRENCY = 4
+DEFAULT_MAX_RETRIES = 3
+
+
+class EmbeddingStats:
+    def __init__(self):
+        self.chunks = 0
+        self.batches = 0
+        self.retries = 0
+        self.seconds = 0.0
+
+    @property
+    def chunks_per_second(self):
+        return self.chunks / self.seconds if self.seconds else 0.0
+
+    def report(self):
+        return (
+            f"{self.chunks} chunks in {self.batches} batches, {self.seconds:.1f}s, "
+            f"{self.chunks_per_second:.1f} chunks/s, {self.retries} retries"
+        )
+
+
+class EmbeddingClient:
+    """
+    Embeds texts through an OpenAI-compatible `/v1/embeddings` server (`api="openai"`)
+    or Ollama's `/api/embed` (`api="ollama"`).
+
+    Texts are sent in batches of `batch_size`, with up to `concurrency` batches in
+    flight over the process-wide connection pool of `common.client`. A batch that fails with a connection error,
+    a timeout or a retryable status is retried up to `max_retries` times with
+    exponential backoff. Results always come back in input order.
+
+    The client can be used wherever LangChain embeddings are expected
+    (`embed_documents`/`embed_query`), and calling it like a Chroma embedding
+    function embeds a list of texts.
+    """
+
+    def __init__(
+        self,
+        base_url,
+        model,
+        api="openai",
+        batch_size=DEFAULT_BATCH_SIZE,
+        concurrency=DEFAULT_CONCURRENCY,
+        max_retries=DEFAULT_MAX_RETRIES,
+        backoff=0.5,
+        timeout=60,
+        headers=None,
+    ):
+        if api not in ("openai", "ollama"):
+            raise ValueError(f"unknown embedding API {api!r}, expected 'openai' or 'ollama'")
+
+        self.model = model
+        self.api = api
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.url = urljoin(base_url, "/v1/embeddings" if api == "openai" else "/api/embed")
+        self.headers = headers or {}
+        self.stats = EmbeddingStats()
+
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="embed")
+        self._stats_lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, prefix, base_url=None, model=None, api="openai"):
+        """
+        Build a client from `<prefix>_EMBEDDING_URL`, `_MODEL`, `_API`, `_BATCH_SIZE`,
+        `_CONCURRENCY` and `_MAX_RETRIES`, falling back to the given defaults.
+        Returns None when no server URL is configured.
+        """
+        def env(name, default=None):
+            return os.environ.get(f"{prefix}_EMBEDDING_{name}", default)
+
+        base_url = env("URL", base_url)
+        if not base_url:
+            return None
+
+        return cls(
+            base_url,
+            env("MODEL", model),
+            api=env("API", api),
+            batch_size=int(env("BATCH_SIZE", DEFAULT_BATCH_SIZE)),
+            concurrency=int(env("CONCURRENCY", DEFAULT_CONCURRENCY)),
+            max_retries=int(env("MAX_RETRIES", DEFAULT_MAX_RETRIES)),
+        )
+
+    @property
+    def identity(self):
+        """Names the vector space; indexes built with a different identity are not comparable."""
+        return f"{self.api}:{self.model}"
+
+    def embed(self, texts):
+        texts = list(texts)
+        if not texts:
+            return []
+
+        started = time.perf_counter()
+        batches = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+        if len(batches) == 1:
+            results = [self._embed_batch(batches[0])]
+        else:
+            results = list(self._executor.map(self._embed_batch, batches))
+
+        with self._stats_lock:
+            self.stats.chunks += len(texts)
+            self.stats.batches += len(batches)
+            self.stats.seconds += time.perf_counter() - started
+        return [vector for batch in results for vector in batch]
+
+    def _embed_batch(self, batch):
+        for attempt in range(self.max_retries + 1):
+            try:
+                res = get_client().post(
+                    self.url, json={"model": self.model, "input": batch}, headers=self.headers, timeout=self.timeout
+                )
+                if res.status_code not in RETRY_STATUS_CODES:
+                    res.raise_for_status()
+                    return self._parse(res.json(), len(batch))
+                error = httpx.HTTPStatusError(f"{res.status_code} - {res.text[:200]}", request=res.request, response=res)
+            except httpx.TransportError as e:
+                error = e
+
+            if attempt == self.max_retries:
+                raise error
+
+            with self._stats_lock:
+                self.stats.retries += 1
+            time.sleep(self.backoff * 2 ** attempt)
+
+    def _parse(self, body, expected):
+        if self.api == "openai":
+            vectors = [item["embedding"] for item in sorted(body["data"], key=lambda item: item["index"])]
+        else:
+            vectors = body["embeddings"]
+
+        if len(vectors) != expected:
+            raise ValueError(f"embedding server returned {len(vectors)} vectors for {expected} texts")
+        return vectors
+
+    # LangChain embeddings interface
+    def embed_documents(self, texts):
+        return self.embed(texts)
+
+    def embed_query(self, text):
+        return self.embed([text])[0]
+
+    def __call__(self, input):
+        return self.embed(input)
@@ -0,0 +1,145 @@
+# SPDX-FileCopyrightText: (c) 2025 Tenstorrent AI ULC
+#
+# SPDX-License-Identifier: Apache-2.0
+"""Cached, health-checked lists of the models an inference server serves."""
+
+from urllib.parse import urljoin
+import os
+import threading
+import time
+
+import httpx
+
+from common.client import get_client
+
+
+DEFAULT_TTL = 60
+# A failed lookup is retried after this many seconds, so a dead instance is not asked on every rerun
+DEFAULT_RETRY_AFTER = 5
+# Model listing is cheap; a server that takes longer than this is treated as down
+DEFAULT_TIMEOUT = httpx.Timeout(5, connect=3)
+
+
+class ModelList:
+    """The result of one lookup: the model ids, or the error that prevented listing them."""
+
+    def __init__(self, ids=(), error=None, checked_at=0.0):
+        self.ids = list(ids)
+        self.error = error
+        self.checked_at = checked_at
+
+    @property
+    def ready(self):
+        """Whether the server answered the last check and serves at least one model."""
+        return self.error is None and bool(self.ids)
+
+    @property
+    def model_id(self):
+        """The first model, which the apps use by default, or None."""
+        return self.ids[0] if self.ids else None
+
+
+class ModelRegistry:
+    """
+    Looks up `/v1/models` once per server and keeps the answer for `ttl` seconds.
+
+    After the TTL, the last known list is still returned at once while a background
+    thread refreshes it, so a page never waits on a lookup it already made. A server
+    is only asked synchronously the first time, with a short `timeout`. A failed lookup
+    is remembered for `retry_after` seconds, and, if the server listed models before,
+    those are kept and returned with the error. Concurrent lookups of one server
+    share one request.
+    """
+
+    def __init__(self, ttl=DEFAULT_TTL, retry_after=DEFAULT_RETRY_AFTER, timeout=DEFAULT_TIMEOUT):
+        self.ttl = ttl
+        self.retry_after = retry_after
+        self.timeout = timeout
+        self._entries = {}
+        self._refreshing = set()
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def get(self, base_url):
+        """Return the `ModelList` of the server at `base_url`."""
+        entry = self._cached(base_url)
+        if entry is not None:
+            return entry
+
+        with self._url_lock(base_url):
+            # Another session may have looked it up while this one waited
+            entry = self._cached(base_url)
+            return entry if entry is not None else self.refresh(base_url)
+
+    def ready(self, base_url):
+        """Readiness probe: whether the server listed at least one model in its last check."""
+        return self.get(base_url).ready
+
+    def refresh(self, base_url):
+        """Look the models up now and store the result."""
+        entry = self._fetch(base_url)
+        with self._lock:
+            previous = self._entries.get(base_url)
+            if entry.error is not None and previous is not None and previous.ids:
+                # Keep the last known models so pages keep working through a restart or a blip
+                entry = ModelList(previous.ids, entry.error, entry.checked_at)
+            self._entries[base_url] = entry
+        return entry
+
+    def forget(self, base_url):
+        with self._lock:
+            self._entries.pop(base_url, None)
+
+    def _cached(self, base_url):
+        with self._lock:
+            entry = self._entries.get(base_url)
+            if entry is None:
+                return None
+            max_age = self.ttl if entry.error is None else self.retry_after
+            if time.time() - entry.checked_at < max_age:
+                return entry
+            if not entry.ids:
+                return None
+            if base_url not in self._refreshing:
+                self._refreshing.add(base_url)
+                threading.Thread(target=self._background_refresh, args=(base_url,), daemon=True).start()
+            return entry
+
+    def _background_refresh(self, base_url):
+        try:
+            self.refresh(base_url)
+        finally:
+            with self._lock:
+                self._refreshing.discard(base_url)
+
+    def _fetch(self, base_url):
+        now = time.time()
+        try:
+            res = get_client().get(
+                urljoin(base_url, "/v1/models"), headers={"accept": "application/json"}, timeout=self.timeout
+            )
+            res.raise_for_status()
+            ids = [model["id"] for model in res.json()["data"]]
+        except httpx.HTTPStatusError as e:
+            return ModelList(error=f"{e.response.status_code} - {e.response.text[:200]}", checked_at=now)
+        except (httpx.HTTPError, ValueError, KeyError, TypeError) as e:
+            return ModelList(error=str(e) or type(e).__name__, checked_at=now)
+        if not ids:
+            return ModelList(error="the server lists no models", checked_at=now)
+        return ModelList(ids, checked_at=now)
+
+    def _url_lock(self, base_url):
+        with self._lock:
+            return self._locks.setdefault(base_url, threading.Lock())
+
+
+# One registry per process, shared by every rerun and session
+registry = ModelRegistry(
+    ttl=int(os.environ.get("TT_MODELS_TTL", DEFAULT_TTL)),
+    retry_after=int(os.environ.get("TT_MODELS_RETRY_AFTER", DEFAULT_RETRY_AFTER)),
+)
+
+
+def get_models(base_url):
+    """The `ModelList` of the server at `base_url` from the shared registry."""
+    return registry.get(base_url)
@@ -0,0 +1,129 @@
+# SPDX-FileCopyrightText: (c) 2025 Tenstorrent AI ULC
+#
+# SPDX-License-Identifier: Apache-2.0
+"""Sentence embeddings from a local ONNX model with one reused, thread-tuned session."""
+
+import os
+import threading
+import time
+
+import numpy as np
+
+from common.embeddings import EmbeddingStats
+
+
+DEFAULT_BATCH_SIZE = 32
+DEFAULT_MAX_LENGTH = 256
+# The model Chroma embeds with by default, in the directory Chroma downloads it to
+CHROMA_MODEL_DIR = os.path.join(os.path.expanduser("~"), ".cache", "chroma", "onnx_models", "all-MiniLM-L6-v2", "onnx")
+
+
+def default_threads():
+    # Leave half the cores to the web server and the rest of the app
+    return max(1, (os.cpu_count() or 2) // 2)
+
+
+class OnnxEmbedder:
+    """
+    Mean-pooled, L2-normalized sentence embeddings from a transformer exported to
+    ONNX, such as all-MiniLM-L6-v2.
+
+    `model_dir` holds `model.onnx` and `tokenizer.json`. By default it is the copy
+    of all-MiniLM-L6-v2 that Chroma uses, which Chroma downloads if it is missing.
+    One ONNX Runtime session is created up front and shared by every call and
+    thread, with `threads` intra-op threads. Texts are embedded in batches of
+    `batch_size`. Each batch holds texts of similar length and is padded only to its
+    longest text, not to `max_length`, which saves most of the work on short chunks.
+
+    It has the same `embed`/`identity`/`stats` interface as
+    `common.embeddings.EmbeddingClient`.
+    """
+
+    def __init__(self, model_dir=None, threads=None, batch_size=DEFAULT_BATCH_SIZE, max_length=DEFAULT_MAX_LENGTH, providers=None):
+        import onnxruntime
+        from tokenizers import Tokenizer
+
+        if model_dir is None:
+            model_dir = CHROMA_MODEL_DIR
+            if not os.path.exists(os.path.join(model_dir, "model.onnx")):
+                from chromadb.utils.embedding_functions import ONNXMiniLM_L6_V2
+                ONNXMiniLM_L6_V2()._download_model_if_not_exists()
+
+        self.model_dir = model_dir
+        self.threads = threads or default_threads()
+        self.batch_size = batch_size
+        self.stats = EmbeddingStats()
+        self._stats_lock = threading.Lock()
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.enable_padding(pad_id=0, pad_token="[PAD]")
+
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = self.threads
+        options.inter_op_num_threads = 1
+        options.execution_mode = onnxruntime.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.log_severity_level = 3
+        self.session = onnxruntime.InferenceSession(
+            os.path.join(model_dir, "model.onnx"),
+            sess_options=options,
+            providers=providers or ["CPUExecutionProvider"],
+        )
+        self._input_names = {model_input.name for model_input in self.session.get_inputs()}
+
+    @property
+    def identity(self):
+        """Names the vector space; indexes built with a different identity are not comparable."""
+        path = os.path.normpath(self.model_dir)
+        name = os.path.basename(os.path.dirname(path)) if os.path.basename(path) == "onnx" else os.path.basename(path)
+        return f"onnx:{name}"
+
+    def embed(self, texts):
+        texts = list(texts)
+        if not texts:
+            return []
+
+        started = time.perf_counter()
+        # Batches of similar length waste less work on padding
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        vectors = np.empty((len(texts), 0), dtype=np.float32)
+        batches = 0
+        for start in range(0, len(order), self.batch_size):
+            rows = order[start:start + self.batch_size]
+            embedded = self._embed_batch([texts[i] for i in rows])
+            if vectors.shape[1] == 0:
+                vectors = np.empty((len(texts), embedded.shape[1]), dtype=np.float32)
+            vectors[rows] = embedded
+            batches += 1
+
+        with self._stats_lock:
+            self.stats.chunks += len(texts)
+            self.stats.batches += batches
+            self.stats.seconds += time.perf_counter() - started
+        return list(vectors)
+
+    def _embed_batch(self, batch):
+        encoded = self.tokenizer.encode_batch(batch)
+        input_ids = np.array([e.ids for e in encoded], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encoded], dtype=np.int64)
+
+        inputs = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self._input_names:
+            inputs["token_type_ids"] = np.zeros_like(input_ids)
+        hidden = self.session.run(None, inputs)[0]
+
+        mask = attention_mask[:, :, None].astype(np.float32)
+        pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        return (pooled / np.maximum(norms, 1e-12)).astype(np.float32)
+
+    # LangChain embeddings interface
+    def embed_documents(self, texts):
+        return self.embed(texts)
+
+    def embed_query(self, text):
+        return self.embed([text])[0]
+
+    def __call__(self, input):
+        return self.embed(input)
@@ -0,0 +1,103 @@
+# SPDX-FileCopyrightText: (c) 2025 Tenstorrent AI ULC
+#
+# SPDX-License-Identifier: Apache-2.0
+"""Reranking of over-fetched retrieval candidates: maximal marginal relevance and pluggable scorers."""
+
+import numpy as np
+
+
+DEFAULT_LAMBDA = 0.5
+# Candidates fetched per chunk that is finally kept
+DEFAULT_FETCH_FACTOR = 3
+
+
+def _normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def mmr(query_embedding, embeddings, k, lambda_mult=DEFAULT_LAMBDA, relevance=None):
+    """
+    Return the indexes of up to `k` rows of `embeddings` picked by maximal marginal
+    relevance, in the order they were picked.
+
+    Every step picks the candidate that maximizes `lambda_mult * relevance -
+    (1 - lambda_mult) * max similarity to the candidates already picked`, so 1.0 is
+    plain relevance ranking and lower values favour diversity. Relevance is the
+    cosine similarity to `query_embedding` unless `relevance` gives a score per
+    candidate, which is min-max scaled to [0, 1] first. The candidate similarity
+    matrix is computed once, and each step is one vector update.
+    """
+    embeddings = _normalize(embeddings)
+    if len(embeddings) == 0 or k <= 0:
+        return []
+
+    if relevance is None:
+        relevance = embeddings @ _normalize(query_embedding)
+    else:
+        relevance = np.asarray(relevance, dtype=np.float32)
+        spread = relevance.max() - relevance.min()
+        relevance = (relevance - relevance.min()) / spread if spread else np.ones_like(relevance)
+
+    similarity = embeddings @ embeddings.T
+    # Highest similarity of each candidate to any picked one; nothing is picked at first
+    redundancy = np.zeros(len(embeddings), dtype=np.float32)
+    available = np.ones(len(embeddings), dtype=bool)
+
+    picked = []
+    for _ in range(min(k, len(embeddings))):
+        scores = lambda_mult * relevance - (1 - lambda_mult) * redundancy
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        redundancy = np.maximum(redundancy, similarity[best]) if picked else similarity[best]
+        picked.append(best)
+        available[best] = False
+    return picked
+
+
+class CrossEncoderScorer:
+    """
+    Scores (query, passage) pairs with a local cross-encoder from
+    `sentence-transformers`, e.g. "cross-encoder/ms-marco-MiniLM-L-6-v2".
+    The package is optional and only imported when a scorer is created.
+    """
+
+    def __init__(self, model_name, device=None):
+        try:
+            from sentence_transformers import CrossEncoder
+        except ImportError as e:
+            raise ImportError("CrossEncoderScorer needs sentence-transformers: pip install sentence-transformers") from e
+        self.model = CrossEncoder(model_name, device=device)
+
+    def __call__(self, query, texts):
+        return self.model.predict([(query, text) for text in texts])
+
+
+class Reranker:
+    """
+    Picks a relevant, diverse subset of retrieval candidates.
+
+    `scorer(query, texts)`, if given, returns one relevance score per text (a
+    cross-encoder, for instance) and replaces embedding similarity as the relevance
+    term of MMR. Diversity always comes from the candidates' embeddings.
+    """
+
+    def __init__(self, lambda_mult=DEFAULT_LAMBDA, scorer=None, fetch_factor=DEFAULT_FETCH_FACTOR):
+        self.lambda_mult = lambda_mult
+        self.scorer = scorer
+        self.fetch_factor = fetch_factor
+
+    def candidates(self, k):
+        """How many candidates to retrieve to return `k` of them."""
+        return k * self.fetch_factor
+
+    def rerank(self, query, query_embedding, texts, embeddings, k, relevance=None):
+        """
+        Return the indexes of the `k` candidates to keep, best first. `relevance`
+        overrides embedding similarity when there is no scorer, e.g. with scores from
+        a fused ranking.
+        """
+        if self.scorer is not None and len(texts):
+            relevance = self.scorer(query, list(texts))
+        return mmr(query_embedding, embeddings, k, self.lambda_mult, relevance)
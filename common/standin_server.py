@@ -0,0 +1,357 @@
+# SPDX-FileCopyrightText: (c) 2025 Tenstorrent AI ULC
+#
+# SPDX-License-Identifier: Apache-2.0
+"""
+Offline stand-in for the OpenAI-compatible and Ollama endpoints the apps call.
+
+Serves `/v1/models`, `/v1/chat/completions` (plain and streamed, with tool calls),
+`/v1/embeddings` and Ollama's `/api/embed`, so benchmarks and local runs need no
+Tenstorrent instance or embedding model. Embeddings are deterministic hashed
+bag-of-words vectors, so texts that share words land close together and retrieval
+results are meaningful.
+
+By default, answers come back at once. For load tests, a simple latency model
+imitates an LLM server:
+
+- prefill: the first token comes `--prefill-latency` seconds, plus the prompt tokens
+  divided by `--prefill-rate`, after the request starts.
+- decode: then tokens follow at `--decode-rate` tokens per second, up to
+  `--reply-tokens` of them or `max_tokens`.
+- capacity: at most `--max-batch` requests are generated at once, and others wait.
+  With `--max-queue`, requests beyond the batch and queue get `429` and `Retry-After`.
+
+Tokens are counted as words and punctuation marks.
+
+    python -m common.standin_server --port 8000 --prefill-rate 4000 --decode-rate 30 --max-batch 32
+"""
+
+from contextlib import nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import argparse
+import hashlib
+import itertools
+import json
+import re
+import threading
+import time
+import uuid
+
+import numpy as np
+
+
+MODEL_ID = "standin"
+EMBEDDING_DIM = 384
+FILLER = "The stand-in server pads its answers with these words to reach the configured length .".split(" ")
+
+
+def embed_text(text, dim=EMBEDDING_DIM):
+    """Unit vector of signed word-hash counts."""
+    vector = np.zeros(dim, dtype=np.float32)
+    for word in re.findall(r"\w+", text.lower()):
+        digest = int.from_bytes(hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest(), "little")
+        vector[digest % dim] += 1.0 if digest >> 63 else -1.0
+    norm = np.linalg.norm(vector)
+    return (vector / norm if norm else vector).tolist()
+
+
+def count_tokens(text):
+    return len(re.findall(r"\w+|[^\w\s]", text))
+
+
+def content_text(content):
+    """The text of a message's `content`, which may be a list of parts."""
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return ""
+
+
+def prompt_tokens(body):
+    text = " ".join(content_text(m.get("content")) for m in body.get("messages", []))
+    if body.get("tools"):
+        text += json.dumps(body["tools"])
+    return count_tokens(text)
+
+
+def last_question(messages):
+    return next((content_text(m.get("content")) for m in reversed(messages) if m.get("role") == "user"), "")
+
+
+def reply_for(messages):
+    return f"This is a stand-in answer to: {last_question(messages)[:200]}"
+
+
+def arguments_for(parameters, question):
+    """Arguments that satisfy a tool's JSON schema: the first enum value, or the user's question for strings."""
+    arguments = {}
+    properties = parameters.get("properties", {})
+    for name in parameters.get("required", list(properties)):
+        schema = properties.get(name, {})
+        if schema.get("enum"):
+            arguments[name] = schema["enum"][0]
+        else:
+            arguments[name] = {"integer": 1, "number": 1.0, "boolean": False, "array": [], "object": {}}.get(
+                schema.get("type"), question[:100]
+            )
+    return arguments
+
+
+def tool_call_for(body):
+    """
+    The tool call to answer `body` with, or None. A named `tool_choice` or "required"
+    always calls a tool. "auto" calls one unless a tool result already follows the
+    last user message.
+    """
+    tools = [tool for tool in body.get("tools") or [] if tool.get("type") == "function"]
+    choice = body.get("tool_choice", "auto")
+    messages = body.get("messages", [])
+    if not tools or choice == "none":
+        return None
+    if choice == "auto" and (not messages or messages[-1].get("role") != "user"):
+        return None
+
+    tool = tools[0]
+    if isinstance(choice, dict):
+        name = choice.get("function", {}).get("name")
+        tool = next((t for t in tools if t["function"]["name"] == name), tool)
+    function = tool["function"]
+    return {
+        "id": f"call_{uuid.uuid4().hex[:24]}",
+        "type": "function",
+        "function": {
+            "name": function["name"],
+            "arguments": json.dumps(arguments_for(function.get("parameters") or {}, last_question(messages))),
+        },
+    }
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "StandinServer"
+    # Streamed tokens are tiny writes; don't let Nagle hold them back
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/v1/models":
+            self._json(200, {"object": "list", "data": [{"id": MODEL_ID, "object": "model", "owned_by": "standin"}]})
+        else:
+            self._json(404, {"error": {"message": f"no route for GET {self.path}"}})
+
+    def do_POST(self):
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        except json.JSONDecodeError as e:
+            self._json(400, {"error": {"message": f"invalid JSON: {e}"}})
+            return
+
+        path = self.path.rstrip("/")
+        if path == "/v1/chat/completions":
+            self._chat_completion(body)
+        elif path == "/v1/embeddings":
+            vectors = self._embed(body)
+            self._json(200, {
+                "object": "list",
+                "model": body.get("model", MODEL_ID),
+                "data": [{"object": "embedding", "index": i, "embedding": v} for i, v in enumerate(vectors)],
+            })
+        elif path == "/api/embed":
+            self._json(200, {"model": body.get("model", MODEL_ID), "embeddings": self._embed(body)})
+        else:
+            self._json(404, {"error": {"message": f"no route for POST {self.path}"}})
+
+    def _embed(self, body):
+        texts = body.get("input", [])
+        if isinstance(texts, str):
+            texts = [texts]
+        return [embed_text(text, self.server.embedding_dim) for text in texts]
+
+    def _chat_completion(self, body):
+        if not self.server.admit():
+            self._json(429, {"error": {"message": "the stand-in server is at capacity"}}, {"Retry-After": "1"})
+            return
+        try:
+            with self.server.batch_slot():
+                self._complete(body)
+        finally:
+            self.server.leave()
+
+    def _complete(self, body):
+        started = time.perf_counter()
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        model = body.get("model", MODEL_ID)
+        tool_call = tool_call_for(body)
+
+        if tool_call:
+            arguments = tool_call["function"]["arguments"]
+            # Streamed in pieces of about one token, like a model would generate them
+            pieces = re.findall(r"\s*(?:\w+|[^\w\s])", arguments) or [""]
+            finish_reason = "tool_calls"
+        else:
+            words = reply_for(body.get("messages", [])).split(" ")
+            if self.server.reply_tokens:
+                words = list(itertools.islice(itertools.chain(words, itertools.cycle(FILLER)), self.server.reply_tokens))
+            limit = body.get("max_completion_tokens") or body.get("max_tokens")
+            finish_reason = "length" if limit and len(words) > limit else "stop"
+            words = words[:limit or len(words)]
+            pieces = [word if i == 0 else " " + word for i, word in enumerate(words)]
+
+        n_prompt = prompt_tokens(body)
+        usage = {"prompt_tokens": n_prompt, "completion_tokens": len(pieces), "total_tokens": n_prompt + len(pieces)}
+        first_token_at = started + self.server.prefill_seconds(n_prompt)
+
+        if not body.get("stream"):
+            time.sleep(max(0.0, first_token_at + (len(pieces) - 1) * self.server.token_delay - time.perf_counter()))
+            if tool_call:
+                message = {"role": "assistant", "content": None, "tool_calls": [tool_call]}
+            else:
+                message = {"role": "assistant", "content": "".join(pieces)}
+            self._json(200, {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "message": message, "finish_reason": finish_reason}],
+                "usage": usage,
+            })
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        time.sleep(max(0.0, first_token_at - time.perf_counter()))
+        for i, piece in enumerate(pieces):
+            if i and self.server.token_delay:
+                time.sleep(self.server.token_delay)
+            if not tool_call:
+                delta = {"content": piece}
+            elif i == 0:
+                delta = {"role": "assistant", "tool_calls": [{
+                    "index": 0, "id": tool_call["id"], "type": "function",
+                    "function": {"name": tool_call["function"]["name"], "arguments": piece},
+                }]}
+            else:
+                delta = {"tool_calls": [{"index": 0, "function": {"arguments": piece}}]}
+            self._event({"id": completion_id, "object": "chat.completion.chunk", "model": model,
+                         "choices": [{"index": 0, "delta": delta, "finish_reason": None}]})
+        self._event({"id": completion_id, "object": "chat.completion.chunk", "model": model,
+                     "choices": [{"index": 0, "delta": {}, "finish_reason": finish_reason}], "usage": usage})
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+    def _event(self, data):
+        self.wfile.write(b"data: " + json.dumps(data).encode() + b"\n\n")
+        self.wfile.flush()
+
+    def _json(self, status, data, headers=None):
+        payload = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+class StandinServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address,
+        embedding_dim=EMBEDDING_DIM,
+        token_delay=0.0,
+        decode_rate=None,
+        prefill_latency=0.0,
+        prefill_rate=None,
+        reply_tokens=None,
+        max_batch=None,
+        max_queue=None,
+    ):
+        super().__init__(address, StandinHandler)
+        self.embedding_dim = embedding_dim
+        # `decode_rate`, in tokens per second, takes precedence over the seconds between tokens
+        self.token_delay = 1 / decode_rate if decode_rate else token_delay
+        self.prefill_latency = prefill_latency
+        self.prefill_rate = prefill_rate
+        self.reply_tokens = reply_tokens
+        self.max_batch = max_batch
+        self.max_queue = max_queue
+        self._slots = threading.BoundedSemaphore(max_batch) if max_batch else None
+        self._admitted = 0
+        self._lock = threading.Lock()
+
+    def prefill_seconds(self, n_prompt):
+        return self.prefill_latency + (n_prompt / self.prefill_rate if self.prefill_rate else 0.0)
+
+    def admit(self):
+        """Count a chat completion in, or return False if the batch and the queue are full."""
+        with self._lock:
+            if self.max_batch and self.max_queue is not None and self._admitted >= self.max_batch + self.max_queue:
+                return False
+            self._admitted += 1
+            return True
+
+    def leave(self):
+        with self._lock:
+            self._admitted -= 1
+
+    def batch_slot(self):
+        """Held while a completion is generated; requests beyond `max_batch` wait for one."""
+        return self._slots or nullcontext()
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def start(host="127.0.0.1", port=0, **kwargs):
+    """Serve in a background thread and return the server; `port=0` picks a free port."""
+    server = StandinServer((host, port), **kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True, name="standin-server").start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--embedding-dim", type=int, default=EMBEDDING_DIM)
+    parser.add_argument("--token-delay", type=float, default=0.0, help="Seconds between streamed tokens")
+    parser.add_argument("--decode-rate", type=float, help="Tokens per second after the first one (overrides --token-delay)")
+    parser.add_argument("--prefill-latency", type=float, default=0.0, help="Seconds before the first token of every answer")
+    parser.add_argument("--prefill-rate", type=float, help="Prompt tokens per second added to the time to the first token")
+    parser.add_argument("--reply-tokens", type=int, help="Tokens per answer, before max_tokens (default: a one-line answer)")
+    parser.add_argument("--max-batch", type=int, help="Completions generated at once; others wait")
+    parser.add_argument("--max-queue", type=int, help="Completions allowed to wait for the batch before 429 (default: no limit)")
+    args = parser.parse_args()
+
+    server = StandinServer(
+        (args.host, args.port),
+        embedding_dim=args.embedding_dim,
+        token_delay=args.token_delay,
+        decode_rate=args.decode_rate,
+        prefill_latency=args.prefill_latency,
+        prefill_rate=args.prefill_rate,
+        reply_tokens=args.reply_tokens,
+        max_batch=args.max_batch,
+        max_queue=args.max_queue,
+    )
+    print(f"Stand-in server listening on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
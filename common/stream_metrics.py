@@ -0,0 +1,298 @@
+# SPDX-FileCopyrightText: (c) 2025 Tenstorrent AI ULC
+#
+# SPDX-License-Identifier: Apache-2.0
+"""
+Latency of streamed chat completions: time to first token, inter-token latency and decode speed.
+
+Wrap a stream in a `StreamRecorder` created just before the request is sent:
+
+    recorder = StreamRecorder("chatbot", model_id)
+    stream = client.chat.completions.create(model=model_id, messages=messages, stream=True)
+    for chunk in recorder.wrap(stream):
+        ...
+
+The chunks pass through unchanged. When the stream ends, one record per request is
+appended to a JSONL file (TT_STREAM_METRICS_FILE, empty to turn it off). If
+TT_STREAM_METRICS_PORT is set, the same measurements are also served as Prometheus
+histograms on http://<host>:<port>/metrics.
+
+Every chunk with text counts as one token, which is what vLLM streams. If the server
+reports `usage` in the stream, its completion token count is used for the decode speed.
+"""
+
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+
+
+METRICS_FILE = os.environ.get(
+    "TT_STREAM_METRICS_FILE", str(Path.home() / ".cache" / "tt_example_apps" / "stream_metrics.jsonl")
+)
+METRICS_PORT = os.environ.get("TT_STREAM_METRICS_PORT")
+RECENT = 100
+
+# Histogram buckets, in seconds or tokens per second
+TTFT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+ITL_BUCKETS = (0.005, 0.01, 0.02, 0.03, 0.05, 0.075, 0.1, 0.2, 0.5, 1)
+TPS_BUCKETS = (1, 5, 10, 20, 30, 50, 75, 100, 200)
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))] if values else None
+
+
+def chunk_content(chunk):
+    """The text of a stream chunk: an OpenAI `ChatCompletionChunk`, its dict form, or a str."""
+    if isinstance(chunk, str):
+        return chunk
+    choices = chunk.get("choices") if isinstance(chunk, dict) else getattr(chunk, "choices", None)
+    if not choices:
+        return ""
+    delta = choices[0].get("delta") if isinstance(choices[0], dict) else getattr(choices[0], "delta", None)
+    content = delta.get("content") if isinstance(delta, dict) else getattr(delta, "content", None)
+    return content or ""
+
+
+def chunk_completion_tokens(chunk):
+    usage = chunk.get("usage") if isinstance(chunk, dict) else getattr(chunk, "usage", None)
+    if not usage:
+        return None
+    return usage.get("completion_tokens") if isinstance(usage, dict) else getattr(usage, "completion_tokens", None)
+
+
+class StreamRecorder:
+    """Times one streamed completion. Create it right before the request is sent."""
+
+    def __init__(self, app, model, sink=None):
+        self.app = app
+        self.model = model
+        self.sink = sink
+        self.started = time.perf_counter()
+        self.record = None
+
+    def wrap(self, stream):
+        """Yield the chunks of `stream` unchanged, and record the request once it ends."""
+        arrivals, usage_tokens, complete = [], None, False
+        try:
+            for chunk in stream:
+                if not isinstance(chunk, str):
+                    usage_tokens = chunk_completion_tokens(chunk) or usage_tokens
+                if chunk_content(chunk):
+                    arrivals.append(time.perf_counter())
+                yield chunk
+            complete = True
+        finally:
+            # Also runs when the reader stops early or the stream breaks; such records are marked incomplete
+            gaps = [b - a for a, b in zip(arrivals, arrivals[1:])]
+            self.record = self._finish(arrivals, gaps, usage_tokens, complete)
+            (self.sink or get_sink()).emit(self.record, gaps)
+
+    def _finish(self, arrivals, gaps, usage_tokens, complete):
+        ended = time.perf_counter()
+        tokens = usage_tokens or len(arrivals)
+        decode_seconds = arrivals[-1] - arrivals[0] if len(arrivals) > 1 else 0.0
+
+        def ms(seconds):
+            return None if seconds is None else round(1000 * seconds, 1)
+
+        return {
+            "time": time.time(),
+            "app": self.app,
+            "model": self.model,
+            "complete": complete,
+            "tokens": tokens,
+            "ttft_ms": ms(arrivals[0] - self.started) if arrivals else None,
+            "e2e_ms": ms(ended - self.started),
+            "decode_tokens_per_s": round((tokens - 1) / decode_seconds, 1) if decode_seconds else None,
+            "itl_ms": {
+                "mean": ms(statistics.fmean(gaps)) if gaps else None,
+                "p50": ms(percentile(gaps, 0.5)),
+                "p90": ms(percentile(gaps, 0.9)),
+                "p99": ms(percentile(gaps, 0.99)),
+                "max": ms(max(gaps)) if gaps else None,
+            },
+        }
+
+
+def format_labels(labels):
+    def escape(value):
+        return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return ",".join(f'{key}="{escape(value)}"' for key, value in labels)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = {}  # labels -> [bucket counts..., +Inf count, sum]
+
+    def observe(self, labels, value):
+        counts = self.counts.setdefault(labels, [0] * (len(self.buckets) + 1) + [0.0])
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[i] += 1
+        counts[len(self.buckets)] += 1
+        counts[-1] += value
+
+    def lines(self, name):
+        for labels, counts in self.counts.items():
+            label_text = format_labels(labels)
+            for bound, count in zip(self.buckets, counts):
+                yield f'{name}_bucket{{{label_text},le="{bound}"}} {count}'
+            yield f'{name}_bucket{{{label_text},le="+Inf"}} {counts[len(self.buckets)]}'
+            yield f"{name}_sum{{{label_text}}} {counts[-1]}"
+            yield f"{name}_count{{{label_text}}} {counts[len(self.buckets)]}"
+
+
+class MetricsSink:
+    """
+    Collects the records of every stream in the process. Records are appended to
+    `path` as JSON lines and kept, the last `recent` of them, for `summary()`.
+    """
+
+    def __init__(self, path=METRICS_FILE, recent=RECENT):
+        self.path = path
+        self.recent = deque(maxlen=recent)
+        self.requests = {}
+        self.tokens = {}
+        self.ttft = Histogram(TTFT_BUCKETS)
+        self.itl = Histogram(ITL_BUCKETS)
+        self.tps = Histogram(TPS_BUCKETS)
+        self._lock = threading.Lock()
+        if path:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+
+    def emit(self, record, gaps=()):
+        """Store one request's `record`; `gaps` are its inter-token gaps in seconds, for the histogram."""
+        labels = (("app", record["app"]), ("model", record["model"]))
+        with self._lock:
+            self.recent.append(record)
+            requests_labels = labels + (("complete", str(record["complete"]).lower()),)
+            self.requests[requests_labels] = self.requests.get(requests_labels, 0) + 1
+            self.tokens[labels] = self.tokens.get(labels, 0) + record["tokens"]
+            if record["ttft_ms"] is not None:
+                self.ttft.observe(labels, record["ttft_ms"] / 1000)
+            for gap in gaps:
+                self.itl.observe(labels, gap)
+            if record["decode_tokens_per_s"] is not None:
+                self.tps.observe(labels, record["decode_tokens_per_s"])
+            if self.path:
+                with open(self.path, "a") as f:
+                    f.write(json.dumps(record) + "\n")
+
+    def summary(self, app=None):
+        """Medians and tails over the recent complete records, of one `app` or of all."""
+        with self._lock:
+            records = [r for r in self.recent if r["complete"] and (app is None or r["app"] == app)]
+        ttfts = [r["ttft_ms"] for r in records if r["ttft_ms"] is not None]
+        speeds = [r["decode_tokens_per_s"] for r in records if r["decode_tokens_per_s"] is not None]
+        itls = [r["itl_ms"]["p50"] for r in records if r["itl_ms"]["p50"] is not None]
+        return {
+            "requests": len(records),
+            "ttft_p50_ms": percentile(ttfts, 0.5),
+            "ttft_p95_ms": percentile(ttfts, 0.95),
+            "itl_p50_ms": percentile(itls, 0.5),
+            "decode_tokens_per_s_p50": percentile(speeds, 0.5),
+        }
+
+    def prometheus(self):
+        """All measurements so far in the Prometheus text format."""
+        with self._lock:
+            lines = ["# HELP tt_stream_requests_total Streamed chat completions.", "# TYPE tt_stream_requests_total counter"]
+            lines += [f"tt_stream_requests_total{{{format_labels(k)}}} {v}" for k, v in self.requests.items()]
+            lines += ["# HELP tt_stream_output_tokens_total Streamed tokens.", "# TYPE tt_stream_output_tokens_total counter"]
+            lines += [f"tt_stream_output_tokens_total{{{format_labels(k)}}} {v}" for k, v in self.tokens.items()]
+            for name, histogram, help_text in (
+                ("tt_stream_ttft_seconds", self.ttft, "Time from sending the request to the first token."),
+                ("tt_stream_inter_token_seconds", self.itl, "Gap between consecutive tokens."),
+                ("tt_stream_decode_tokens_per_second", self.tps, "Tokens per second after the first token, per request."),
+            ):
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+                lines += list(histogram.lines(name))
+        return "\n".join(lines) + "\n"
+
+
+def serve_prometheus(sink, port, host="0.0.0.0"):
+    """Serve `sink.prometheus()` at `/metrics` from a daemon thread."""
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = sink.prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="tt-stream-metrics", daemon=True).start()
+    return server
+
+
+_lock = threading.Lock()
+_sink = None
+
+
+def get_sink():
+    """The process-wide sink, serving Prometheus metrics if TT_STREAM_METRICS_PORT is set."""
+    global _sink
+    with _lock:
+        if _sink is None:
+            _sink = MetricsSink()
+            if METRICS_PORT:
+                try:
+                    serve_prometheus(_sink, int(METRICS_PORT))
+                except OSError as e:
+                    # Another app on this machine may already serve the port; metrics still go to the file
+                    print(f"Stream metrics are not served on port {METRICS_PORT}: {e}", file=sys.stderr)
+        return _sink
+
+
+def format_record(record):
+    """One line for a terminal, e.g. `TTFT 312 ms, 24.1 tok/s, ITL p50 38 ms / p99 91 ms, 120 tokens`."""
+    parts = []
+    if record["ttft_ms"] is not None:
+        parts.append(f"TTFT {record['ttft_ms']:.0f} ms")
+    if record["decode_tokens_per_s"] is not None:
+        parts.append(f"{record['decode_tokens_per_s']:.1f} tok/s")
+    if record["itl_ms"]["p50"] is not None:
+        parts.append(f"ITL p50 {record['itl_ms']['p50']:.0f} ms / p99 {record['itl_ms']['p99']:.0f} ms")
+    parts.append(f"{record['tokens']} tokens")
+    return ", ".join(parts)
+
+
+def show_in_sidebar(app, last=None):
+    """Show the `last` record of this session and the recent ones of `app` in the Streamlit sidebar."""
+    import streamlit as st
+
+    def value(number, unit):
+        return "–" if number is None else f"{number:.0f} {unit}" if unit == "ms" else f"{number:.1f} {unit}"
+
+    with st.sidebar:
+        st.subheader("⏱️ Streaming latency")
+        if last is not None:
+            st.caption("Last response")
+            col1, col2 = st.columns(2)
+            col1.metric("Time to first token", value(last["ttft_ms"], "ms"))
+            col2.metric("Decode speed", value(last["decode_tokens_per_s"], "tok/s"))
+            col1.metric("Inter-token p50", value(last["itl_ms"]["p50"], "ms"))
+            col2.metric("Inter-token p99", value(last["itl_ms"]["p99"], "ms"))
+
+        summary = get_sink().summary(app)
+        if summary["requests"]:
+            st.caption(
+                f"Last {summary['requests']} responses on this server: TTFT p50 {value(summary['ttft_p50_ms'], 'ms')}, "
+                f"p95 {value(summary['ttft_p95_ms'], 'ms')}, inter-token p50 {value(summary['itl_p50_ms'], 'ms')}, "
+                f"decode p50 {value(summary['decode_tokens_per_s_p50'], 'tok/s')}"
+            )
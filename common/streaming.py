@@ -0,0 +1,138 @@
+# SPDX-FileCopyrightText: (c) 2025 Tenstorrent AI ULC
+#
+# SPDX-License-Identifier: Apache-2.0
+"""Streaming chat completions over server-sent events."""
+
+import json
+
+import httpx
+
+from common.client import get_client
+
+
+# Connect timeout, and the longest gap allowed between two streamed chunks
+TIMEOUT = httpx.Timeout(120, connect=10)
+
+ERROR_PREFIX = "Error: "
+INTERRUPTED_NOTICE = "\n\n⚠️ The response was interrupted: "
+
+
+def is_complete(text):
+    """Whether `text`, everything `stream_chat_completion()` yielded, is a full answer."""
+    return not text.startswith(ERROR_PREFIX) and INTERRUPTED_NOTICE not in text
+
+
+def iter_sse_data(lines):
+    """Yield the payload of every `data:` line of a server-sent event stream."""
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode("utf-8")
+        if line.startswith("data:"):
+            yield line[len("data:"):].strip()
+
+
+def iter_content(events):
+    """
+    Yield the text deltas of a chat completion stream from its `data:` payloads.
+
+    Raises ValueError if the server reports an error or the stream ends before the
+    completion is finished.
+    """
+    finished = False
+    for data in events:
+        if data == "[DONE]":
+            return
+
+        deltas, done = parse_event(data)
+        yield from deltas
+        finished = finished or done
+
+    if not finished:
+        raise ValueError("stream ended before the completion finished")
+
+
+def parse_event(data):
+    """Return the text deltas of one `data:` payload and whether it finishes the completion."""
+    event = json.loads(data)
+    if "error" in event:
+        error = event["error"]
+        raise ValueError(error.get("message", error) if isinstance(error, dict) else error)
+
+    deltas, finished = [], False
+    for choice in event.get("choices") or []:
+        content = (choice.get("delta") or {}).get("content")
+        if content:
+            deltas.append(content)
+        finished = finished or choice.get("finish_reason") is not None
+    return deltas, finished
+
+
+def stream_chat_completion(url, payload, headers=None):
+    """
+    POST `payload` to a `/v1/chat/completions` `url` with streaming enabled and yield text as it arrives.
+
+    Errors before the first token are yielded as a single `Error: ...` message, like
+    the non-streaming helpers return them. If the stream breaks partway through,
+    the text received so far is kept and a notice is appended.
+    """
+    headers = {"Content-Type": "application/json", **(headers or {})}
+    client = get_client()
+    request = client.build_request("POST", url, headers=headers, json={**payload, "stream": True}, timeout=TIMEOUT)
+    try:
+        res = client.send(request, stream=True)
+    except httpx.HTTPError as e:
+        yield f"{ERROR_PREFIX}{e}"
+        return
+
+    try:
+        if res.status_code != 200:
+            res.read()
+            yield f"{ERROR_PREFIX}{res.status_code} - {res.text}"
+            return
+
+        try:
+            yield from iter_content(iter_sse_data(res.iter_lines()))
+        except (httpx.HTTPError, ValueError) as e:
+            yield f"{INTERRUPTED_NOTICE}{e}"
+    finally:
+        # Returns the connection to the pool, also when the caller stops reading early
+        res.close()
+
+
+async def astream_chat_completion(client, url, payload, headers=None):
+    """
+    Async `stream_chat_completion()` over an `httpx.AsyncClient`, with the same
+    error and interruption handling.
+    """
+    headers = {"Content-Type": "application/json", **(headers or {})}
+    request = client.build_request("POST", url, headers=headers, json={**payload, "stream": True}, timeout=TIMEOUT)
+    try:
+        res = await client.send(request, stream=True)
+    except httpx.HTTPError as e:
+        yield f"{ERROR_PREFIX}{e}"
+        return
+
+    try:
+        if res.status_code != 200:
+            body = (await res.aread()).decode("utf-8", "replace")
+            yield f"{ERROR_PREFIX}{res.status_code} - {body}"
+            return
+
+        finished = False
+        try:
+            async for line in res.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    return
+                deltas, done = parse_event(data)
+                for delta in deltas:
+                    yield delta
+                finished = finished or done
+            if not finished:
+                raise ValueError("stream ended before the completion finished")
+        except (httpx.HTTPError, ValueError) as e:
+            yield f"{INTERRUPTED_NOTICE}{e}"
+    finally:
+        await res.aclose()
@@ -0,0 +1,361 @@
+# SPDX-FileCopyrightText: (c) 2025 Tenstorrent AI ULC
+#
+# SPDX-License-Identifier: Apache-2.0
+"""Lightweight in-process vector index with a Chroma-like collection interface."""
+
+import json
+import os
+
+import numpy as np
+
+
+DTYPES = ("float32", "float16", "int8")
+SPACES = ("l2", "cosine", "ip")
+# Rows scored per matrix product in a query
+BLOCK_ROWS = 4096
+
+
+class VectorIndex:
+    """
+    Exact nearest-neighbour search over one contiguous NumPy array.
+
+    Vectors are stored as `float32`, `float16` or `int8` with one scale per row
+    (symmetric quantization). A query batch is answered with matrix products against
+    blocks of `BLOCK_ROWS` rows and a running `argpartition` top k, which for the few thousand chunks of
+    a document is faster than building and searching an HNSW graph, and needs no
+    index besides the vectors themselves.
+
+    `add`, `upsert`, `get`, `query`, `delete` and `count` take and return the same
+    arguments and dicts as a Chroma collection, so the apps can use either. Distances
+    match Chroma's for the same `space` (squared L2 by default). Embedding texts is
+    left to the caller: queries are passed as `query_embeddings`.
+
+    `save()` writes the index next to a path prefix and `load(..., mmap=True)` maps
+    the vectors back read-only, so they live in the page cache and are shared by
+    every process that opens them. The first write to a mapped index copies it into
+    memory.
+    """
+
+    def __init__(self, name="vectors", dtype="float16", space="l2", metadata=None):
+        if dtype not in DTYPES:
+            raise ValueError(f"unknown dtype {dtype!r}, expected one of {DTYPES}")
+        if space not in SPACES:
+            raise ValueError(f"unknown space {space!r}, expected one of {SPACES}")
+
+        self.name = name
+        self.dtype = dtype
+        self.space = space
+        self.metadata = metadata
+        self.ids = []
+        self.documents = []
+        self.metadatas = []
+        self._rows = {}
+        self._size = 0
+        self._vectors = None  # (capacity, dim), only the first _size rows are in use
+        self._scales = None  # per-row int8 scale
+        self._norms = None  # squared L2 norm of every dequantized row
+
+    # -- Chroma collection interface --
+
+    def add(self, ids, embeddings, documents=None, metadatas=None):
+        """Add rows; ids that already exist are replaced, like `upsert`."""
+        ids = list(ids)
+        if not ids:
+            return
+
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        if vectors.ndim != 2 or len(vectors) != len(ids):
+            raise ValueError(f"expected {len(ids)} embeddings, got an array of shape {vectors.shape}")
+        if len(set(ids)) != len(ids):
+            raise ValueError("duplicate ids in one add()")
+        documents = list(documents) if documents is not None else [None] * len(ids)
+        metadatas = list(metadatas) if metadatas is not None else [None] * len(ids)
+
+        self._reserve(len(ids), vectors.shape[1])
+        codes, scales = self._encode(vectors)
+
+        rows = []
+        for chunk_id, document, metadata in zip(ids, documents, metadatas):
+            row = self._rows.get(chunk_id)
+            if row is None:
+                row = self._rows[chunk_id] = self._size
+                self._size += 1
+                self.ids.append(chunk_id)
+                self.documents.append(document)
+                self.metadatas.append(metadata)
+            else:
+                self.documents[row] = document
+                self.metadatas[row] = metadata
+            rows.append(row)
+
+        rows = np.asarray(rows)
+        self._vectors[rows] = codes
+        if scales is not None:
+            self._scales[rows] = scales
+        decoded = self._decode(codes, scales)
+        self._norms[rows] = np.einsum("ij,ij->i", decoded, decoded)
+
+    upsert = add
+
+    def update(self, ids, metadatas=None, documents=None):
+        """Replace the metadata or text of existing rows, keeping their vectors; unknown ids are skipped."""
+        for i, chunk_id in enumerate(ids):
+            row = self._rows.get(chunk_id)
+            if row is None:
+                continue
+            if metadatas is not None:
+                self.metadatas[row] = metadatas[i]
+            if documents is not None:
+                self.documents[row] = documents[i]
+
+    def count(self):
+        return self._size
+
+    def get(self, ids=None, include=("documents", "metadatas")):
+        rows = range(self._size) if ids is None else [self._rows[i] for i in ids if i in self._rows]
+        rows = np.fromiter(rows, dtype=np.int64)
+
+        res = {"ids": [self.ids[row] for row in rows]}
+        if "embeddings" in include:
+            res["embeddings"] = self._dequantize(rows) if len(rows) else np.empty((0, self.dim or 0), np.float32)
+        if "documents" in include:
+            res["documents"] = [self.documents[row] for row in rows]
+        if "metadatas" in include:
+            res["metadatas"] = [self.metadatas[row] for row in rows]
+        return res
+
+    def query(self, query_embeddings, n_results=10, include=("documents", "metadatas", "distances")):
+        """Return the `n_results` nearest rows for every query, closest first, shaped like Chroma's result."""
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        if queries.ndim == 1:
+            queries = queries[None, :]
+        k = min(n_results, self._size)
+
+        res = {"ids": [], "distances": [], "documents": [], "metadatas": [], "embeddings": []}
+        if k == 0:
+            for _ in queries:
+                for field in res:
+                    res[field].append([])
+            return res
+
+        distances, rows = self._nearest(queries, k)
+        for query_rows, query_distances in zip(rows, distances):
+            res["ids"].append([self.ids[row] for row in query_rows])
+            res["distances"].append(query_distances.tolist())
+            res["documents"].append([self.documents[row] for row in query_rows])
+            res["metadatas"].append([self.metadatas[row] for row in query_rows])
+            if "embeddings" in include:
+                res["embeddings"].append(self._dequantize(query_rows))
+
+        return {field: value for field, value in res.items() if field == "ids" or field in include}
+
+    def delete(self, ids):
+        """Remove rows by id; the last row is moved into each freed slot."""
+        for chunk_id in ids:
+            row = self._rows.pop(chunk_id, None)
+            if row is None:
+                continue
+
+            self._writable()
+            last = self._size - 1
+            if row != last:
+                moved = self.ids[last]
+                self._rows[moved] = row
+                self.ids[row], self.documents[row], self.metadatas[row] = moved, self.documents[last], self.metadatas[last]
+                self._vectors[row] = self._vectors[last]
+                self._norms[row] = self._norms[last]
+                if self._scales is not None:
+                    self._scales[row] = self._scales[last]
+
+            self.ids.pop()
+            self.documents.pop()
+            self.metadatas.pop()
+            self._size -= 1
+
+    # -- storage --
+
+    @property
+    def dim(self):
+        return None if self._vectors is None else self._vectors.shape[1]
+
+    @property
+    def nbytes(self):
+        """Bytes used by the vectors and text of the rows in use."""
+        if self._vectors is None:
+            return 0
+        row_bytes = self._vectors.itemsize * self.dim + 4 + (4 if self._scales is not None else 0)
+        return self._size * row_bytes + sum(len(document or "") for document in self.documents)
+
+    @staticmethod
+    def exists(path):
+        return os.path.exists(path + ".json")
+
+    def save(self, path):
+        """Write the index to `<path>.npy` (vectors), `<path>.norms.npy`, `<path>.scales.npy` and `<path>.json`."""
+        arrays = {"": self._vectors, ".norms": self._norms, ".scales": self._scales}
+        for suffix, array in arrays.items():
+            if array is not None:
+                _save_array(f"{path}{suffix}.npy", array[:self._size])
+
+        # The JSON file is written last and marks the index as complete
+        tmp_path = path + ".json.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({
+                "name": self.name,
+                "dtype": self.dtype,
+                "space": self.space,
+                "metadata": self.metadata,
+                "ids": self.ids,
+                "documents": self.documents,
+                "metadatas": self.metadatas,
+            }, f)
+        os.replace(tmp_path, path + ".json")
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        with open(path + ".json") as f:
+            state = json.load(f)
+
+        index = cls(state["name"], state["dtype"], state["space"], state["metadata"])
+        index.ids, index.documents, index.metadatas = state["ids"], state["documents"], state["metadatas"]
+        index._rows = {chunk_id: row for row, chunk_id in enumerate(index.ids)}
+        index._size = len(index.ids)
+        if index._size:
+            mmap_mode = "r" if mmap else None
+            index._vectors = np.load(path + ".npy", mmap_mode=mmap_mode)
+            index._norms = np.load(path + ".norms.npy", mmap_mode=mmap_mode)
+            if index.dtype == "int8":
+                index._scales = np.load(path + ".scales.npy", mmap_mode=mmap_mode)
+        return index
+
+    def _reserve(self, extra, dim):
+        if self._vectors is not None and self.dim != dim:
+            raise ValueError(f"expected {self.dim}-dimensional embeddings, got {dim}")
+
+        self._writable()
+        capacity = 0 if self._vectors is None else len(self._vectors)
+        if self._size + extra <= capacity:
+            return
+
+        # Grow geometrically so repeated adds stay amortized O(1) per row
+        capacity = max(self._size + extra, 2 * capacity, 64)
+        self._vectors = _resized(self._vectors, (capacity, dim), np.int8 if self.dtype == "int8" else self.dtype)
+        self._norms = _resized(self._norms, (capacity,), np.float32)
+        if self.dtype == "int8":
+            self._scales = _resized(self._scales, (capacity,), np.float32)
+
+    def _writable(self):
+        # Memory-mapped arrays are read-only; copy them on the first write
+        if self._vectors is not None and not self._vectors.flags.writeable:
+            self._vectors = np.array(self._vectors)
+            self._norms = np.array(self._norms)
+            if self._scales is not None:
+                self._scales = np.array(self._scales)
+
+    def _encode(self, vectors):
+        if self.dtype != "int8":
+            return vectors.astype(self.dtype), None
+
+        scales = np.abs(vectors).max(axis=1) / 127
+        scales[scales == 0] = 1
+        codes = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+        return codes, scales.astype(np.float32)
+
+    @staticmethod
+    def _decode(codes, scales):
+        vectors = codes.astype(np.float32)
+        return vectors if scales is None else vectors * scales[:, None]
+
+    def _dequantize(self, rows):
+        return self._decode(self._vectors[rows], None if self._scales is None else self._scales[rows])
+
+    def _nearest(self, queries, k):
+        """The distances and rows of the `k` nearest rows for every query, closest first."""
+        best_distances = np.empty((len(queries), 0), np.float32)
+        best_rows = np.empty((len(queries), 0), np.int64)
+        if self.space == "cosine":
+            query_norms = np.linalg.norm(queries, axis=1)[:, None]
+        elif self.space == "l2":
+            query_norms = np.einsum("ij,ij->i", queries, queries)[:, None]
+
+        # Rows are scored one block at a time, so float16 and int8 rows are only ever
+        # converted to float32 a block at a time, and the block stays in cache
+        for start in range(0, self._size, BLOCK_ROWS):
+            stop = min(start + BLOCK_ROWS, self._size)
+            dots = queries @ self._vectors[start:stop].astype(np.float32, copy=False).T
+            if self._scales is not None:
+                dots *= self._scales[start:stop]
+
+            norms = self._norms[start:stop]
+            if self.space == "ip":
+                distances = 1 - dots
+            elif self.space == "cosine":
+                distances = 1 - dots / np.maximum(np.sqrt(norms) * query_norms, 1e-12)
+            else:
+                distances = query_norms + norms - 2 * dots
+
+            # Keep a running top k over the blocks scored so far
+            best_distances = np.concatenate([best_distances, distances], axis=1)
+            best_rows = np.concatenate([best_rows, np.broadcast_to(np.arange(start, stop), distances.shape)], axis=1)
+            if best_distances.shape[1] > k:
+                top = np.argpartition(best_distances, k - 1, axis=1)[:, :k]
+                best_distances = np.take_along_axis(best_distances, top, axis=1)
+                best_rows = np.take_along_axis(best_rows, top, axis=1)
+
+        order = np.argsort(best_distances, axis=1, kind="stable")
+        return np.take_along_axis(best_distances, order, axis=1), np.take_along_axis(best_rows, order, axis=1)
+
+
+class VectorIndexClient:
+    """
+    Stands in for a `chromadb.EphemeralClient` where only embeddings are stored and
+    queried; every collection is a `VectorIndex` of the client's `dtype`.
+    """
+
+    def __init__(self, dtype="float16"):
+        self.dtype = dtype
+        self._collections = {}
+
+    def create_collection(self, name, embedding_function=None, metadata=None):
+        if embedding_function is not None:
+            raise ValueError("VectorIndex collections store embeddings only, pass embedding_function=None")
+        if name in self._collections:
+            raise ValueError(f"collection {name} already exists")
+        space = (metadata or {}).get("hnsw:space", "l2")
+        col = self._collections[name] = VectorIndex(name, self.dtype, space, metadata)
+        return col
+
+    def get_collection(self, name, embedding_function=None):
+        if name not in self._collections:
+            raise KeyError(f"collection {name} does not exist")
+        return self._collections[name]
+
+    def open_collection(self, name, path, mmap=True):
+        """Register an index saved with `VectorIndex.save()` under `name`."""
+        col = self._collections[name] = VectorIndex.load(path, mmap=mmap)
+        col.name = name
+        return col
+
+    def delete_collection(self, name):
+        if self._collections.pop(name, None) is None:
+            raise KeyError(f"collection {name} does not exist")
+
+    def list_collections(self):
+        return list(self._collections.values())
+
+    def get_max_batch_size(self):
+        return 100_000
+
+
+def _resized(array, shape, dtype):
+    resized = np.zeros(shape, dtype=dtype)
+    if array is not None:
+        resized[:len(array)] = array
+    return resized
+
+
+def _save_array(path, array):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        np.save(f, np.ascontiguousarray(array))
+    os.replace(tmp_path, path)
@@ -0,0 +1,105 @@
+# SPDX-FileCopyrightText: (c) 2025 Tenstorrent AI ULC
+#
+# SPDX-License-Identifier: Apache-2.0
+"""
+Compare the embedding backends of pdf_rag on the chunks of a synthetic parts manual.
+
+- chroma: Chroma's `DefaultEmbeddingFunction`, which loads a new model session on every call
+- chroma-reused: pdf_rag's `DefaultEmbedder`, the same model with one session kept
+- onnx: `common.onnx_embeddings.OnnxEmbedder` for every combination of --threads and --batch-sizes
+- server: an OpenAI-compatible `/v1/embeddings` server for every batch size. This is
+  the stand-in server unless --server-url is given.
+
+Chunks are handed over 256 at a time, as pdf_rag's indexing does. The table reports the
+time to create the backend, the chunks/sec reached over the whole manual, and the
+median latency of embedding a single question. A backend that cannot be created, e.g.
+because the model cannot be downloaded, is reported as unavailable.
+
+    python bench_embeddings.py --pages 50 --threads 1 2 4 --batch-sizes 16 32 64
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCHMARKS_DIR, "..", ".."))
+sys.path.insert(0, os.path.join(BENCHMARKS_DIR, "..", "pdf_rag"))
+
+from chromadb.utils.embedding_functions import DefaultEmbeddingFunction  # noqa: E402
+
+from common import standin_server  # noqa: E402
+from common.embeddings import EmbeddingClient  # noqa: E402
+from common.onnx_embeddings import OnnxEmbedder  # noqa: E402
+from fixtures import parts_manual  # noqa: E402
+from extraction import batched, iter_chunks  # noqa: E402
+from index_cache import DefaultEmbedder  # noqa: E402
+
+HANDOFF_SIZE = 256
+
+
+def backends(args):
+    yield "chroma", "", DefaultEmbeddingFunction
+    yield "chroma-reused", "", DefaultEmbedder
+    for threads in args.threads:
+        for batch_size in args.batch_sizes:
+            yield "onnx", f"t={threads} b={batch_size}", lambda t=threads, b=batch_size: OnnxEmbedder(
+                model_dir=args.model_dir, threads=t, batch_size=b
+            )
+    for batch_size in args.batch_sizes:
+        yield "server", f"b={batch_size}", lambda b=batch_size: EmbeddingClient(args.server_url, args.server_model, batch_size=b)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4], help="ONNX intra-op threads")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[16, 32, 64], help="Texts per model call or request")
+    parser.add_argument("--model-dir", help="Directory with model.onnx and tokenizer.json, default: Chroma's all-MiniLM-L6-v2")
+    parser.add_argument("--server-url", help="Embedding server to measure instead of the stand-in server")
+    parser.add_argument("--server-model", default=standin_server.MODEL_ID)
+    parser.add_argument("--queries", type=int, default=50, help="Single-question embeddings timed per backend")
+    args = parser.parse_args()
+
+    server = None
+    if not args.server_url:
+        server = standin_server.start()
+        args.server_url = server.base_url
+
+    page_texts, _ = parts_manual(args.pages)
+    chunks = [text for text, _ in iter_chunks(enumerate(page_texts, start=1))]
+    questions = [f"What is the torque of part {i}?" for i in range(args.queries)]
+    print(f"{len(chunks)} chunks from {args.pages} pages, {os.cpu_count()} CPUs")
+
+    print(f"{'backend':<15}{'settings':<12}{'load s':>8}{'chunks/s':>10}{'query p50 ms':>14}")
+    for name, settings, create in backends(args):
+        try:
+            start = time.perf_counter()
+            embedder = create()
+            embedder(questions[:1])
+            load = time.perf_counter() - start
+        except Exception as e:
+            print(f"{name:<15}{settings:<12}  unavailable: {type(e).__name__}: {e}")
+            continue
+
+        start = time.perf_counter()
+        for batch in batched(chunks, HANDOFF_SIZE):
+            embedder(batch)
+        throughput = len(chunks) / (time.perf_counter() - start)
+
+        latencies = []
+        for question in questions:
+            start = time.perf_counter()
+            embedder([question])
+            latencies.append(time.perf_counter() - start)
+
+        print(f"{name:<15}{settings:<12}{load:>8.2f}{throughput:>10.1f}{1000 * statistics.median(latencies):>14.2f}")
+
+    if server:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
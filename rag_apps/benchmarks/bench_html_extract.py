@@ -0,0 +1,73 @@
+# SPDX-FileCopyrightText: (c) 2025 Tenstorrent AI ULC
+#
+# SPDX-License-Identifier: Apache-2.0
+"""
+Compare webpage_rag's boilerplate-stripping HTML extractor with the full page text
+that `WebBaseLoader` produces (BeautifulSoup's `get_text()`).
+
+The fixture pages wrap a synthetic parts manual in the chrome of a documentation site
+(cookie banner, navigation, sidebar, related links, footer). For each size, both
+extractions are timed and split with webpage_rag's splitter. The table reports the
+chunks that would be embedded, how many of them contain any site chrome, and
+whether every part number of the manual is still in the extracted text.
+
+    python bench_html_extract.py --sizes 1 10 50 --repeat 5
+"""
+
+import argparse
+import os
+import sys
+import time
+
+from bs4 import BeautifulSoup
+from langchain_core.documents import Document
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "webpage_rag"))
+
+from fixtures import make_site_page, parts_manual  # noqa: E402
+from webpage_rag import documents_from_html, split_documents  # noqa: E402
+
+# Text that only appears in the fixture's chrome
+CHROME_MARKERS = ("cookies", "Example Corp", "See also", "Related", "Products", "Home")
+
+
+def web_base_loader(html, url):
+    """What `WebBaseLoader` hands to the splitter: all text of the page as one document."""
+    return [Document(page_content=BeautifulSoup(html, "html.parser").get_text(), metadata={"source": url})]
+
+
+def best_of(repeat, fn, *args):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 50], help="Manual sections per page")
+    parser.add_argument("--repeat", type=int, default=5, help="Timing runs per extractor, the fastest is reported")
+    args = parser.parse_args()
+
+    print(f"{'sections':>8}  {'extractor':<16}{'KiB html':>9}{'parse ms':>10}{'chars':>9}{'chunks':>8}{'chrome':>8}{'parts':>8}")
+    for size in args.sizes:
+        page_texts, parts = parts_manual(size)
+        html = make_site_page(page_texts)
+        url = f"http://bench.invalid/site_{size}.html"
+
+        for name, extract in (("WebBaseLoader", web_base_loader), ("html_extract", documents_from_html)):
+            documents, seconds = best_of(args.repeat, extract, html, url)
+            splits = split_documents(documents)
+            text = "\n".join(document.page_content for document in documents)
+            chrome = sum(any(marker in split.page_content for marker in CHROME_MARKERS) for split in splits)
+            found = sum(part["id"] in text for part in parts)
+            print(
+                f"{size:>8}  {name:<16}{len(html) / 1024:>9.1f}{1000 * seconds:>10.2f}{len(text):>9}"
+                f"{len(splits):>8}{chrome:>8}{f'{found}/{len(parts)}':>8}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# SPDX-FileCopyrightText: (c) 2025 Tenstorrent AI ULC
+#
+# SPDX-License-Identifier: Apache-2.0
+"""
+Compare pdf_rag's context with and without the MMR reranking stage at several token budgets.
+
+Every sampled part of a synthetic parts manual is asked about by description. For
+each context token budget, the context is packed from plain top-k retrieval and from
+MMR over three times as many candidates. The table reports how often the packed
+context contains the asked-about part number, the tokens the context used and the
+share of its sentences that are distinct (the manual repeats its maintenance
+boilerplate after every part). Embeddings come from the stand-in server.
+
+    python bench_rerank.py --pages 50 --queries 100 --budgets 128 256 512
+"""
+
+import argparse
+import io
+import os
+import random
+import re
+import statistics
+import sys
+import tempfile
+import time
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCHMARKS_DIR, "..", ".."))
+sys.path.insert(0, os.path.join(BENCHMARKS_DIR, "..", "pdf_rag"))
+
+from common import standin_server  # noqa: E402
+from common.context import estimate_tokens  # noqa: E402
+from common.embeddings import EmbeddingClient  # noqa: E402
+from common.rerank import Reranker  # noqa: E402
+from fixtures import make_pdf, parts_manual  # noqa: E402
+from collection_pool import CollectionPool  # noqa: E402
+from index_cache import ClientEmbeddingFunction, IndexCache  # noqa: E402
+from pdf_rag import RETRIEVAL_CANDIDATES, build_context, process_pdf, retrieve  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--queries", type=int, default=100, help="Number of parts to ask about")
+    parser.add_argument("--budgets", type=int, nargs="+", default=[128, 256, 512], help="Context token budgets")
+    parser.add_argument("--lambda-mult", type=float, default=0.5, help="MMR trade-off, 1.0 is relevance only")
+    parser.add_argument("--no-hybrid", dest="hybrid", action="store_false", help="Vector search only, no BM25")
+    args = parser.parse_args()
+
+    server = standin_server.start()
+    page_texts, parts = parts_manual(args.pages)
+    pdf = io.BytesIO(make_pdf(page_texts))
+    pdf.name = f"manual_{args.pages}.pdf"
+
+    with tempfile.TemporaryDirectory() as workdir:
+        client = EmbeddingClient(server.base_url, standin_server.MODEL_ID)
+        cache = IndexCache(path=workdir, embedding_function=ClientEmbeddingFunction(client))
+        key = process_pdf(pdf, cache)
+        pool = CollectionPool(cache)
+
+        sample = random.Random(0).sample(parts, min(args.queries, len(parts)))
+        modes = {"top-k": None, "mmr": Reranker(lambda_mult=args.lambda_mult)}
+
+        print(f"{'budget':>6}  {'mode':<6}{'hit rate':>10}{'tokens':>8}{'distinct':>10}{'retrieve ms':>13}")
+        for budget in args.budgets:
+            for mode, reranker in modes.items():
+                found, tokens, distinct, latencies = 0, [], [], []
+                for part in sample:
+                    query = f"How tight should the {part['qualifier']} {part['component']} of the {part['system']} be?"
+                    start = time.perf_counter()
+                    hits = retrieve(pool, [key], query, n_results=RETRIEVAL_CANDIDATES, hybrid=args.hybrid, reranker=reranker)
+                    latencies.append(time.perf_counter() - start)
+
+                    context = build_context(hits, budget)
+                    found += part["id"] in context
+                    tokens.append(estimate_tokens(context))
+                    sentences = [sentence for sentence in re.split(r"(?<=\.)\s+", context) if sentence]
+                    distinct.append(len(set(sentences)) / len(sentences) if sentences else 1.0)
+
+                print(
+                    f"{budget:>6}  {mode:<6}{found / len(sample):>10.2f}{statistics.mean(tokens):>8.0f}"
+                    f"{statistics.mean(distinct):>10.2f}{1000 * statistics.median(latencies):>13.2f}"
+                )
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+# SPDX-FileCopyrightText: (c) 2025 Tenstorrent AI ULC
+#
+# SPDX-License-Identifier: Apache-2.0
+"""
+Ingest and query benchmark for pdf_rag and webpage_rag on synthetic documents of increasing size.
+
+For every size, a parts manual with that many pages is rendered as a PDF and as an
+HTML page and run through each app's own functions: text extraction, chunking,
+index build (embedding plus vector store writes), retrieval and a streamed answer.
+Embedding and chat completion requests go to the local stand-in server in
+common/standin_server.py, so the benchmark runs offline and measures the apps rather
+than a model. Each app and size runs in a fresh process so that peak RSS is its own.
+
+    python bench_suite.py --sizes 10 50 200 --output results.json
+    python compare.py baseline.json results.json
+"""
+
+import argparse
+from datetime import datetime, timezone
+import io
+import json
+import multiprocessing
+import os
+import platform
+import queue
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.abspath(os.path.join(BENCHMARKS_DIR, "..", ".."))
+sys.path.insert(0, REPO_ROOT)
+
+from common import standin_server  # noqa: E402
+from fixtures import make_html, make_pdf, parts_manual  # noqa: E402
+
+
+APPS = ("pdf_rag", "webpage_rag")
+
+
+def questions(parts, count, seed=0):
+    rng = random.Random(seed)
+    return [
+        f"What torque should I use for the {part['component']} {part['id']} in the {part['system']}?"
+        for part in rng.sample(parts, min(count, len(parts)))
+    ]
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def latency_stats(prefix, latencies):
+    latencies = sorted(1000 * seconds for seconds in latencies)
+    return {
+        f"{prefix}_p50_ms": statistics.median(latencies),
+        f"{prefix}_p99_ms": latencies[min(len(latencies) - 1, int(0.99 * len(latencies)))],
+    }
+
+
+def peak_rss_mib():
+    # ru_maxrss is in KiB on Linux and in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+def bench_pdf_rag(pages, query_count, base_url, workdir):
+    sys.path.insert(0, os.path.join(REPO_ROOT, "rag_apps", "pdf_rag"))
+    from common.embeddings import EmbeddingClient
+    from collection_pool import CollectionPool
+    from index_cache import ClientEmbeddingFunction, IndexCache
+    from pdf_rag import RETRIEVAL_CANDIDATES, build_context, chunk, extract_text, process_pdf, retrieve, stream_chat_completion
+
+    page_texts, parts = parts_manual(pages)
+    pdf = io.BytesIO(make_pdf(page_texts))
+    pdf.name = f"manual_{pages}.pdf"
+
+    text, extract_seconds = timed(extract_text, pdf)
+    chunks, chunk_seconds = timed(chunk, text)
+
+    client = EmbeddingClient(base_url, standin_server.MODEL_ID)
+    cache = IndexCache(path=workdir, embedding_function=ClientEmbeddingFunction(client))
+    key, build_seconds = timed(process_pdf, pdf, cache)
+    pool = CollectionPool(cache)
+    _, load_seconds = timed(pool.acquire, key)
+
+    query_latencies, answer_latencies = [], []
+    for query in questions(parts, query_count):
+        hits, seconds = timed(retrieve, pool, [key], query, n_results=RETRIEVAL_CANDIDATES)
+        query_latencies.append(seconds)
+
+        start = time.perf_counter()
+        "".join(stream_chat_completion(query, build_context(hits, 512), standin_server.MODEL_ID, base_url))
+        answer_latencies.append(seconds + time.perf_counter() - start)
+
+    return {
+        "pages": pages,
+        "chunks": len(chunks),
+        "extract_seconds": extract_seconds,
+        "pages_per_sec": pages / extract_seconds,
+        "chunk_seconds": chunk_seconds,
+        "chunks_per_sec": len(chunks) / chunk_seconds,
+        "index_build_seconds": build_seconds,
+        "embed_chunks_per_sec": client.stats.chunks_per_second,
+        "index_load_seconds": load_seconds,
+        **latency_stats("query", query_latencies),
+        **latency_stats("answer", answer_latencies),
+    }
+
+
+def bench_webpage_rag(pages, query_count, base_url, workdir):
+    os.environ.update({
+        "WEBPAGE_RAG_CACHE_DIR": workdir,
+        "WEBPAGE_RAG_EMBEDDING_URL": base_url,
+        "WEBPAGE_RAG_EMBEDDING_API": "openai",
+        "WEBPAGE_RAG_EMBEDDING_MODEL": standin_server.MODEL_ID,
+    })
+    sys.path.insert(0, os.path.join(REPO_ROOT, "rag_apps", "webpage_rag"))
+    import webpage_rag
+
+    page_texts, parts = parts_manual(pages)
+    html = make_html(page_texts)
+    url = f"http://bench.invalid/manual_{pages}.html"
+
+    documents, parse_seconds = timed(webpage_rag.documents_from_html, html, url)
+    splits, split_seconds = timed(webpage_rag.split_documents, documents)
+    vectorstore, build_seconds = timed(webpage_rag.create_vectorstore, splits)
+    retriever = vectorstore.as_retriever(search_kwargs={"k": webpage_rag.RETRIEVAL_CANDIDATES})
+
+    query_latencies, answer_latencies = [], []
+    for query in questions(parts, query_count):
+        _, seconds = timed(retriever.invoke, query)
+        query_latencies.append(seconds)
+
+        start = time.perf_counter()
+        "".join(webpage_rag.answer_question(vectorstore, query, 512, standin_server.MODEL_ID, base_url))
+        answer_latencies.append(time.perf_counter() - start)
+
+    return {
+        "pages": pages,
+        "chunks": len(splits),
+        "extract_seconds": parse_seconds,
+        "pages_per_sec": pages / parse_seconds,
+        "chunk_seconds": split_seconds,
+        "chunks_per_sec": len(splits) / split_seconds,
+        "index_build_seconds": build_seconds,
+        "embed_chunks_per_sec": webpage_rag.get_embeddings().embeddings.stats.chunks_per_second,
+        **latency_stats("query", query_latencies),
+        **latency_stats("answer", answer_latencies),
+    }
+
+
+def run_one(app, pages, query_count, base_url, results):
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            bench = bench_pdf_rag if app == "pdf_rag" else bench_webpage_rag
+            row = bench(pages, query_count, base_url, workdir)
+        results.put({"app": app, **row, "peak_rss_mib": peak_rss_mib()})
+    except Exception as e:
+        results.put({"app": app, "pages": pages, "error": f"{type(e).__name__}: {e}"})
+        raise
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 50, 200], help="Document sizes in pages")
+    parser.add_argument("--queries", type=int, default=50, help="Questions asked per document")
+    parser.add_argument("--apps", nargs="+", default=APPS, choices=APPS)
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    server = standin_server.start()
+    context = multiprocessing.get_context("spawn")
+    rows = []
+
+    print(f"{'app':<13}{'pages':>6}{'chunks':>8}{'pages/s':>10}{'chunks/s':>11}{'build s':>9}"
+          f"{'q p50 ms':>10}{'q p99 ms':>10}{'peak MiB':>10}")
+    for app in args.apps:
+        for pages in args.sizes:
+            results = context.Queue()
+            process = context.Process(target=run_one, args=(app, pages, args.queries, server.base_url, results))
+            process.start()
+            process.join()
+            try:
+                row = results.get(timeout=1)
+            except queue.Empty:
+                row = {"app": app, "pages": pages, "error": f"benchmark process exited with code {process.exitcode}"}
+            rows.append(row)
+
+            if "error" in row:
+                print(f"{app:<13}{pages:>6}  failed: {row['error']}")
+                continue
+            print(
+                f"{app:<13}{pages:>6}{row['chunks']:>8}{row['pages_per_sec']:>10.1f}{row['chunks_per_sec']:>11.0f}"
+                f"{row['index_build_seconds']:>9.2f}{row['query_p50_ms']:>10.2f}{row['query_p99_ms']:>10.2f}"
+                f"{row['peak_rss_mib']:>10.1f}"
+            )
+
+    server.shutdown()
+
+    if args.output:
+        report = {
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "args": {"sizes": args.sizes, "queries": args.queries, "apps": list(args.apps)},
+            "results": rows,
+        }
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
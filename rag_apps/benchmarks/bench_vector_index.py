@@ -0,0 +1,131 @@
+# SPDX-FileCopyrightText: (c) 2025 Tenstorrent AI ULC
+#
+# SPDX-License-Identifier: Apache-2.0
+"""
+Compare Chroma with the NumPy `VectorIndex` used by the RAG apps on synthetic embeddings.
+
+Vectors are drawn around random cluster centres, like the chunks of a few documents,
+and queries are perturbed copies of stored vectors. Recall@k is measured against an
+exact float32 search. Each backend is built in its own process so that the reported
+resident memory growth is not shared between them.
+
+    python bench_vector_index.py --vectors 5000 --dim 384 --queries 200 -k 5
+"""
+
+import argparse
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+
+from common.vector_index import VectorIndex  # noqa: E402
+
+
+BACKENDS = ("chroma", "float32", "float16", "int8", "int8-mmap")
+
+
+def make_data(count, dim, queries, seed=0):
+    rng = np.random.default_rng(seed)
+    centres = rng.normal(size=(max(count // 200, 1), dim))
+    vectors = centres[rng.integers(len(centres), size=count)] + 0.5 * rng.normal(size=(count, dim))
+    picked = rng.choice(count, size=queries, replace=False)
+    query_vectors = vectors[picked] + 0.3 * rng.normal(size=(queries, dim))
+    return vectors.astype(np.float32), query_vectors.astype(np.float32)
+
+
+def exact_top_k(vectors, queries, k):
+    distances = (queries ** 2).sum(1)[:, None] + (vectors ** 2).sum(1)[None, :] - 2 * queries @ vectors.T
+    return np.argsort(distances, axis=1)[:, :k]
+
+
+def rss_bytes():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def build(backend, vectors, path):
+    ids = [str(i) for i in range(len(vectors))]
+    documents = [f"chunk {i}" for i in range(len(vectors))]
+
+    if backend == "chroma":
+        import chromadb
+
+        col = chromadb.EphemeralClient().create_collection("bench", embedding_function=None)
+        batch_size = col._client.get_max_batch_size()
+        for start in range(0, len(vectors), batch_size):
+            end = start + batch_size
+            col.add(ids=ids[start:end], embeddings=vectors[start:end], documents=documents[start:end])
+        return col
+
+    dtype, _, mode = backend.partition("-")
+    col = VectorIndex("bench", dtype)
+    col.add(ids, vectors, documents)
+    if mode == "mmap":
+        col.save(path)
+        del col
+        col = VectorIndex.load(path, mmap=True)
+    return col
+
+
+def run_backend(backend, args, results):
+    vectors, queries = make_data(args.vectors, args.dim, args.queries)
+    truth = exact_top_k(vectors, queries, args.k)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        before = rss_bytes()
+        start = time.perf_counter()
+        col = build(backend, vectors, os.path.join(tmp, "index"))
+        build_seconds = time.perf_counter() - start
+
+        latencies, recalls = [], []
+        for query, expected in zip(queries, truth):
+            start = time.perf_counter()
+            res = col.query(query_embeddings=[query], n_results=args.k)
+            latencies.append(1000 * (time.perf_counter() - start))
+            recalls.append(len({int(i) for i in res["ids"][0]} & set(expected.tolist())) / args.k)
+        rss = rss_bytes() - before
+
+    latencies.sort()
+    results.put({
+        "backend": backend,
+        "build_seconds": build_seconds,
+        "recall": statistics.mean(recalls),
+        "p50_ms": statistics.median(latencies),
+        "p99_ms": latencies[min(len(latencies) - 1, int(0.99 * len(latencies)))],
+        "rss_mib": rss / 2**20,
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vectors", type=int, default=5000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=5)
+    parser.add_argument("--backends", nargs="+", default=BACKENDS, choices=BACKENDS)
+    args = parser.parse_args()
+
+    print(f"{args.vectors} vectors of dimension {args.dim}, {args.queries} queries, recall@{args.k}\n")
+    print(f"{'backend':<12}{'build s':>9}{'recall':>8}{'p50 ms':>9}{'p99 ms':>9}{'RSS MiB':>9}")
+
+    context = multiprocessing.get_context("spawn")
+    for backend in args.backends:
+        results = context.Queue()
+        process = context.Process(target=run_backend, args=(backend, args, results))
+        process.start()
+        row = results.get()
+        process.join()
+        print(
+            f"{row['backend']:<12}{row['build_seconds']:>9.2f}{row['recall']:>8.3f}"
+            f"{row['p50_ms']:>9.2f}{row['p99_ms']:>9.2f}{row['rss_mib']:>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# SPDX-FileCopyrightText: (c) 2025 Tenstorrent AI ULC
+#
+# SPDX-License-Identifier: Apache-2.0
+"""
+Compare two bench_suite.py result files and flag regressions.
+
+Rates (`*_per_sec`) are better when higher, and times, latencies and memory are
+better when lower. A metric that got worse by more than `--threshold` percent is
+reported as a regression, and the exit status is 1 if there is any.
+
+    python compare.py baseline.json results.json --threshold 10
+"""
+
+import argparse
+import json
+import sys
+
+
+# Describe the workload rather than measure it
+INFO_FIELDS = {"app", "pages", "chunks", "error"}
+
+
+def load(path):
+    with open(path) as f:
+        report = json.load(f)
+    return report, {(row["app"], row["pages"]): row for row in report["results"]}
+
+
+def change(metric, before, after):
+    """Relative change in percent, positive when `after` is better."""
+    if not before:
+        return 0.0
+    if metric.endswith("_per_sec"):
+        return (after - before) / before * 100
+    return (before - after) / before * 100
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Percent a metric may get worse before it is flagged")
+    args = parser.parse_args()
+
+    baseline_report, baseline = load(args.baseline)
+    current_report, current = load(args.current)
+    print(f"baseline: {baseline_report.get('commit') or args.baseline}")
+    print(f"current:  {current_report.get('commit') or args.current}\n")
+
+    regressions = 0
+    print(f"{'app':<13}{'pages':>6}  {'metric':<22}{'baseline':>12}{'current':>12}{'change':>9}")
+    for key in sorted(baseline.keys() & current.keys()):
+        before, after = baseline[key], current[key]
+        if "error" in before or "error" in after:
+            print(f"{key[0]:<13}{key[1]:>6}  skipped, a run failed")
+            continue
+
+        for metric in sorted(before.keys() & after.keys() - INFO_FIELDS):
+            better = change(metric, before[metric], after[metric])
+            flag = ""
+            if better < -args.threshold:
+                flag = "  REGRESSION"
+                regressions += 1
+            print(f"{key[0]:<13}{key[1]:>6}  {metric:<22}{before[metric]:>12.4g}{after[metric]:>12.4g}{better:>+8.1f}%{flag}")
+
+    for key in sorted(baseline.keys() ^ current.keys()):
+        print(f"{key[0]:<13}{key[1]:>6}  only in {'baseline' if key in baseline else 'current'}")
+
+    print(f"\n{regressions} regression(s) beyond {args.threshold:.0f}%")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+# SPDX-FileCopyrightText: (c) 2025 Tenstorrent AI ULC
+#
+# SPDX-License-Identifier: Apache-2.0
+"""Synthetic documents for the RAG benchmarks."""
+
+import html
+import random
+import textwrap
+
+
+COMPONENTS = ["pump", "valve", "gasket", "bearing", "sensor", "filter", "actuator", "coupling", "relay", "manifold"]
+QUALIFIERS = ["hydraulic", "high-pressure", "thermal", "primary", "auxiliary", "sealed", "low-noise", "redundant"]
+SYSTEMS = ["cooling loop", "fuel line", "landing gear", "air intake", "brake assembly", "power unit", "exhaust stack"]
+FILLER = (
+    "Inspect all fittings before operation and confirm that the system is depressurized. "
+    "Use only approved lubricants and record every replacement in the maintenance log. "
+    "Torque values apply to clean, dry threads unless stated otherwise. "
+)
+
+
+def parts_manual(pages, parts_per_page=4, seed=0):
+    """
+    Return `(page_texts, parts)` for a fake maintenance manual.
+
+    Every part has a unique identifier such as `TT-4821-B` and a short description,
+    which makes it easy to check whether retrieval found the right chunk.
+    """
+    rng = random.Random(seed)
+    page_texts, parts = [], []
+    used = set()
+
+    for _ in range(pages):
+        lines = []
+        for _ in range(parts_per_page):
+            while (part_id := f"TT-{rng.randint(1000, 9999)}-{rng.choice('ABCDEFGH')}") in used:
+                pass
+            used.add(part_id)
+
+            part = {
+                "id": part_id,
+                "component": rng.choice(COMPONENTS),
+                "qualifier": rng.choice(QUALIFIERS),
+                "system": rng.choice(SYSTEMS),
+                "torque": rng.randint(5, 120),
+            }
+            parts.append(part)
+            lines.append(
+                f"Part {part_id} is the {part['qualifier']} {part['component']} for the {part['system']}. "
+                f"Tighten to {part['torque']} Nm and replace every {rng.randint(1, 20) * 100} operating hours. "
+                + FILLER
+            )
+        page_texts.append(" ".join(lines))
+
+    return page_texts, parts
+
+
+def _escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def make_pdf(page_texts, line_width=90):
+    """Build a minimal, valid PDF with one page per string using only the standard library."""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # page tree, filled in once the page object numbers are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+
+    page_refs = []
+    for text in page_texts:
+        lines = textwrap.wrap(text, line_width) or [""]
+        content = ("BT /F1 9 Tf 36 806 Td 11 TL " + " ".join(f"({_escape(line)}) '" for line in lines) + " ET")
+        content = content.encode("latin-1", errors="replace")
+
+        page_number = len(objects) + 1
+        page_refs.append(f"{page_number} 0 R")
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {page_number + 1} 0 R >>".encode()
+        )
+        objects.append(b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream")
+
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(page_refs)}] /Count {len(page_refs)} >>".encode()
+
+    pdf = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(pdf))
+        pdf += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+
+    xref_offset = len(pdf)
+    pdf += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        pdf += b"%010d 00000 n \n" % offset
+    pdf += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_offset)
+    return bytes(pdf)
+
+
+def make_html(page_texts, title="Parts manual"):
+    """Build an HTML page with one section per string, wrapped in the navigation and footer of a typical site."""
+    sections = "\n".join(
+        f"<section><h2>Section {i}</h2>\n" + "\n".join(f"<p>{html.escape(line)}</p>" for line in textwrap.wrap(text, 400)) + "\n</section>"
+        for i, text in enumerate(page_texts, start=1)
+    )
+    return (
+        f'<!DOCTYPE html>\n<html lang="en">\n<head><title>{html.escape(title)}</title>'
+        f'<meta name="description" content="Synthetic benchmark page"></head>\n<body>\n'
+        f'<nav><a href="/">Home</a> <a href="/docs">Docs</a> <a href="/support">Support</a></nav>\n'
+        f"<main>\n{sections}\n</main>\n<footer>Copyright Example Corp. All rights reserved.</footer>\n</body>\n</html>\n"
+    )
+
+
+def make_site_page(page_texts, title="Parts manual", seed=0):
+    """
+    Like `make_html()` but wrapped in the chrome of a real documentation site: a
+    cookie banner, a large navigation menu, breadcrumbs, a sidebar of related
+    links, a link list inside the content area and a footer with link columns.
+    """
+    rng = random.Random(seed)
+    topics = [f"{q.title()} {c}s" for q in QUALIFIERS for c in COMPONENTS]
+
+    def links(count, prefix="/docs"):
+        return "\n".join(
+            f'<li><a href="{prefix}/{i}">{html.escape(topic)}</a></li>' for i, topic in enumerate(rng.sample(topics, count))
+        )
+
+    sections = "\n".join(
+        f"<section><h2>Section {i}</h2>\n"
+        + "\n".join(f"<p>{html.escape(line)}</p>" for line in textwrap.wrap(text, 400))
+        + f'\n<div class="related"><h3>See also</h3><ul>{links(5)}</ul></div>\n</section>'
+        for i, text in enumerate(page_texts, start=1)
+    )
+    return (
+        f'<!DOCTYPE html>\n<html lang="en">\n<head><title>{html.escape(title)}</title>'
+        f'<meta name="description" content="Synthetic benchmark page">'
+        f"<style>body {{ font-family: sans-serif; }}</style><script>window.dataLayer = [];</script></head>\n<body>\n"
+        f'<div class="cookie-banner">We use cookies to improve your experience on our site. By continuing to browse '
+        f"you agree to our use of cookies and to our privacy policy. <button>Accept</button></div>\n"
+        f'<header><a href="/">Example Corp</a><nav><ul>{links(40)}</ul></nav>'
+        f'<form role="search"><input name="q" placeholder="Search"></form></header>\n'
+        f'<div class="breadcrumbs"><a href="/">Home</a> / <a href="/docs">Docs</a> / {html.escape(title)}</div>\n'
+        f"<aside><h2>Related</h2><ul>{links(20)}</ul></aside>\n"
+        f"<main>\n<h1>{html.escape(title)}</h1>\n{sections}\n</main>\n"
+        f"<footer><div><h4>Products</h4><ul>{links(15, '/products')}</ul></div>"
+        f"<div><h4>Company</h4><ul>{links(10, '/company')}</ul></div>"
+        f"<p>Copyright Example Corp. All rights reserved. Example Corp is a registered trademark.</p></footer>\n"
+        f"</body>\n</html>\n"
+    )
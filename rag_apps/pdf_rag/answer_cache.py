@@ -0,0 +1,115 @@
+# SPDX-FileCopyrightText: (c) 2025 Tenstorrent AI ULC
+#
+# SPDX-License-Identifier: Apache-2.0
+"""Cache of generated answers, matched exactly or by question similarity."""
+
+from collections import OrderedDict
+from functools import lru_cache
+import re
+import threading
+import time
+
+import numpy as np
+
+
+DEFAULT_TTL = 24 * 60 * 60
+DEFAULT_MAX_ENTRIES = 1000
+
+
+def normalize_question(question):
+    """Lowercase, collapse whitespace and drop trailing punctuation."""
+    return re.sub(r"\s+", " ", question).strip().lower().rstrip("?!. ")
+
+
+class AnswerCache:
+    """
+    Answers keyed by a scope (the documents, model and retrieval settings they were
+    generated with) and the normalized question.
+
+    With a `similarity_threshold` and an `embedding_function`, a question with no
+    exact match also reuses the answer of the most similar cached question in the
+    same scope, if their embeddings' cosine similarity reaches the threshold. Entries
+    expire `ttl` seconds after they were stored, and beyond `max_entries` the least
+    recently used entry is dropped.
+    """
+
+    def __init__(self, embedding_function=None, similarity_threshold=None, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES):
+        self.embedding_function = embedding_function
+        self.similarity_threshold = similarity_threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # (scope, question) -> {"answer", "question", "embedding", "created"}
+        self._lock = threading.Lock()
+        # get() and put() of the same question embed it once
+        self._embed = lru_cache(maxsize=256)(self._embed_uncached)
+
+    @staticmethod
+    def scope(document_keys, model_id, **settings):
+        return (tuple(sorted(document_keys)), model_id, tuple(sorted(settings.items())))
+
+    def get(self, scope, question):
+        """
+        Return `{"answer", "question", "similarity"}` for a cached answer or None.
+        `question` is the cached question that matched and `similarity` is 1.0 for
+        an exact match.
+        """
+        normalized = normalize_question(question)
+        with self._lock:
+            self._expire()
+            entry = self._entries.get((scope, normalized))
+            if entry is not None:
+                self._entries.move_to_end((scope, normalized))
+                return {"answer": entry["answer"], "question": entry["question"], "similarity": 1.0}
+
+            candidates = [(key, entry) for key, entry in self._entries.items() if key[0] == scope and entry["embedding"] is not None]
+
+        if not candidates or not self._similarity_enabled:
+            return None
+
+        embedding = self._embed(normalized)
+        similarities = np.stack([entry["embedding"] for _, entry in candidates]) @ embedding
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.similarity_threshold:
+            return None
+
+        key, entry = candidates[best]
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+        return {"answer": entry["answer"], "question": entry["question"], "similarity": float(similarities[best])}
+
+    def put(self, scope, question, answer):
+        normalized = normalize_question(question)
+        embedding = self._embed(normalized) if self._similarity_enabled else None
+        with self._lock:
+            self._entries[(scope, normalized)] = {
+                "answer": answer,
+                "question": question,
+                "embedding": embedding,
+                "created": time.time(),
+            }
+            self._entries.move_to_end((scope, normalized))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, scope, question):
+        with self._lock:
+            self._entries.pop((scope, normalize_question(question)), None)
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "max_entries": self.max_entries}
+
+    @property
+    def _similarity_enabled(self):
+        return self.similarity_threshold is not None and self.embedding_function is not None
+
+    def _embed_uncached(self, normalized):
+        vector = np.asarray(self.embedding_function([normalized])[0], dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _expire(self):
+        cutoff = time.time() - self.ttl
+        for key in [key for key, entry in self._entries.items() if entry["created"] < cutoff]:
+            del self._entries[key]
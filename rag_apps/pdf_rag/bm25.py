@@ -0,0 +1,165 @@
+# SPDX-FileCopyrightText: (c) 2025 Tenstorrent AI ULC
+#
+# SPDX-License-Identifier: Apache-2.0
+"""In-process BM25 keyword index and rank fusion."""
+
+from array import array
+from collections import Counter, defaultdict
+import heapq
+import io
+import json
+import math
+import os
+import re
+import zipfile
+
+import numpy as np
+
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[-_./][a-z0-9]+)*")
+SEPARATOR_PATTERN = re.compile(r"[-_./]")
+IDENTIFIER_PATTERN = re.compile(r"^(?=.*\d)|[-_./]")
+# Bump when the saved layout or the tokenizer changes; older files are rebuilt instead of loaded
+FORMAT_VERSION = 1
+
+
+def tokenize(text):
+    """
+    Lowercase word tokens. Compound identifiers such as `TT-4821-B` are kept whole
+    and also indexed by their parts, so both `tt-4821-b` and `4821` match.
+    """
+    tokens = []
+    for match in TOKEN_PATTERN.finditer(text.lower()):
+        token = match.group()
+        tokens.append(token)
+        if SEPARATOR_PATTERN.search(token):
+            tokens.extend(SEPARATOR_PATTERN.split(token))
+    return tokens
+
+
+def is_keyword_query(query):
+    """True when most query terms look like part numbers, codes or other identifiers."""
+    terms = [match.group() for match in TOKEN_PATTERN.finditer(query.lower())]
+    identifiers = [term for term in terms if IDENTIFIER_PATTERN.search(term)]
+    return bool(identifiers) and (len(terms) <= 3 or 2 * len(identifiers) >= len(terms))
+
+
+class BM25Index:
+    """
+    Inverted index with Okapi BM25 scoring.
+
+    Postings are stored per term as two parallel `array`s (document numbers and term
+    frequencies) instead of Python objects, which keeps the index compact.
+    """
+
+    def __init__(self, k1=1.2, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.ids = []
+        self._doc_lengths = array("I")
+        self._total_length = 0
+        self._postings = {}  # term -> (array of doc numbers, array of term frequencies)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def add(self, ids, texts):
+        for chunk_id, text in zip(ids, texts):
+            doc = len(self.ids)
+            self.ids.append(chunk_id)
+
+            counts = Counter(tokenize(text))
+            length = sum(counts.values())
+            self._doc_lengths.append(length)
+            self._total_length += length
+
+            for term, frequency in counts.items():
+                postings = self._postings.get(term)
+                if postings is None:
+                    postings = self._postings[term] = (array("I"), array("I"))
+                postings[0].append(doc)
+                postings[1].append(frequency)
+
+    def search(self, query, k=10):
+        """Return up to `k` `(id, score)` pairs, best first."""
+        doc_count = len(self.ids)
+        if not doc_count:
+            return []
+
+        avg_length = self._total_length / doc_count
+        scores = defaultdict(float)
+
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+
+            docs, frequencies = postings
+            idf = math.log(1 + (doc_count - len(docs) + 0.5) / (len(docs) + 0.5))
+            for doc, frequency in zip(docs, frequencies):
+                norm = self.k1 * (1 - self.b + self.b * self._doc_lengths[doc] / avg_length)
+                scores[doc] += idf * frequency * (self.k1 + 1) / (frequency + norm)
+
+        top = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+        return [(self.ids[doc], score) for doc, score in top]
+
+    def save(self, path):
+        """
+        Write the index to `path` as a NumPy `.npz` file: the postings of all terms
+        concatenated into flat arrays, plus the ids, terms and parameters as JSON.
+        """
+        terms = list(self._postings)
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(self._postings[term][0]) for term in terms])
+        meta = {"format": FORMAT_VERSION, "k1": self.k1, "b": self.b, "ids": self.ids, "terms": terms}
+
+        buffer = io.BytesIO()
+        np.savez(
+            buffer,
+            meta=np.frombuffer(json.dumps(meta).encode(), dtype=np.uint8),
+            doc_lengths=np.frombuffer(self._doc_lengths, dtype=np.uint32),
+            offsets=offsets,
+            docs=np.frombuffer(b"".join(self._postings[term][0].tobytes() for term in terms), dtype=np.uint32),
+            frequencies=np.frombuffer(b"".join(self._postings[term][1].tobytes() for term in terms), dtype=np.uint32),
+        )
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(buffer.getbuffer())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Read an index written by `save()`. Raises ValueError for a file of another format or version."""
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                meta = json.loads(data["meta"].tobytes())
+                if meta.get("format") != FORMAT_VERSION:
+                    raise ValueError(f"BM25 index format {meta.get('format')}, expected {FORMAT_VERSION}")
+                arrays = {name: data[name] for name in ("doc_lengths", "offsets", "docs", "frequencies")}
+        except (KeyError, OSError, zipfile.BadZipFile) as e:
+            raise ValueError(f"unreadable BM25 index {path}: {e}") from e
+
+        index = cls(meta["k1"], meta["b"])
+        index.ids = meta["ids"]
+        index._doc_lengths = _uint_array(arrays["doc_lengths"])
+        index._total_length = int(arrays["doc_lengths"].sum())
+        offsets, docs, frequencies = arrays["offsets"], arrays["docs"], arrays["frequencies"]
+        for i, term in enumerate(meta["terms"]):
+            start, end = offsets[i], offsets[i + 1]
+            index._postings[term] = (_uint_array(docs[start:end]), _uint_array(frequencies[start:end]))
+        return index
+
+
+def _uint_array(values):
+    result = array("I")
+    result.frombytes(np.ascontiguousarray(values, dtype=np.uint32).tobytes())
+    return result
+
+
+def reciprocal_rank_fusion(rankings, k=60):
+    """Fuse several best-first lists of hashable items into one, best first."""
+    scores = defaultdict(float)
+    for ranking in rankings:
+        for rank, item in enumerate(ranking):
+            scores[item] += 1 / (k + rank + 1)
+    return sorted(scores, key=scores.get, reverse=True)
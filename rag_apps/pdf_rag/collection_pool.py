@@ -0,0 +1,278 @@
+# SPDX-FileCopyrightText: (c) 2025 Tenstorrent AI ULC
+#
+# SPDX-License-Identifier: Apache-2.0
+"""In-memory working set of indexed PDFs shared by all Streamlit sessions."""
+
+from collections import OrderedDict
+from contextlib import nullcontext
+from pathlib import Path
+import os
+import sys
+import threading
+import time
+
+import chromadb
+from chromadb.errors import NotFoundError
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from common.vector_index import VectorIndex, VectorIndexClient  # noqa: E402
+
+from bm25 import BM25Index  # noqa: E402
+
+
+DEFAULT_MEMORY_BUDGET = 512 * 1024 * 1024
+DEFAULT_IDLE_SECONDS = 30 * 60
+
+
+class CollectionPool:
+    """
+    Loads documents from an `IndexCache` into in-memory Chroma collections.
+
+    Each session queries only the documents it uploaded, and sessions that upload the
+    same PDF share one read-only collection, so an upload never disturbs another
+    session's index. The estimated size of the loaded collections is kept under
+    `memory_budget` bytes by evicting the least recently used ones, and collections
+    idle for `idle_seconds` are dropped too. An evicted document is reloaded from the
+    on-disk cache, without re-embedding, the next time it is queried.
+
+    With `vector_dtype` set ("float32", "float16" or "int8"), documents are loaded
+    into NumPy `VectorIndex` collections instead of Chroma. Their vectors are saved
+    next to the cache entry on first load and memory-mapped from there afterwards.
+    """
+
+    def __init__(self, cache, memory_budget=DEFAULT_MEMORY_BUDGET, idle_seconds=DEFAULT_IDLE_SECONDS, vector_dtype=None):
+        self.cache = cache
+        self.memory_budget = memory_budget
+        self.idle_seconds = idle_seconds
+        self.vector_dtype = vector_dtype
+        self.client = VectorIndexClient(vector_dtype) if vector_dtype else chromadb.EphemeralClient()
+        self._entries = OrderedDict()  # key -> {"collection", "bm25", "bytes", "last_used"[, "lock", "partial"]}
+        self._loading = {}  # key -> lock held while the document is loaded, kept for reloads
+        self._lock = threading.Lock()
+
+    def attach(self, job):
+        """
+        Serve the document an `IngestJob` is still indexing straight from its partial
+        collection and keyword index, until `detach()` is called once it is done.
+        """
+        with self._lock:
+            self._entries[job.key] = {
+                "collection": job.collection,
+                "bm25": job.bm25,
+                "lock": job.lock,
+                "bytes": 0,
+                "last_used": time.time(),
+                "partial": True,
+            }
+
+    def detach(self, key):
+        """Drop a partial entry so that the next query loads the committed document."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.get("partial"):
+                del self._entries[key]
+
+    def acquire(self, key):
+        """Return the in-memory collection for `key`, or None if it is not in the cache."""
+        entry = self._acquire_entry(key)
+        return entry and entry["collection"]
+
+    def _acquire_entry(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                return self._touch(key, entry)
+            loading = self._loading.setdefault(key, threading.Lock())
+
+        # Documents are read from disk under their own lock, so a large load only
+        # holds up the sessions waiting for the same document
+        with loading:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    return self._touch(key, entry)
+
+            source = self.cache.get(key)
+            if source is None:
+                return None
+            loaded = self._load(key, source)
+
+            with self._lock:
+                # attach() may have started serving a re-ingest of the document meanwhile
+                entry = self._entries.setdefault(key, loaded)
+                return self._touch(key, entry)
+
+    def _touch(self, key, entry):
+        entry["last_used"] = time.time()
+        self._entries.move_to_end(key)
+        self._evict()
+        return entry
+
+    def query(self, keys, query_text, n_results=3):
+        """
+        Query several documents at once and return the overall top `n_results` hits.
+
+        The query is embedded once. Each hit is a dict with the document `key`, chunk
+        `id`, `document`, `metadata` and `distance`.
+        """
+        return self.query_many(keys, [query_text], n_results)[0]
+
+    def embed(self, texts):
+        return self.cache.embedding_function(list(texts))
+
+    def query_many(self, keys, query_texts, n_results=3, query_embeddings=None):
+        """
+        Like `query()` for a batch of queries: one embedding call and one query per
+        document for all of them. Pass `query_embeddings` if the queries are already embedded.
+        """
+        query_texts = list(query_texts)
+        if not query_texts:
+            return []
+        embeddings = self.embed(query_texts) if query_embeddings is None else query_embeddings
+
+        hits = [[] for _ in query_texts]
+        for key in keys:
+            res = self._query_one(key, embeddings, n_results)
+            if res is None:
+                continue
+
+            for query_hits, ids, documents, metadatas, distances in zip(
+                hits, res["ids"], res["documents"], res["metadatas"], res["distances"]
+            ):
+                for chunk_id, document, metadata, distance in zip(ids, documents, metadatas, distances):
+                    query_hits.append({"key": key, "id": chunk_id, "document": document, "metadata": metadata, "distance": distance})
+
+        return [sorted(query_hits, key=lambda hit: hit["distance"])[:n_results] for query_hits in hits]
+
+    def keyword_query(self, keys, query_text, n_results=3):
+        """Like `query()` but ranked by BM25 over the documents' inverted indexes."""
+        hits = []
+        for key in keys:
+            entry = self._acquire_entry(key)
+            if entry is None:
+                continue
+
+            with entry.get("lock") or nullcontext():
+                ranked = entry["bm25"].search(query_text, n_results)
+            if not ranked:
+                continue
+
+            try:
+                stored = entry["collection"].get(ids=[chunk_id for chunk_id, _ in ranked], include=["documents", "metadatas"])
+            except NotFoundError:
+                continue
+            by_id = dict(zip(stored["ids"], zip(stored["documents"], stored["metadatas"])))
+
+            for chunk_id, score in ranked:
+                document, metadata = by_id[chunk_id]
+                hits.append({"key": key, "id": chunk_id, "document": document, "metadata": metadata, "score": score})
+
+        return sorted(hits, key=lambda hit: hit["score"], reverse=True)[:n_results]
+
+    def hit_embeddings(self, hits):
+        """The stored embedding of every hit, in order, fetched with one call per document."""
+        ids_by_key = {}
+        for hit in hits:
+            ids_by_key.setdefault(hit["key"], []).append(hit["id"])
+
+        vectors = {}
+        for key, ids in ids_by_key.items():
+            entry = self._acquire_entry(key)
+            if entry is None:
+                continue
+            try:
+                stored = entry["collection"].get(ids=ids, include=["embeddings"])
+            except NotFoundError:
+                continue
+            vectors.update(((key, chunk_id), vector) for chunk_id, vector in zip(stored["ids"], stored["embeddings"]))
+        return [vectors.get((hit["key"], hit["id"])) for hit in hits]
+
+    def _query_one(self, key, embeddings, n_results):
+        # Another session may evict the collection between acquire() and query()
+        for _ in range(2):
+            col = self.acquire(key)
+            if col is None:
+                return None
+            try:
+                return col.query(query_embeddings=list(embeddings), n_results=n_results)
+            except NotFoundError:
+                continue
+        return None
+
+    def stats(self):
+        with self._lock:
+            return {
+                "loaded": len(self._entries),
+                "bytes": sum(e["bytes"] for e in self._entries.values()),
+                "memory_budget": self.memory_budget,
+            }
+
+    def _load(self, key, source):
+        name = self.cache.collection_name(key)
+        try:
+            self.client.delete_collection(name)
+        except (NotFoundError, KeyError):
+            pass
+
+        vectors_path = self.cache.sidecar_path(key, f"vectors-{self.vector_dtype}")
+        if self.vector_dtype and VectorIndex.exists(vectors_path):
+            col = self.client.open_collection(name, vectors_path)
+            stored = col.get(include=["documents"])
+        else:
+            col, stored = self._copy(name, source)
+            if self.vector_dtype:
+                col.save(vectors_path)
+
+        if self.vector_dtype:
+            size = col.nbytes
+        else:
+            # Rough footprint: float32 vectors plus the chunk text
+            size = sum(4 * len(embedding) + len(document) for embedding, document in zip(stored["embeddings"], stored["documents"]))
+
+        # The keyword index is written at ingest time; rebuild it for older cache entries
+        bm25_path = self.cache.sidecar_path(key, "bm25")
+        bm25 = None
+        if os.path.exists(bm25_path):
+            try:
+                bm25 = BM25Index.load(bm25_path)
+            except ValueError:
+                pass
+        if bm25 is None:
+            bm25 = BM25Index()
+            bm25.add(stored["ids"], stored["documents"])
+            bm25.save(bm25_path)
+
+        return {"collection": col, "bm25": bm25, "bytes": size, "last_used": time.time()}
+
+    def _copy(self, name, source):
+        # Queries arrive as embeddings, so the copy needs no embedding function
+        col = self.client.create_collection(name, embedding_function=None)
+        stored = source.get(include=["embeddings", "documents", "metadatas"])
+
+        batch_size = self.client.get_max_batch_size()
+        for start in range(0, len(stored["ids"]), batch_size):
+            end = start + batch_size
+            col.add(
+                ids=stored["ids"][start:end],
+                embeddings=stored["embeddings"][start:end],
+                documents=stored["documents"][start:end],
+                metadatas=stored["metadatas"][start:end]
+            )
+        return col, stored
+
+    def _evict(self):
+        now = time.time()
+        total = sum(e["bytes"] for e in self._entries.values())
+
+        # Least recently used first; the entry just touched is last and always kept
+        for key in list(self._entries)[:-1]:
+            entry = self._entries[key]
+            if entry.get("partial"):
+                # Still being indexed; the job owns the collection
+                continue
+            if total <= self.memory_budget and now - entry["last_used"] < self.idle_seconds:
+                continue
+
+            del self._entries[key]
+            total -= entry["bytes"]
+            self.client.delete_collection(entry["collection"].name)
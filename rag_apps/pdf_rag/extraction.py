@@ -0,0 +1,116 @@
+# SPDX-FileCopyrightText: (c) 2025 Tenstorrent AI ULC
+#
+# SPDX-License-Identifier: Apache-2.0
+"""Streaming PDF text extraction and chunking."""
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+import io
+import multiprocessing
+import os
+
+import pypdf
+
+
+# Below this many pages the process pool costs more than it saves
+SERIAL_PAGE_LIMIT = 32
+# Workers are never forked: the apps call this from threads, and a fork copies any lock
+# another thread (Chroma, onnxruntime, httpx) holds at that moment into the child
+START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+_reader = None
+
+
+def _init_worker(data):
+    global _reader
+    _reader = pypdf.PdfReader(io.BytesIO(data))
+
+
+def _extract_range(start, stop):
+    return [_reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+
+def page_count(data):
+    return len(pypdf.PdfReader(io.BytesIO(data)).pages)
+
+
+def iter_pages(data, workers=None, pages_per_task=8):
+    """
+    Yield `(page_number, text)` for every page of the PDF in `data`, in page order.
+
+    Large documents are split into ranges of `pages_per_task` pages that are extracted
+    in a process pool. At most `2 * workers` ranges are in flight at once, so memory
+    stays bounded no matter how long the document is. Page numbers start at 1.
+    """
+    reader = pypdf.PdfReader(io.BytesIO(data))
+    page_count = len(reader.pages)
+    workers = workers or os.cpu_count() or 1
+
+    if page_count <= SERIAL_PAGE_LIMIT or workers == 1:
+        for i, page in enumerate(reader.pages):
+            yield i + 1, page.extract_text() or ""
+        return
+    del reader
+
+    ranges = ((start, min(start + pages_per_task, page_count)) for start in range(0, page_count, pages_per_task))
+    pool = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context(START_METHOD),
+        initializer=_init_worker,
+        initargs=(data,),
+    )
+    try:
+        pending = deque((start, pool.submit(_extract_range, start, stop)) for start, stop in islice(ranges, 2 * workers))
+        while pending:
+            start, future = pending.popleft()
+            texts = future.result()
+
+            # Keep the pool busy while the caller consumes this range
+            next_range = next(ranges, None)
+            if next_range is not None:
+                pending.append((next_range[0], pool.submit(_extract_range, *next_range)))
+
+            for offset, text in enumerate(texts):
+                yield start + offset + 1, text
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def iter_chunks(pages, size=100, overlap=30):
+    """
+    Yield `(text, metadata)` windows of `size` words that advance by `size - overlap` words.
+
+    `pages` is an iterable of `(page_number, text)` such as `iter_pages()`. Only the
+    current window is buffered. The metadata records the pages a chunk spans and the
+    word offset of its first word in the document.
+    """
+    step = size - overlap
+    words, word_pages = [], []
+    offset = 0
+
+    def window():
+        end = min(size, len(words))
+        metadata = {"page_start": word_pages[0], "page_end": word_pages[end - 1], "offset": offset}
+        return " ".join(words[:end]), metadata
+
+    for page_number, text in pages:
+        page_words = text.split()
+        words.extend(page_words)
+        word_pages.extend([page_number] * len(page_words))
+
+        while len(words) >= size:
+            yield window()
+            del words[:step], word_pages[:step]
+            offset += step
+
+    while words:
+        yield window()
+        del words[:step], word_pages[:step]
+        offset += step
+
+
+def batched(iterable, n):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, n)):
+        yield batch
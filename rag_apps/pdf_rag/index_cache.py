@@ -0,0 +1,222 @@
+# SPDX-FileCopyrightText: (c) 2025 Tenstorrent AI ULC
+#
+# SPDX-License-Identifier: Apache-2.0
+"""Persistent, content-addressed cache of indexed PDFs."""
+
+from pathlib import Path
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+
+import chromadb
+from chromadb.errors import NotFoundError
+from chromadb.api.types import EmbeddingFunction
+from chromadb.utils.embedding_functions import DefaultEmbeddingFunction
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from common.embeddings import EmbeddingStats  # noqa: E402
+
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "tt_pdf_rag")
+DEFAULT_MAX_CHUNKS = 50_000
+# Cache hits only update recency in memory; it is written out at most this often, and on every commit
+RECENCY_SAVE_INTERVAL = 60
+
+
+def document_key(data, **params):
+    """SHA-256 of the PDF bytes plus every parameter that changes the stored chunks."""
+    digest = hashlib.sha256(data)
+    for name in sorted(params):
+        digest.update(f"|{name}={params[name]}".encode())
+    return digest.hexdigest()
+
+
+class DefaultEmbedder(DefaultEmbeddingFunction):
+    """
+    Chroma's default embedder (all-MiniLM-L6-v2 on ONNX Runtime) with one model
+    session kept for the life of the process; `DefaultEmbeddingFunction` loads a new
+    one on every call. Collections still record it as Chroma's "default" function,
+    so caches built with either open with the other.
+    """
+
+    identity = "chroma-default"
+
+    def __init__(self):
+        super().__init__()
+        self.stats = EmbeddingStats()
+        self._model = None
+        self._lock = threading.Lock()
+
+    def embed(self, texts):
+        texts = list(texts)
+        if not texts:
+            return []
+
+        started = time.perf_counter()
+        with self._lock:
+            if self._model is None:
+                from chromadb.utils.embedding_functions.onnx_mini_lm_l6_v2 import ONNXMiniLM_L6_V2
+                self._model = ONNXMiniLM_L6_V2()
+            vectors = self._model(texts)
+            self.stats.chunks += len(texts)
+            self.stats.batches += 1
+            self.stats.seconds += time.perf_counter() - started
+        return vectors
+
+    def __call__(self, input):
+        return self.embed(input)
+
+
+class ClientEmbeddingFunction(EmbeddingFunction):
+    """
+    Chroma embedding function that sends texts through a `common.embeddings.EmbeddingClient`
+    or anything else with its `embed`/`identity`/`stats` interface, such as
+    `common.onnx_embeddings.OnnxEmbedder`.
+    """
+
+    def __init__(self, client):
+        self.client = client
+
+    @property
+    def identity(self):
+        return self.client.identity
+
+    @property
+    def stats(self):
+        return self.client.stats
+
+    def __call__(self, input):
+        return self.client.embed(input)
+
+    @staticmethod
+    def name():
+        # Nothing is persisted in the collection config, the client is passed in on every open
+        return NotImplemented
+
+
+class IndexCache:
+    """
+    Keeps one Chroma collection per document on disk.
+
+    Documents are looked up by `document_key()`, so a PDF that was indexed before
+    (under any file name, in any session or process) is reused without re-embedding.
+    Once the stored chunks exceed `max_chunks`, whole documents are evicted
+    least-recently-used first. Lookups record recency in memory; the manifest is
+    rewritten when a document is added or evicted, and by a lookup at most every
+    `RECENCY_SAVE_INTERVAL` seconds.
+
+    `embedding_function` is handed to Chroma for every collection; leave it as None
+    to use Chroma's default embedder (`DefaultEmbedder`).
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_DIR, max_chunks=DEFAULT_MAX_CHUNKS, embedding_function=None):
+        os.makedirs(path, exist_ok=True)
+        self.client = chromadb.PersistentClient(path=path)
+        self.max_chunks = max_chunks
+        self.embedding_function = embedding_function or DefaultEmbedder()
+        self._manifest_path = os.path.join(path, "manifest.json")
+        self._sidecar_dir = os.path.join(path, "sidecars")
+        os.makedirs(self._sidecar_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._entries = self._load_manifest()
+        self._saved_at = time.monotonic()
+
+    @staticmethod
+    def collection_name(key):
+        return f"pdf_{key[:32]}"
+
+    def sidecar_path(self, key, suffix):
+        """Path of an extra file stored and evicted together with the document."""
+        return os.path.join(self._sidecar_dir, f"{key}.{suffix}")
+
+    def get(self, key):
+        """Return the indexed collection for `key`, or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            try:
+                col = self.client.get_collection(entry["collection"], embedding_function=self.embedding_function)
+            except NotFoundError:
+                # Removed behind our back, forget it and rebuild
+                del self._entries[key]
+                self._save_manifest()
+                return None
+
+            entry["last_used"] = time.time()
+            if time.monotonic() - self._saved_at >= RECENCY_SAVE_INTERVAL:
+                self._save_manifest()
+            return col
+
+    def create(self, key):
+        """Return an empty collection for `key`, dropping any partial leftovers."""
+        name = self.collection_name(key)
+        with self._lock:
+            self._entries.pop(key, None)
+            self._delete(key, name)
+            return self.client.create_collection(name, embedding_function=self.embedding_function)
+
+    def commit(self, key, chunk_count, filename=None, duplicates=0):
+        """Register a fully indexed collection and evict old documents if over budget."""
+        with self._lock:
+            self._entries[key] = {
+                "collection": self.collection_name(key),
+                "chunks": chunk_count,
+                "duplicates": duplicates,
+                "filename": filename,
+                "last_used": time.time(),
+            }
+            self._evict(keep=key)
+            self._save_manifest()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "documents": len(self._entries),
+                "chunks": sum(e["chunks"] for e in self._entries.values()),
+                # Near-duplicate chunks dropped at ingest, never embedded or stored
+                "duplicates": sum(e.get("duplicates", 0) for e in self._entries.values()),
+                "max_chunks": self.max_chunks,
+            }
+
+    def _evict(self, keep):
+        total = sum(e["chunks"] for e in self._entries.values())
+        by_age = sorted(self._entries, key=lambda k: self._entries[k]["last_used"])
+
+        for key in by_age:
+            if total <= self.max_chunks:
+                break
+            if key == keep:
+                continue
+
+            entry = self._entries.pop(key)
+            total -= entry["chunks"]
+            self._delete(key, entry["collection"])
+
+    def _delete(self, key, collection_name):
+        try:
+            self.client.delete_collection(collection_name)
+        except NotFoundError:
+            pass
+
+        for filename in os.listdir(self._sidecar_dir):
+            if filename.startswith(key + "."):
+                os.remove(os.path.join(self._sidecar_dir, filename))
+
+    def _load_manifest(self):
+        try:
+            with open(self._manifest_path) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _save_manifest(self):
+        tmp_path = self._manifest_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self._entries, f)
+        os.replace(tmp_path, self._manifest_path)
+        self._saved_at = time.monotonic()
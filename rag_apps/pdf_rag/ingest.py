@@ -0,0 +1,95 @@
+# SPDX-FileCopyrightText: (c) 2025 Tenstorrent AI ULC
+#
+# SPDX-License-Identifier: Apache-2.0
+"""Background indexing of PDFs that can be queried while it runs."""
+
+from pathlib import Path
+import sys
+import threading
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from common.dedup import NearDuplicateFilter  # noqa: E402
+
+from bm25 import BM25Index  # noqa: E402
+from extraction import batched, iter_chunks, iter_pages, page_count  # noqa: E402
+
+
+class IngestJob(threading.Thread):
+    """
+    Indexes one PDF into an `IndexCache` entry, batch by batch in page order.
+
+    Every batch is added to `collection` and `bm25` as soon as it is embedded, so the
+    chunks indexed so far can be searched while the job runs; `lock` guards `bm25`
+    against concurrent searches. `pages_indexed` is the last page whose text is fully
+    stored and `page_count` the total. When all chunks are stored the cache entry is
+    committed and `on_done(job)` is called, also after a failure, which leaves the
+    exception in `error`.
+
+    With a `dedup_threshold`, chunks that are near-duplicates of an earlier chunk of
+    the document (repeated headers, footers, boilerplate pages) are dropped before
+    they are embedded and counted in `duplicates`.
+
+    `start()` runs the job on its own thread and `run()` runs it on the caller's.
+    """
+
+    def __init__(self, data, key, cache, filename=None, chunk_size=100, overlap=30, batch_size=256, workers=None,
+                 dedup_threshold=None, on_done=None):
+        super().__init__(name=f"ingest-{key[:12]}", daemon=True)
+        self.data = data
+        self.key = key
+        self.cache = cache
+        self.filename = filename
+        self.chunk_size = chunk_size
+        self.overlap = overlap
+        self.batch_size = batch_size
+        self.workers = workers
+        self.dedup = NearDuplicateFilter(dedup_threshold) if dedup_threshold else None
+        self.on_done = on_done
+
+        self.page_count = page_count(data)
+        self.pages_indexed = 0
+        self.chunks = 0
+        self.error = None
+        self.lock = threading.Lock()
+        self.bm25 = BM25Index()
+        self.collection = cache.create(key)
+        self.finished = threading.Event()
+
+    @property
+    def duplicates(self):
+        return self.dedup.removed if self.dedup is not None else 0
+
+    @property
+    def progress(self):
+        return self.pages_indexed / self.page_count if self.page_count else 1.0
+
+    def run(self):
+        try:
+            # Pages stream in order from the extraction pool and are indexed batch by batch,
+            # so chunk ids are stable and memory does not grow with the document
+            pages = iter_pages(self.data, workers=self.workers)
+            chunks = iter_chunks(pages, size=self.chunk_size, overlap=self.overlap)
+            if self.dedup is not None:
+                chunks = self.dedup.filter(chunks, key=lambda chunk: chunk[0])
+
+            for batch in batched(chunks, self.batch_size):
+                documents, metadatas = zip(*batch)
+                ids = [str(i) for i in range(self.chunks, self.chunks + len(batch))]
+                self.collection.add(documents=list(documents), metadatas=list(metadatas), ids=ids)
+                with self.lock:
+                    self.bm25.add(ids, documents)
+                self.chunks += len(batch)
+                # Windows cross page boundaries, so the last chunk's end page is usually only partly stored
+                self.pages_indexed = max(self.pages_indexed, metadatas[-1]["page_end"] - 1)
+
+            self.pages_indexed = self.page_count
+            self.bm25.save(self.cache.sidecar_path(self.key, "bm25"))
+            self.cache.commit(self.key, self.chunks, filename=self.filename, duplicates=self.duplicates)
+        except Exception as e:
+            self.error = e
+            if threading.current_thread() is not self:
+                raise
+        finally:
+            self.finished.set()
+            if self.on_done is not None:
+                self.on_done(self)
@@ -1,48 +1,256 @@
 # SPDX-FileCopyrightText: (c) 2025 Tenstorrent AI ULC
 #
 # SPDX-License-Identifier: Apache-2.0
+from pathlib import Path
 from urllib.parse import urljoin
+import os
+import sys
+import threading
 
-import requests
 import streamlit as st
-import pypdf
-import chromadb
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from common import streaming  # noqa: E402
+from common.client import get_client  # noqa: E402
+from common.context import pack_context  # noqa: E402
+from common.dedup import NearDuplicateFilter  # noqa: E402
+from common.embeddings import EmbeddingClient, DEFAULT_BATCH_SIZE  # noqa: E402
+from common.models import get_models  # noqa: E402
+from common.onnx_embeddings import OnnxEmbedder  # noqa: E402
+from common.rerank import CrossEncoderScorer, Reranker, DEFAULT_LAMBDA  # noqa: E402
+
+from answer_cache import AnswerCache, DEFAULT_MAX_ENTRIES, DEFAULT_TTL
+from bm25 import is_keyword_query, reciprocal_rank_fusion
+from collection_pool import CollectionPool, DEFAULT_MEMORY_BUDGET, DEFAULT_IDLE_SECONDS
+from extraction import iter_chunks, iter_pages
+from index_cache import ClientEmbeddingFunction, IndexCache, document_key, DEFAULT_CACHE_DIR, DEFAULT_MAX_CHUNKS
+from ingest import IngestJob
+
+
+CHUNK_SIZE = 100
+CHUNK_OVERLAP = 30
+INGEST_BATCH_SIZE = 256
+# Chunks retrieved per question before packing them into the context token budget
+RETRIEVAL_CANDIDATES = 10
+# Bump when the stored chunk text or metadata layout changes
+INDEX_VERSION = 2
+# Chunks at least this similar (estimated Jaccard over word shingles) to an earlier chunk are dropped
+DEDUP_THRESHOLD = float(os.environ.get("PDF_RAG_DEDUP_THRESHOLD", 0.9)) or None
+
+
+def setup_embedder():
+    """
+    The embedding backend named by `PDF_RAG_EMBEDDING_BACKEND`: "chroma" (Chroma's
+    default embedder), "onnx" (a local ONNX model with its own thread-tuned session)
+    or "server" (an embedding server). Defaults to "server" when an embedding server
+    URL is set and to "chroma" otherwise. Returns None for "chroma".
+    """
+    client = EmbeddingClient.from_env("PDF_RAG")
+    backend = os.environ.get("PDF_RAG_EMBEDDING_BACKEND", "server" if client else "chroma")
+    if backend == "chroma":
+        return None
+    if backend == "server":
+        if client is None:
+            raise ValueError("PDF_RAG_EMBEDDING_BACKEND=server needs PDF_RAG_EMBEDDING_URL")
+        return client
+    if backend == "onnx":
+        threads = os.environ.get("PDF_RAG_ONNX_THREADS")
+        return OnnxEmbedder(
+            model_dir=os.environ.get("PDF_RAG_ONNX_MODEL_DIR") or None,
+            threads=int(threads) if threads else None,
+            batch_size=int(os.environ.get("PDF_RAG_EMBEDDING_BATCH_SIZE", DEFAULT_BATCH_SIZE)),
+        )
+    raise ValueError(f"unknown PDF_RAG_EMBEDDING_BACKEND {backend!r}, expected 'chroma', 'onnx' or 'server'")
 
-@st.cache_data
-def get_available_models(base_url):
-    res = requests.get(urljoin(base_url, "/v1/models"), headers={"accept": "application/json"})
-    return res
+
+@st.cache_resource
+def setup_collection_pool():
+    embedder = setup_embedder()
+    cache = IndexCache(
+        path=os.environ.get("PDF_RAG_CACHE_DIR", DEFAULT_CACHE_DIR),
+        max_chunks=int(os.environ.get("PDF_RAG_CACHE_MAX_CHUNKS", DEFAULT_MAX_CHUNKS)),
+        embedding_function=ClientEmbeddingFunction(embedder) if embedder else None
+    )
+    vector_index = os.environ.get("PDF_RAG_VECTOR_INDEX", "chroma")
+    return CollectionPool(
+        cache,
+        memory_budget=int(os.environ.get("PDF_RAG_MEMORY_BUDGET_MB", DEFAULT_MEMORY_BUDGET // 2**20)) * 2**20,
+        idle_seconds=int(os.environ.get("PDF_RAG_IDLE_SECONDS", DEFAULT_IDLE_SECONDS)),
+        vector_dtype=None if vector_index == "chroma" else vector_index
+    )
+
+
+@st.cache_resource
+def setup_answer_cache():
+    # Unset: only questions that match exactly after normalization reuse an answer
+    similarity = os.environ.get("PDF_RAG_ANSWER_SIMILARITY")
+    return AnswerCache(
+        embedding_function=setup_collection_pool().cache.embedding_function,
+        similarity_threshold=float(similarity) if similarity else None,
+        ttl=int(os.environ.get("PDF_RAG_ANSWER_TTL_SECONDS", DEFAULT_TTL)),
+        max_entries=int(os.environ.get("PDF_RAG_ANSWER_CACHE_SIZE", DEFAULT_MAX_ENTRIES))
+    )
+
+
+def pdf_key(data, cache):
+    embedder = getattr(cache.embedding_function, "identity", "chroma-default")
+    return document_key(
+        data, size=CHUNK_SIZE, overlap=CHUNK_OVERLAP, version=INDEX_VERSION, embedder=embedder, dedup=DEDUP_THRESHOLD
+    )
+
+
+def new_ingest_job(pdf, key, cache, on_done=None):
+    return IngestJob(
+        pdf.getvalue(),
+        key,
+        cache,
+        filename=getattr(pdf, "name", None),
+        chunk_size=CHUNK_SIZE,
+        overlap=CHUNK_OVERLAP,
+        batch_size=INGEST_BATCH_SIZE,
+        workers=int(os.environ.get("PDF_RAG_EXTRACT_WORKERS", 0)) or None,
+        dedup_threshold=DEDUP_THRESHOLD,
+        on_done=on_done
+    )
 
 
 @st.cache_resource
-def setup_chromadb():
-    chroma = chromadb.Client()
-    col = chroma.get_or_create_collection("pdf_rag")
-    return col
+def setup_reranker():
+    # Relevance comes from embedding similarity unless a local cross-encoder is configured
+    model = os.environ.get("PDF_RAG_RERANK_MODEL")
+    return Reranker(
+        lambda_mult=float(os.environ.get("PDF_RAG_MMR_LAMBDA", DEFAULT_LAMBDA)),
+        scorer=CrossEncoderScorer(model) if model else None
+    )
 
 
-def process_pdf(pdf, col):
-    chunks = chunk(extract_text(pdf))
+def process_pdf(pdf, cache):
+    """Index `pdf` into `cache` unless it is already there and return its document key."""
+    key = pdf_key(pdf.getvalue(), cache)
 
-    # Clear DB if uploading new PDF file
-    col_ids = col.get()["ids"]
-    if col_ids:
-        col.delete(ids=col_ids)
+    # Same bytes and chunking as a previous upload, reuse its index
+    if cache.get(key) is not None:
+        return key
 
-    col.add(documents=chunks, ids=[str(i) for i in range(len(chunks))])
+    new_ingest_job(pdf, key, cache).run()
+    return key
+
+
+@st.cache_resource
+def get_ingest_jobs():
+    # Shared by all sessions, so a PDF uploaded twice while it is indexing is only indexed once
+    return {}, threading.Lock()
+
+
+def start_ingest(pdf, pool):
+    """
+    Return the document key of `pdf` and, unless it is already indexed, the
+    background `IngestJob` indexing it. The pool serves the chunks indexed so far
+    until the job is done.
+    """
+    key = pdf_key(pdf.getvalue(), pool.cache)
+    jobs, lock = get_ingest_jobs()
+
+    with lock:
+        # A failed job is kept so its error can be shown; uploading the PDF again retries it
+        if key in jobs and jobs[key].error is None:
+            return key, jobs[key]
+        if pool.cache.get(key) is not None:
+            return key, None
+
+        def on_done(job):
+            pool.detach(job.key)
+            if job.error is None:
+                with lock:
+                    jobs.pop(job.key, None)
+
+        job = new_ingest_job(pdf, key, pool.cache, on_done=on_done)
+        jobs[key] = job
+        pool.attach(job)
+        job.start()
+        return key, job
+
+
+def retrieve(pool, keys, query, n_results=3, hybrid=True, reranker=None):
+    """
+    Return the top `n_results` chunks for `query` across the documents in `keys`.
+
+    With `hybrid`, BM25 and vector results are fused by reciprocal rank. Queries that
+    are mostly identifiers (part numbers, error codes) and have keyword matches are
+    answered from the inverted index alone, which skips embedding the query. With a
+    `reranker`, more candidates are retrieved and a relevant, diverse subset of them
+    is returned in the reranker's order.
+    """
+    return retrieve_many(pool, keys, [query], n_results, hybrid, reranker)[0]
+
+
+def retrieve_many(pool, keys, queries, n_results=3, hybrid=True, reranker=None):
+    """Like `retrieve()` for a batch of queries, which share one embedding call and one vector query per document."""
+    queries = list(queries)
+    fetch = reranker.candidates(n_results) if reranker is not None else n_results
+
+    results = [None] * len(queries)
+    keyword_hits = [[] for _ in queries]
+    if hybrid:
+        keyword_hits = [pool.keyword_query(keys, query, 2 * fetch) for query in queries]
+        results = [hits[:n_results] if hits and is_keyword_query(query) else None for query, hits in zip(queries, keyword_hits)]
+
+    dense = [i for i, result in enumerate(results) if result is None]
+    if not dense:
+        return results
+    embeddings = pool.embed([queries[i] for i in dense])
+    dense_results = pool.query_many(keys, [queries[i] for i in dense], 2 * fetch if hybrid else fetch, query_embeddings=embeddings)
+
+    for i, embedding, dense_hits in zip(dense, embeddings, dense_results):
+        candidates = dense_hits[:fetch]
+        if hybrid:
+            hits = {(hit["key"], hit["id"]): hit for hit in keyword_hits[i] + dense_hits}
+            fused = reciprocal_rank_fusion([
+                [(hit["key"], hit["id"]) for hit in keyword_hits[i]],
+                [(hit["key"], hit["id"]) for hit in dense_hits]
+            ])
+            candidates = [hits[hit_id] for hit_id in fused[:fetch]]
+        if reranker is not None:
+            candidates = rerank_hits(pool, reranker, queries[i], embedding, candidates, n_results, by_rank=hybrid)
+        results[i] = candidates[:n_results]
+    return results
+
+
+def rerank_hits(pool, reranker, query, query_embedding, hits, n_results, by_rank=False):
+    vectors = pool.hit_embeddings(hits)
+    if not hits or any(vector is None for vector in vectors):
+        # A document was evicted meanwhile; keep the retrieval order
+        return hits
+    # Fused hybrid results have no common similarity score, their rank is the relevance
+    relevance = [len(hits) - rank for rank in range(len(hits))] if by_rank else None
+    picked = reranker.rerank(query, query_embedding, [hit["document"] for hit in hits], vectors, n_results, relevance)
+    return [hits[i] for i in picked]
+
+
+def build_context(hits, max_tokens):
+    """Merge overlapping chunks by word offset and fit them into `max_tokens`."""
+    passages = [
+        {"text": hit["document"], "source": hit["key"], "start": (hit["metadata"] or {}).get("offset")}
+        for hit in hits
+    ]
+    return pack_context(passages, max_tokens, unit="word")
 
 
 def extract_text(pdf):
-    return "".join(p.extract_text() for p in pypdf.PdfReader(pdf).pages)
+    return "\n".join(text for _, text in iter_pages(pdf.getvalue()))
 
 
-def chunk(text, size=100, overlap=30):
-    words = text.split()
-    return [" ".join(words[i:i+size]) for i in range(0, len(words), size - overlap)]
+def chunk(text, size=CHUNK_SIZE, overlap=CHUNK_OVERLAP, dedup_threshold=DEDUP_THRESHOLD):
+    chunks = [text for text, _ in iter_chunks([(1, text)], size=size, overlap=overlap)]
+    if dedup_threshold:
+        chunks = list(NearDuplicateFilter(dedup_threshold).filter(chunks))
+    return chunks
 
 
-def call_chat_completion(query, context, model_id, tt_base_url):
+CHAT_ENDPOINT = "/v1/chat/completions"
+
+
+def get_chat_payload(query, context, model_id):
     system_message = {
         "role": "system",
         "content":
@@ -58,76 +266,185 @@ def call_chat_completion(query, context, model_id, tt_base_url):
 
     user_message = {"role": "user", "content": query}
 
-    headers = {"Content-Type": "application/json"}
-    payload = {
+    return {
         "model": model_id,
         "messages": [system_message, user_message],
         "max_tokens": 200
     }
 
-    CHAT_ENDPOINT = "/v1/chat/completions"
-    res = requests.post(urljoin(tt_base_url, CHAT_ENDPOINT), headers=headers, json=payload)
+
+def call_chat_completion(query, context, model_id, tt_base_url):
+    headers = {"Content-Type": "application/json"}
+    payload = get_chat_payload(query, context, model_id)
+
+    res = get_client().post(urljoin(tt_base_url, CHAT_ENDPOINT), headers=headers, json=payload)
 
     if res.status_code != 200:
         return f"Error: {res.status_code} - {res.text}"
     return res.json()["choices"][0]["message"]["content"].strip()
 
 
+def stream_chat_completion(query, context, model_id, tt_base_url):
+    payload = get_chat_payload(query, context, model_id)
+    return streaming.stream_chat_completion(urljoin(tt_base_url, CHAT_ENDPOINT), payload)
+
+
+def cache_answer(answer_cache, scope, query, stream):
+    """Pass `stream` through and store the answer once it has completed without errors."""
+    parts = []
+    for text in stream:
+        parts.append(text)
+        yield text
+
+    answer = "".join(parts)
+    if streaming.is_complete(answer):
+        answer_cache.put(scope, query, answer)
+
+
+def ingest_jobs(documents):
+    """The background jobs still indexing, or that failed to index, any of `documents`, by document name."""
+    jobs, lock = get_ingest_jobs()
+    with lock:
+        return {name: jobs[key] for name, key in documents.items() if key in jobs}
+
+
+@st.fragment(run_every=1)
+def show_ingest_progress(documents):
+    indexing = {name: job for name, job in ingest_jobs(documents).items() if job.error is None}
+    if not indexing:
+        # Done: rerun the page so the answer cache and the final index are used
+        st.rerun()
+
+    for name, job in indexing.items():
+        if job.pages_indexed:
+            label = f"🗂️ {name}: pages 1–{job.pages_indexed} of {job.page_count} searchable, {job.chunks} chunks"
+            if job.duplicates:
+                label += f", {job.duplicates} near-duplicates skipped"
+        else:
+            label = f"🗂️ {name}: indexing {job.page_count} pages..."
+        st.progress(job.progress, text=label)
+
+
 def main():
     st.title("📄 PDF RAG")
     st.caption("Chat with a PDF using LLM + RAG")
 
-    col = setup_chromadb()
+    pool = setup_collection_pool()
+    answer_cache = setup_answer_cache()
+
+    hybrid = st.sidebar.toggle(
+        "Hybrid retrieval",
+        value=True,
+        help="Combine BM25 keyword search with vector search. Helps with exact part numbers and identifiers."
+    )
+    rerank = st.sidebar.toggle(
+        "Diverse context (MMR)",
+        value=False,
+        help="Retrieve extra candidates and keep the relevant ones that repeat each other least, "
+             "so the context budget holds more distinct information."
+    )
+    max_context_tokens = st.sidebar.number_input(
+        "Context token budget",
+        min_value=64,
+        max_value=8192,
+        value=512,
+        step=64,
+        help="Retrieved chunks are deduplicated and packed into this many tokens of context."
+    )
 
     tt_base_url = st.text_input(
         "Enter the public URL of your Tenstorrent instance on Koyeb.")
 
     if tt_base_url:
         # Fetch available models from Tenstorrent instance
-        model_id_response = get_available_models(tt_base_url)
+        models = get_models(tt_base_url)
 
-        if model_id_response.status_code != 200:
-            st.write("Error fetching model names from instance.")
+        if not models.ids:
+            st.write(f"Error fetching model names from instance: {models.error}")
             model_id = st.text_input("Enter the name of the model")
         else:
-            available_models = [m['id'] for m in model_id_response.json()['data']]
-
+            if models.error:
+                st.warning(f"The instance did not answer ({models.error}), showing the models it listed last.", icon="⚠️")
             model_id = st.selectbox(
                 "Select the LLM to use.",
-                available_models,
+                models.ids,
                 help=f"These are the available models on {tt_base_url}"
             )
 
-        # PDF upload
-        pdf = st.file_uploader("Upload a PDF", type="pdf")
-
-        if "pdf_processed" not in st.session_state:
-            st.session_state['pdf_processed'] = False
-            st.session_state['last_filename'] = None
-
-        if pdf:
-            if pdf.name != st.session_state['last_filename']:
-                st.session_state['pdf_processed'] = False
-                st.session_state['last_filename'] = pdf.name
-
-            if not st.session_state['pdf_processed']:
-                with st.spinner("🗂️ Processing PDF..."):
-                    process_pdf(pdf, col)
-                    st.session_state['pdf_processed'] = True
-                    st.session_state['query_input'] = ""
-                st.success("PDF indexed!")
+        # PDF upload, each session keeps its own set of documents
+        pdfs = st.file_uploader("Upload one or more PDFs", type="pdf", accept_multiple_files=True)
+
+        if "documents" not in st.session_state:
+            st.session_state['documents'] = {}
+
+        documents = st.session_state['documents']
+        uploaded = {pdf.name: pdf for pdf in pdfs}
+
+        for name in list(documents):
+            if name not in uploaded:
+                del documents[name]
+
+        new_pdfs = [pdf for name, pdf in uploaded.items() if name not in documents]
+        for pdf in new_pdfs:
+            documents[pdf.name], _ = start_ingest(pdf, pool)
+        if new_pdfs:
+            st.session_state['query_input'] = ""
+
+        # Indexing runs in the background; questions are answered from the pages indexed so far
+        jobs = ingest_jobs(documents)
+        for name, job in jobs.items():
+            if job.error is not None:
+                st.error(f"Indexing {name} failed: {job.error}")
+        indexing = {name: job for name, job in jobs.items() if job.error is None}
+        if indexing:
+            show_ingest_progress(documents)
+        elif new_pdfs:
+            st.success("PDF indexed!")
+        embedding_stats = getattr(pool.cache.embedding_function, "stats", None)
+        if embedding_stats and embedding_stats.chunks and (new_pdfs or indexing):
+            st.caption(f"Embeddings ({pool.cache.embedding_function.identity}): {embedding_stats.report()}")
+
+        cache_stats = pool.cache.stats()
+        if cache_stats["duplicates"]:
+            st.sidebar.caption(
+                f"Index cache: {cache_stats['documents']} documents, {cache_stats['chunks']} chunks, "
+                f"{cache_stats['duplicates']} near-duplicate chunks dropped before embedding"
+            )
 
+        if documents and all(job.chunks for job in indexing.values()):
             # User question
             query = st.text_input("Ask a question about the PDF", key='query_input')
             if query:
-                with st.spinner("💬 Generating answer..."):
-                    docs = col.query(query_texts=[query], n_results=3)['documents'][0]
-                    context = "\n".join(docs)
-
-                    response = call_chat_completion(query, context, model_id, tt_base_url)
-
+                # Answers depend on the documents, the model and the retrieval settings
+                scope = AnswerCache.scope(
+                    documents.values(), model_id, hybrid=hybrid, rerank=rerank, max_context_tokens=max_context_tokens
+                )
+                # Answers from a partial index would outlive it in the cache
+                cached = None if indexing else answer_cache.get(scope, query)
+
+                if cached is not None:
+                    st.markdown("**Answer:** ⚡ *cached*")
+                    st.write(cached["answer"])
+                    if cached["similarity"] < 1:
+                        st.caption(f"Answer to the similar question \"{cached['question']}\" (similarity {cached['similarity']:.2f})")
+                    if st.button("Regenerate answer"):
+                        answer_cache.delete(scope, cached["question"])
+                        st.rerun()
+                else:
+                    with st.spinner("🔎 Retrieving context..."):
+                        hits = retrieve(
+                            pool, documents.values(), query, n_results=RETRIEVAL_CANDIDATES, hybrid=hybrid,
+                            reranker=setup_reranker() if rerank else None
+                        )
+                        context = build_context(hits, max_context_tokens)
+
+                    stream = stream_chat_completion(query, context, model_id, tt_base_url)
+                    if indexing:
+                        st.caption("Still indexing: this answer only draws on the pages indexed so far.")
+                    else:
+                        stream = cache_answer(answer_cache, scope, query, stream)
                     st.markdown("**Answer:**")
-                    st.write(response)
+                    st.write_stream(stream)
 
 
 if __name__ == "__main__":
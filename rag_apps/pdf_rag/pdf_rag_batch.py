@@ -0,0 +1,157 @@
+# SPDX-FileCopyrightText: (c) 2025 Tenstorrent AI ULC
+#
+# SPDX-License-Identifier: Apache-2.0
+"""
+Answer a JSONL file of questions about a PDF without the Streamlit UI.
+
+The PDF is indexed once (or reused from the PDF RAG cache). Questions are retrieved in
+batches that share one embedding call and one vector query, and the chat completions
+run concurrently with at most `--concurrency` requests in flight. Every input line is
+a JSON object with a "question" field; its other fields are copied to the output line,
+which adds the answer and the per-question latency.
+
+    python pdf_rag_batch.py manual.pdf questions.jsonl -o answers.jsonl --base-url $TT_BASE_URL
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import urljoin
+import argparse
+import io
+import json
+import os
+import statistics
+import sys
+import time
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from common.client import get_client  # noqa: E402
+from common.models import get_models  # noqa: E402
+
+from pdf_rag import (  # noqa: E402
+    CHAT_ENDPOINT,
+    RETRIEVAL_CANDIDATES,
+    build_context,
+    get_chat_payload,
+    process_pdf,
+    retrieve_many,
+    setup_collection_pool,
+    setup_reranker,
+)
+
+
+def read_questions(path):
+    with open(path) as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if "question" not in record:
+                raise ValueError(f"{path}:{line_number}: missing \"question\" field")
+            yield record
+
+
+def complete(base_url, question, context, model_id):
+    start = time.perf_counter()
+    try:
+        res = get_client().post(urljoin(base_url, CHAT_ENDPOINT), json=get_chat_payload(question, context, model_id))
+        if res.status_code != 200:
+            return {"error": f"{res.status_code} - {res.text}"}, time.perf_counter() - start
+        answer = res.json()["choices"][0]["message"]["content"].strip()
+        return {"answer": answer}, time.perf_counter() - start
+    except (httpx.HTTPError, ValueError, KeyError) as e:
+        return {"error": str(e)}, time.perf_counter() - start
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pdf")
+    parser.add_argument("questions", help="JSONL file, one {\"question\": ...} object per line")
+    parser.add_argument("-o", "--output", default="-", help="JSONL file for the answers (default: stdout)")
+    parser.add_argument("--base-url", default=os.environ.get("TT_BASE_URL"), help="Tenstorrent instance URL (default: $TT_BASE_URL)")
+    parser.add_argument("--model", help="Model id (default: the first model the instance lists)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Chat completion requests in flight, up to the 32 connections of the shared client")
+    parser.add_argument("--batch-size", type=int, default=32, help="Questions retrieved per vector query")
+    parser.add_argument("--max-context-tokens", type=int, default=512)
+    parser.add_argument("--no-hybrid", dest="hybrid", action="store_false", help="Vector search only, no BM25")
+    parser.add_argument("--rerank", action="store_true", help="Select diverse context with MMR over extra candidates")
+    args = parser.parse_args()
+
+    if not args.base_url:
+        parser.error("--base-url or TT_BASE_URL is required")
+
+    records = list(read_questions(args.questions))
+    model_id = args.model
+    if model_id is None:
+        models = get_models(args.base_url)
+        if models.model_id is None:
+            parser.error(f"could not fetch the model list from {args.base_url}: {models.error}")
+        model_id = models.model_id
+
+    pool = setup_collection_pool()
+    with open(args.pdf, "rb") as f:
+        pdf = io.BytesIO(f.read())
+    pdf.name = os.path.basename(args.pdf)
+
+    start = time.perf_counter()
+    key = process_pdf(pdf, pool.cache)
+    print(f"Indexed {pdf.name} in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+    out = sys.stdout if args.output == "-" else open(args.output, "w")
+    completion_latencies, failures = [], 0
+    started = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        # Retrieval for the next batch runs while the previous batch's completions are in flight
+        pending = []
+        for batch_start in range(0, len(records), args.batch_size):
+            batch = records[batch_start:batch_start + args.batch_size]
+            retrieval_start = time.perf_counter()
+            hits = retrieve_many(
+                pool, [key], [r["question"] for r in batch], n_results=RETRIEVAL_CANDIDATES, hybrid=args.hybrid,
+                reranker=setup_reranker() if args.rerank else None
+            )
+            retrieval_seconds = (time.perf_counter() - retrieval_start) / len(batch)
+
+            for record, record_hits in zip(batch, hits):
+                context = build_context(record_hits, args.max_context_tokens)
+                future = executor.submit(complete, args.base_url, record["question"], context, model_id)
+                pending.append((record, retrieval_seconds, future))
+
+        # Written in input order, each line as soon as it and all earlier ones are done
+        for record, retrieval_seconds, future in pending:
+            result, completion_seconds = future.result()
+            completion_latencies.append(completion_seconds)
+            failures += "error" in result
+            out.write(json.dumps({
+                **record,
+                **result,
+                "model": model_id,
+                "retrieval_ms": round(1000 * retrieval_seconds, 2),
+                "completion_ms": round(1000 * completion_seconds, 2),
+                "latency_ms": round(1000 * (retrieval_seconds + completion_seconds), 2),
+            }) + "\n")
+            out.flush()
+
+    if out is not sys.stdout:
+        out.close()
+
+    elapsed = time.perf_counter() - started
+    if completion_latencies:
+        print(
+            f"{len(records)} questions in {elapsed:.1f}s ({len(records) / elapsed:.1f}/s), {failures} failed, "
+            f"completion p50 {1000 * statistics.median(completion_latencies):.0f} ms, "
+            f"p99 {1000 * percentile(completion_latencies, 0.99):.0f} ms",
+            file=sys.stderr
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,426 @@
+# SPDX-FileCopyrightText: (c) 2025 Tenstorrent AI ULC
+#
+# SPDX-License-Identifier: Apache-2.0
+"""
+Headless HTTP service for the PDF and webpage RAG apps.
+
+The service runs the apps' own ingest, retrieval and prompt functions behind two
+endpoints. All clients share one index, so a PDF or page ingested once can be asked
+about by every client. Blocking work (extraction, embedding, vector queries) runs in
+worker threads. Chat completions are streamed from the LLM over one shared async HTTP
+client, with at most RAG_SERVICE_LLM_CONCURRENCY in flight.
+
+    uvicorn rag_service:app --host 0.0.0.0 --port 8080
+"""
+
+from contextlib import asynccontextmanager
+from pathlib import Path
+from urllib.parse import urljoin
+import argparse
+import asyncio
+import hashlib
+import io
+import itertools
+import logging
+import os
+import sys
+import threading
+import time
+
+import httpx
+import requests
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.background import BackgroundTask
+
+APPS_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(APPS_DIR.parent))
+sys.path.insert(0, str(APPS_DIR / "pdf_rag"))
+sys.path.insert(0, str(APPS_DIR / "webpage_rag"))
+from common import client, streaming  # noqa: E402
+from common.models import get_models  # noqa: E402
+
+import pdf_rag  # noqa: E402
+import webpage_rag  # noqa: E402
+from page_cache import collection_name  # noqa: E402
+
+# The apps' cached resources work without a Streamlit session, which Streamlit would warn about on every worker thread
+for logger in ("streamlit.runtime.caching.cache_data_api", "streamlit.runtime.scriptrunner_utils.script_run_context"):
+    logging.getLogger(logger).setLevel(logging.ERROR)
+
+
+LLM_CONCURRENCY = int(os.environ.get("RAG_SERVICE_LLM_CONCURRENCY", 8))
+# How long a question may wait for an LLM slot before it is turned away with a 503
+QUEUE_TIMEOUT = float(os.environ.get("RAG_SERVICE_QUEUE_TIMEOUT", 60))
+MAX_CONTEXT_TOKENS = int(os.environ.get("RAG_SERVICE_MAX_CONTEXT_TOKENS", 512))
+
+
+class UnknownDocumentError(Exception):
+    """A document id the service has not ingested."""
+
+
+class NotSearchableError(Exception):
+    """A PDF whose indexing failed or has not stored any chunks yet."""
+
+
+class MixedDocumentsError(Exception):
+    """A question about PDFs and web documents at once."""
+
+
+def interleave(rankings):
+    """
+    Merge ranked lists round-robin, so each contributes its best items first. Longer
+    lists continue after shorter ones run out.
+    """
+    return [item for rank in itertools.zip_longest(*rankings) for item in rank if item is not None]
+
+
+class LLMLimiter:
+    """Bounds the chat completions in flight and counts the ones in flight and waiting."""
+
+    def __init__(self, concurrency, timeout):
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.in_flight = 0
+        self.waiting = 0
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    async def acquire(self):
+        """
+        Wait for a free slot and return the function that frees it, which may be
+        called more than once. Returns None if no slot frees up within the timeout.
+        """
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            self.waiting -= 1
+        self.in_flight += 1
+
+        released = False
+
+        def release():
+            nonlocal released
+            if not released:
+                released = True
+                self.in_flight -= 1
+                self._semaphore.release()
+        return release
+
+
+class Service:
+    """State shared by every request: the indexes, the LLM client and the limiter."""
+
+    def __init__(self, tt_base_url, model_id=None):
+        self.tt_base_url = tt_base_url
+        self.model_id = model_id
+        self.pool = pdf_rag.setup_collection_pool()
+        self.page_cache = webpage_rag.get_page_cache()
+        self.pages = {}  # page id -> URL
+        self.sites = {}  # site id -> {"urls", "vectorstore", "stats"}
+        self.sites_lock = threading.Lock()
+        self.limiter = LLMLimiter(LLM_CONCURRENCY, QUEUE_TIMEOUT)
+        # Keep-alive connections for every completion the limiter lets through. The shared
+        # async client belongs to common.client's own event loop, not uvicorn's
+        self.client = client.new_client(max_connections=LLM_CONCURRENCY)
+        self.answered = 0
+        self.rejected = 0
+
+    async def get_models(self):
+        # Usually answered from the registry's cache; only the first lookup waits on the network
+        return await asyncio.to_thread(get_models, self.tt_base_url)
+
+    def ingest_pdf(self, data, filename):
+        pdf = io.BytesIO(data)
+        pdf.name = filename
+        key, job = pdf_rag.start_ingest(pdf, self.pool)
+        return self.pdf_status(key, job)
+
+    def pdf_status(self, key, job=None):
+        if job is None:
+            job = pdf_rag.ingest_jobs({key: key}).get(key)
+        if job is None:
+            return {"id": key, "type": "pdf", "status": "ready"}
+        status = {
+            "id": key,
+            "type": "pdf",
+            "status": "failed" if job.error is not None else "indexing",
+            "pages": job.page_count,
+            "pages_indexed": job.pages_indexed,
+            "chunks": job.chunks,
+            "duplicates": job.duplicates,
+        }
+        if job.error is not None:
+            status["error"] = str(job.error)
+        return status
+
+    def ingest_page(self, url):
+        _, status = self.page_cache.get(url)
+        page_id = collection_name(url)
+        with self.sites_lock:
+            self.pages[page_id] = url
+        return {"id": page_id, "type": "page", "url": url, "status": "ready", "detail": status}
+
+    def ingest_site(self, urls):
+        site_id = "site_" + hashlib.sha256("\n".join(sorted(urls)).encode("utf-8")).hexdigest()[:32]
+        vectorstore, stats = webpage_rag.index_pages(urls)
+        with self.sites_lock:
+            previous = self.sites.get(site_id)
+            self.sites[site_id] = {"urls": urls, "vectorstore": vectorstore, "stats": stats}
+        if previous is not None:
+            previous["vectorstore"].delete_collection()
+        return {
+            "id": site_id,
+            "type": "site",
+            "status": "ready",
+            "pages": stats.fetched,
+            "chunks": stats.chunks,
+            "duplicates": stats.duplicates,
+            "failed": [url for url, _ in stats.failed],
+        }
+
+    def web_vectorstores(self, ids):
+        """The vectorstores of web document `ids`; raises UnknownDocumentError for unknown ones."""
+        vectorstores = []
+        for doc_id in ids:
+            with self.sites_lock:
+                url = self.pages.get(doc_id) if doc_id.startswith("page_") else None
+                site = self.sites.get(doc_id) if url is None else None
+            if url is None and site is None:
+                raise UnknownDocumentError(doc_id)
+            # A page past its TTL is revalidated, like a rerun of the app does
+            vectorstores.append(self.page_cache.get(url)[0] if url is not None else site["vectorstore"])
+        return vectorstores
+
+    def build_prompt(self, question, ids, max_context_tokens, hybrid, rerank, model_id):
+        """Retrieve context for `question` and return `(chat payload, partial)`, where partial means still indexing."""
+        if all(not doc_id.startswith(("page_", "site_")) for doc_id in ids):
+            jobs = pdf_rag.ingest_jobs({key: key for key in ids})
+            for key in ids:
+                if key not in jobs and self.pool.cache.get(key) is None:
+                    raise UnknownDocumentError(key)
+            failed = [job for job in jobs.values() if job.error is not None]
+            if failed:
+                raise NotSearchableError(f"indexing failed: {failed[0].error}")
+            indexing = list(jobs.values())
+            if not all(job.chunks for job in indexing):
+                raise NotSearchableError("no pages are searchable yet")
+            hits = pdf_rag.retrieve(
+                self.pool, ids, question, n_results=pdf_rag.RETRIEVAL_CANDIDATES, hybrid=hybrid,
+                reranker=pdf_rag.setup_reranker() if rerank else None
+            )
+            context = pdf_rag.build_context(hits, max_context_tokens)
+            return pdf_rag.get_chat_payload(question, context, model_id), bool(indexing)
+
+        if any(not doc_id.startswith(("page_", "site_")) for doc_id in ids):
+            raise MixedDocumentsError("PDFs and web pages cannot be asked about together")
+        reranker = webpage_rag.get_reranker() if rerank else None
+        per_store = [
+            webpage_rag.retrieve(vectorstore, question, webpage_rag.RETRIEVAL_CANDIDATES, reranker)
+            for vectorstore in self.web_vectorstores(ids)
+        ]
+        docs = interleave(per_store)
+        context = webpage_rag.combine_docs(docs, max_context_tokens)
+        return webpage_rag.get_chat_payload(question, context, model_id), False
+
+    async def stream_answer(self, payload, release):
+        """Stream the completion of `payload`, then free its LLM slot with `release`."""
+        try:
+            async for text in streaming.astream_chat_completion(
+                self.client, urljoin(self.tt_base_url, pdf_rag.CHAT_ENDPOINT), payload
+            ):
+                yield text
+            self.answered += 1
+        finally:
+            release()
+
+
+@asynccontextmanager
+async def lifespan(app):
+    tt_base_url = os.environ.get("TT_BASE_URL")
+    if not tt_base_url:
+        raise RuntimeError("Set TT_BASE_URL to the URL of the Tenstorrent instance")
+    app.state.service = Service(tt_base_url, os.environ.get("RAG_SERVICE_MODEL"))
+    yield
+    await app.state.service.client.aclose()
+
+
+app = FastAPI(title="TT RAG service", lifespan=lifespan)
+
+
+async def json_body(request):
+    """The request's JSON object, or a 400 if the body is not one."""
+    try:
+        body = await request.json()
+    except ValueError:
+        raise HTTPException(400, "the body is not valid JSON")
+    if not isinstance(body, dict):
+        raise HTTPException(400, "expected a JSON object")
+    return body
+
+
+@app.post("/ingest")
+async def ingest(request: Request):
+    """
+    Index a PDF sent as the `application/pdf` body (name it with `?filename=`), or
+    web pages sent as JSON: `{"url": ...}` for one page, `{"urls": [...]}` for
+    several pages or sitemaps. PDFs are indexed in the background and answer 202.
+    """
+    service = request.app.state.service
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+
+    if content_type == "application/pdf":
+        data = await request.body()
+        if not data:
+            raise HTTPException(400, "empty PDF")
+        status = await asyncio.to_thread(service.ingest_pdf, data, request.query_params.get("filename", "upload.pdf"))
+        return JSONResponse(status, status_code=202 if status["status"] == "indexing" else 200)
+
+    if content_type == "application/json":
+        body = await json_body(request)
+        url, urls = body.get("url"), body.get("urls")
+        if url is not None and not isinstance(url, str):
+            raise HTTPException(400, "\"url\" must be a string")
+        if urls is not None and not (isinstance(urls, list) and all(isinstance(u, str) for u in urls)):
+            raise HTTPException(400, "\"urls\" must be a list of strings")
+        try:
+            if url:
+                return await asyncio.to_thread(service.ingest_page, url)
+            if urls:
+                return await asyncio.to_thread(service.ingest_site, urls)
+        except (requests.RequestException, httpx.HTTPError) as e:
+            raise HTTPException(502, f"could not load the page: {e}")
+        raise HTTPException(400, "expected a \"url\" or \"urls\" field")
+
+    raise HTTPException(415, "send a PDF as application/pdf or web page URLs as application/json")
+
+
+@app.get("/documents/{doc_id}")
+async def document(doc_id: str, request: Request):
+    service = request.app.state.service
+    if doc_id.startswith("site_"):
+        with service.sites_lock:
+            site = service.sites.get(doc_id)
+        if site is None:
+            raise HTTPException(404, "unknown document")
+        return {"id": doc_id, "type": "site", "status": "ready", "urls": site["urls"], "chunks": site["stats"].chunks}
+    if doc_id.startswith("page_"):
+        url = service.pages.get(doc_id)
+        if url is None:
+            raise HTTPException(404, "unknown document")
+        return {"id": doc_id, "type": "page", "status": "ready", "url": url}
+
+    status = await asyncio.to_thread(service.pdf_status, doc_id)
+    if status["status"] == "ready" and service.pool.cache.get(doc_id) is None:
+        raise HTTPException(404, "unknown document")
+    return status
+
+
+@app.post("/ask")
+async def ask(request: Request):
+    """
+    Answer `{"question": ..., "documents": [ids]}`. Optional fields: `stream` (default
+    true, plain text chunks), `max_context_tokens`, `hybrid` and `rerank`. PDFs that are
+    still indexing are answered from the pages indexed so far.
+    """
+    service = request.app.state.service
+    body = await json_body(request)
+    question, ids = body.get("question"), body.get("documents")
+    if not question or not ids:
+        raise HTTPException(400, "expected \"question\" and \"documents\" fields")
+    if not isinstance(question, str) or not isinstance(ids, list) or not all(isinstance(i, str) for i in ids):
+        raise HTTPException(400, "\"question\" must be a string and \"documents\" a list of ids")
+    max_context_tokens = body.get("max_context_tokens", MAX_CONTEXT_TOKENS)
+    if not isinstance(max_context_tokens, int) or isinstance(max_context_tokens, bool) or max_context_tokens <= 0:
+        raise HTTPException(400, "\"max_context_tokens\" must be a positive integer")
+    options = {name: body.get(name, default) for name, default in (("hybrid", True), ("rerank", False), ("stream", True))}
+    for name, value in options.items():
+        if not isinstance(value, bool):
+            raise HTTPException(400, f"\"{name}\" must be true or false")
+
+    model_id = service.model_id
+    if model_id is None:
+        models = await service.get_models()
+        if models.model_id is None:
+            raise HTTPException(502, f"could not fetch the model list: {models.error}")
+        model_id = models.model_id
+
+    started = time.perf_counter()
+    try:
+        payload, partial = await asyncio.to_thread(
+            service.build_prompt, question, ids, max_context_tokens, options["hybrid"], options["rerank"], model_id
+        )
+    except UnknownDocumentError as e:
+        raise HTTPException(404, f"unknown document {e}")
+    except NotSearchableError as e:
+        raise HTTPException(409, str(e))
+    except MixedDocumentsError as e:
+        raise HTTPException(400, str(e))
+    retrieval_ms = 1000 * (time.perf_counter() - started)
+
+    release = await service.limiter.acquire()
+    if release is None:
+        service.rejected += 1
+        raise HTTPException(503, "too many questions in flight", headers={"Retry-After": "1"})
+
+    headers = {"X-Retrieval-Ms": f"{retrieval_ms:.1f}", "X-Model": model_id, "X-Partial": str(partial).lower()}
+    if options["stream"]:
+        # The background task frees the slot if the client left before the stream started
+        return StreamingResponse(
+            service.stream_answer(payload, release), media_type="text/plain; charset=utf-8", headers=headers,
+            background=BackgroundTask(release)
+        )
+
+    started = time.perf_counter()
+    answer = "".join([text async for text in service.stream_answer(payload, release)])
+    if answer.startswith(streaming.ERROR_PREFIX):
+        raise HTTPException(502, answer)
+    # A stream that broke off mid-answer ends with a notice; report it instead of passing the cut answer as whole
+    answer, _, interrupted = answer.partition(streaming.INTERRUPTED_NOTICE)
+    return {
+        "answer": answer.strip(),
+        "model": model_id,
+        "partial": partial,
+        "interrupted": interrupted or None,
+        "retrieval_ms": round(retrieval_ms, 1),
+        "completion_ms": round(1000 * (time.perf_counter() - started), 1),
+    }
+
+
+@app.get("/health")
+async def health(request: Request):
+    service = request.app.state.service
+    return {
+        "status": "ok",
+        "llm_concurrency": service.limiter.concurrency,
+        "llm_in_flight": service.limiter.in_flight,
+        "llm_waiting": service.limiter.waiting,
+        "answered": service.answered,
+        "rejected": service.rejected,
+        "index_cache": service.pool.cache.stats(),
+    }
+
+
+@app.get("/ready")
+async def ready(request: Request):
+    """Readiness probe: 200 once the inference server lists its models, 503 while it does not."""
+    models = await request.app.state.service.get_models()
+    if not models.ready:
+        return JSONResponse({"ready": False, "error": models.error}, status_code=503)
+    return {"ready": True, "models": models.ids}
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=os.environ.get("RAG_SERVICE_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("RAG_SERVICE_PORT", 8080)))
+    args = parser.parse_args()
+    uvicorn.run(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
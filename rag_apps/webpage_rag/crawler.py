@@ -0,0 +1,194 @@
+# SPDX-FileCopyrightText: (c) 2025 Tenstorrent AI ULC
+#
+# SPDX-License-Identifier: Apache-2.0
+"""Concurrent ingestion of many pages or a whole sitemap into one vectorstore."""
+
+import asyncio
+from collections import defaultdict
+import os
+import time
+from urllib.parse import urlsplit
+import xml.etree.ElementTree as ET
+
+import httpx
+
+
+SITEMAP_NAMESPACE = "{http://www.sitemaps.org/schemas/sitemap/0.9}"
+USER_AGENT = "tt-example-apps-webpage-rag"
+
+_DONE = object()
+
+
+class CrawlStats:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.urls = 0
+        self.fetched = 0
+        self.failed = []  # (url, reason)
+        self.chunks = 0
+        self.duplicates = 0
+
+    @property
+    def seconds(self):
+        return time.perf_counter() - self.started
+
+
+def is_sitemap(url):
+    return urlsplit(url).path.endswith(".xml")
+
+
+async def expand_sitemaps(client, urls, max_urls=1000, failed=None):
+    """
+    Replace every sitemap URL in `urls` by the pages it lists, following sitemap indexes.
+
+    A sitemap that cannot be fetched or parsed is skipped and, if `failed` is a list,
+    recorded in it as `(url, reason)`, so the other sitemaps are still crawled.
+    """
+    pages, pending, seen = [], list(urls), set()
+
+    while pending and len(pages) < max_urls:
+        url = pending.pop(0)
+        if url in seen:
+            continue
+        seen.add(url)
+
+        if not is_sitemap(url):
+            pages.append(url)
+            continue
+
+        try:
+            res = await client.get(url)
+            res.raise_for_status()
+            root = ET.fromstring(res.content)
+        except httpx.HTTPError as e:
+            if failed is not None:
+                failed.append((url, str(e)))
+            continue
+        except ET.ParseError as e:
+            if failed is not None:
+                failed.append((url, f"sitemap parse error: {e}"))
+            continue
+        locations = [loc.text.strip() for loc in root.iter(f"{SITEMAP_NAMESPACE}loc") if loc.text]
+
+        if root.tag == f"{SITEMAP_NAMESPACE}sitemapindex":
+            pending.extend(locations)
+        else:
+            pending = locations + pending
+
+    return pages[:max_urls]
+
+
+async def crawl(
+    urls,
+    to_documents,
+    split,
+    add_documents,
+    per_host=4,
+    max_connections=32,
+    batch_size=64,
+    max_urls=1000,
+    on_progress=None,
+):
+    """
+    Fetch, parse, split and index `urls` as an overlapping pipeline.
+
+    Sitemap URLs (`*.xml`) are expanded first; sitemaps that fail are recorded in
+    `stats.failed` like pages. Pages are fetched through one pooled
+    HTTP client, with at most `per_host` requests in flight to any single host.
+    Fetched HTML is parsed and split in worker threads while more pages download,
+    and the splits are passed to `add_documents(splits)` in batches of `batch_size`
+    while parsing continues. If `add_documents` returns the number of splits it
+    stored, the rest are counted in `stats.duplicates`. The queues between the stages are bounded, so a slow
+    embedding model slows the fetchers down instead of buffering the whole site.
+    `on_progress(stats)` is called after every page.
+    """
+    stats = CrawlStats()
+    limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+
+    async with httpx.AsyncClient(limits=limits, timeout=30, follow_redirects=True, headers={"User-Agent": USER_AGENT}) as client:
+        pages = await expand_sitemaps(client, urls, max_urls=max_urls, failed=stats.failed)
+        stats.urls = len(pages)
+
+        url_queue = asyncio.Queue()
+        for url in pages:
+            url_queue.put_nowait(url)
+
+        html_queue = asyncio.Queue(maxsize=2 * max_connections)
+        split_queue = asyncio.Queue(maxsize=4 * batch_size)
+        host_slots = defaultdict(lambda: asyncio.Semaphore(per_host))
+
+        def report():
+            if on_progress is not None:
+                on_progress(stats)
+
+        async def fetcher():
+            while True:
+                try:
+                    url = url_queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+
+                try:
+                    async with host_slots[urlsplit(url).netloc]:
+                        res = await client.get(url)
+                    res.raise_for_status()
+                    await html_queue.put((url, res.text))
+                except httpx.HTTPError as e:
+                    stats.failed.append((url, str(e)))
+                    report()
+
+        async def parser():
+            while (item := await html_queue.get()) is not _DONE:
+                url, html = item
+                try:
+                    splits = await asyncio.to_thread(lambda: split(to_documents(html, url)))
+                except Exception as e:
+                    stats.failed.append((url, f"parse error: {e}"))
+                else:
+                    stats.fetched += 1
+                    for document in splits:
+                        await split_queue.put(document)
+                report()
+
+        async def indexer():
+            batch = []
+            while True:
+                item = await split_queue.get()
+                if item is not _DONE:
+                    batch.append(item)
+                if batch and (len(batch) >= batch_size or item is _DONE):
+                    stored = await asyncio.to_thread(add_documents, batch)
+                    stored = len(batch) if stored is None else stored
+                    stats.chunks += stored
+                    stats.duplicates += len(batch) - stored
+                    batch = []
+                    report()
+                if item is _DONE:
+                    return
+
+        parser_count = min(os.cpu_count() or 1, 8)
+        fetchers = [asyncio.create_task(fetcher()) for _ in range(min(max_connections, len(pages)))]
+        parsers = [asyncio.create_task(parser()) for _ in range(parser_count)]
+        index_task = asyncio.create_task(indexer())
+
+        async def drain():
+            # Shut the stages down in order once the stage before them has finished
+            await asyncio.gather(*fetchers)
+            for _ in parsers:
+                await html_queue.put(_DONE)
+            await asyncio.gather(*parsers)
+            await split_queue.put(_DONE)
+            await index_task
+
+        # A failing indexer would otherwise leave the other stages blocked on full queues
+        driver = asyncio.create_task(drain())
+        try:
+            await asyncio.wait([driver, index_task], return_when=asyncio.FIRST_EXCEPTION)
+            if index_task.done() and index_task.exception() is not None:
+                raise index_task.exception()
+            await driver
+        finally:
+            for task in [driver, index_task, *fetchers, *parsers]:
+                task.cancel()
+
+    return stats
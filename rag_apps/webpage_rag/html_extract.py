@@ -0,0 +1,178 @@
+# SPDX-FileCopyrightText: (c) 2025 Tenstorrent AI ULC
+#
+# SPDX-License-Identifier: Apache-2.0
+"""Main-content extraction from HTML: boilerplate is dropped by text and link density."""
+
+import re
+
+import lxml.etree
+import lxml.html
+
+
+# Never content
+SKIP_TAGS = ["script", "style", "noscript", "template", "svg", "iframe", "button", "select", "head"]
+# Site chrome rather than page content; a <header> inside an article or <main> is kept
+CHROME_TAGS = {"nav", "header", "footer", "aside"}
+CHROME_ROLES = {"navigation", "banner", "contentinfo", "complementary", "search"}
+# Prose-like chrome that the link density test does not catch, matched against id and class names
+CHROME_NAMES = re.compile(r"(^|[\s_-])(cookies?|consent|gdpr|newsletter)([\s_-]|$)")
+HEADING_TAGS = {"h1", "h2", "h3", "h4", "h5", "h6"}
+BLOCK_TAGS = HEADING_TAGS | {
+    "p", "div", "section", "article", "main", "li", "ul", "ol", "dl", "dt", "dd", "table", "tr", "caption",
+    "pre", "blockquote", "figure", "figcaption", "body", "html", "details", "summary",
+}
+
+# Table cells are joined into one block per row
+CELL_TAGS = {"td", "th"}
+
+# A block needs this many words with at most this share of them in links to count as content
+MIN_WORDS = 10
+MAX_LINK_DENSITY = 0.33
+
+# lxml refuses str input with an encoding declaration, so text is parsed as UTF-8 bytes without it
+XML_DECLARATION = re.compile(r"^\s*<\?xml[^>]*\?>")
+UTF8_PARSER = lxml.html.HTMLParser(encoding="utf-8")
+
+
+class Block:
+    def __init__(self, text, link_words, tag):
+        self.text = text
+        self.words = len(text.split())
+        self.link_density = link_words / self.words if self.words else 0.0
+        self.tag = tag
+
+    @property
+    def kind(self):
+        if self.tag in HEADING_TAGS:
+            return "heading"
+        if self.link_density > MAX_LINK_DENSITY:
+            return "bad"
+        if self.tag == "pre" or self.words >= MIN_WORDS:
+            return "good"
+        return "short"
+
+
+def _is_chrome(element):
+    if element.tag == "header" and next(element.iterancestors("article", "main"), None) is not None:
+        return False
+    if element.tag in CHROME_TAGS or element.get("role") in CHROME_ROLES:
+        return True
+    return CHROME_NAMES.search(f"{element.get('id', '')} {element.get('class', '')}".lower()) is not None
+
+
+def _blocks(root):
+    """Text blocks of `root` in document order; inline markup is folded into the enclosing block."""
+    blocks = []
+
+    def walk(element, parts, link_words, in_link):
+        for child in element:
+            if not isinstance(child.tag, str) or _is_chrome(child):
+                if child.tail:
+                    parts.append(child.tail)
+                    link_words[0] += len(child.tail.split()) if in_link else 0
+                continue
+
+            if child.tag in BLOCK_TAGS or child.tag == "br":
+                flush(element, parts, link_words)
+                if child.tag != "br":
+                    child_parts, child_links = [child.text or ""], [len((child.text or "").split()) if in_link else 0]
+                    walk(child, child_parts, child_links, in_link)
+                    flush(child, child_parts, child_links)
+            else:
+                if child.tag in CELL_TAGS:
+                    parts.append(" ")
+                is_link = in_link or child.tag == "a"
+                if child.text:
+                    parts.append(child.text)
+                    link_words[0] += len(child.text.split()) if is_link else 0
+                walk(child, parts, link_words, is_link)
+
+            if child.tail:
+                parts.append(child.tail)
+                link_words[0] += len(child.tail.split()) if in_link else 0
+
+    def flush(element, parts, link_words):
+        text = re.sub(r"\s+", " ", "".join(parts)).strip()
+        if text:
+            blocks.append(Block(text, link_words[0], element.tag))
+        parts.clear()
+        link_words[0] = 0
+
+    parts, link_words = [root.text or ""], [0]
+    walk(root, parts, link_words, False)
+    flush(root, parts, link_words)
+    return blocks
+
+
+def _near_content(kinds):
+    """For each block, whether the closest non-short, non-heading block on either side is content."""
+    near = [False] * len(kinds)
+    for order in (range(len(kinds)), reversed(range(len(kinds)))):
+        last = None
+        for i in order:
+            if kinds[i] == "short":
+                near[i] = near[i] or last == "good"
+            elif kinds[i] != "heading":
+                last = kinds[i]
+    return near
+
+
+def extract_page(html):
+    """
+    Return a dict with the `title`, meta `description` and `language` of an HTML page
+    (each None if missing) and its `sections`, a list of dicts with the `headings`
+    above the section (outermost first) and its `text`.
+
+    Scripts, styles and site chrome (`nav`, `header`, `footer`, `aside`, ARIA
+    landmarks, and elements whose id or class names a cookie or newsletter banner)
+    are skipped. The remaining text is cut into blocks at block-level elements, one
+    per table row. Blocks that are mostly link text are boilerplate. Blocks of at
+    least `MIN_WORDS` words are content. Runs of shorter blocks, such as list items
+    and table rows, are kept when the closest longer block before or after them is
+    content. If nothing passes, the whole visible text is returned as one section,
+    so a page with text is never empty. `html` is a str or undecoded bytes. A
+    document without any elements, such as an empty body, gives no sections.
+    """
+    page = {"title": None, "description": None, "language": None, "sections": []}
+    try:
+        if isinstance(html, str):
+            root = lxml.html.fromstring(XML_DECLARATION.sub("", html).encode("utf-8"), parser=UTF8_PARSER)
+        else:
+            root = lxml.html.fromstring(html)
+    except lxml.etree.ParserError:
+        return page
+
+    title = root.findtext(".//title")
+    description = root.xpath("string(//meta[@name='description']/@content)") or None
+    page.update(title=title.strip() if title else None, description=description, language=root.get("lang"))
+    for element in list(root.iter(*SKIP_TAGS)):
+        element.drop_tree()
+
+    body = root.find("body")
+    blocks = _blocks(body if body is not None else root)
+    kinds = [block.kind for block in blocks]
+    near_content = _near_content(kinds)
+
+    sections = []
+    headings = []  # (level, text)
+    current = None
+    for i, (block, kind) in enumerate(zip(blocks, kinds)):
+        if kind == "heading":
+            level = int(block.tag[1])
+            headings = [h for h in headings if h[0] < level] + [(level, block.text)]
+            current = None
+            continue
+
+        if kind == "bad" or (kind == "short" and not near_content[i]):
+            continue
+
+        if current is None:
+            current = {"headings": [text for _, text in headings], "blocks": []}
+            sections.append(current)
+        current["blocks"].append(block.text)
+
+    if sections:
+        page["sections"] = [{"headings": s["headings"], "text": "\n\n".join(s["blocks"])} for s in sections]
+    elif text := re.sub(r"\s+", " ", " ".join(root.itertext())).strip():
+        page["sections"] = [{"headings": [], "text": text}]
+    return page
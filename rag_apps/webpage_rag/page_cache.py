@@ -0,0 +1,156 @@
+# SPDX-FileCopyrightText: (c) 2025 Tenstorrent AI ULC
+#
+# SPDX-License-Identifier: Apache-2.0
+"""Per-URL vectorstores revalidated with conditional HTTP requests."""
+
+from collections import Counter, OrderedDict
+from pathlib import Path
+import hashlib
+import sys
+import threading
+import time
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from common.dedup import NearDuplicateFilter  # noqa: E402
+
+
+DEFAULT_TTL = 300
+DEFAULT_MAX_PAGES = 16
+
+
+def chunk_ids(splits):
+    """Content-derived ids; repeated chunks of one page are told apart by occurrence."""
+    seen = Counter()
+    ids = []
+    for split in splits:
+        digest = hashlib.sha256(split.page_content.encode("utf-8")).hexdigest()[:32]
+        ids.append(f"{digest}:{seen[digest]}")
+        seen[digest] += 1
+    return ids
+
+
+def update_metadatas(vectorstore, ids, metadatas):
+    """Replace the metadata of stored chunks without embedding them again."""
+    if hasattr(vectorstore, "update_metadatas"):
+        vectorstore.update_metadatas(ids, metadatas)
+    else:
+        # LangChain's Chroma store only updates documents together with their embeddings
+        vectorstore._collection.update(ids=ids, metadatas=metadatas)
+
+
+def collection_name(url):
+    return "page_" + hashlib.sha256(url.encode("utf-8")).hexdigest()[:32]
+
+
+class _Page:
+    def __init__(self, vectorstore, chunks, etag, last_modified):
+        self.vectorstore = vectorstore
+        self.chunks = chunks  # chunk id -> metadata
+        self.etag = etag
+        self.last_modified = last_modified
+        self.checked_at = time.time()
+
+
+class PageCache:
+    """
+    Keeps one vectorstore per URL and reuses it across reruns and sessions.
+
+    Within `ttl` seconds of the last check a page is served from memory. After that it
+    is revalidated with `If-None-Match`/`If-Modified-Since`, so an unchanged page costs
+    a single 304 round trip. A changed page is re-split. Only chunks with new text are
+    embedded and written to the vectorstore, chunks that disappeared are deleted, and
+    unchanged chunks that moved only get their offsets updated. Each URL has its own
+    lock, so one page is revalidated at a time while other URLs are served.
+    At most `max_pages` URLs are kept, least recently used first out. With a
+    `dedup_threshold`, splits that are near-duplicates of an earlier split of the page
+    (navigation, repeated boilerplate) are dropped before they are embedded.
+
+    `to_documents(html, url)`, `split(documents)` and `create_vectorstore(splits, ids,
+    collection_name)` are supplied by the app.
+    """
+
+    def __init__(self, to_documents, split, create_vectorstore, ttl=DEFAULT_TTL, max_pages=DEFAULT_MAX_PAGES,
+                 dedup_threshold=None):
+        self.to_documents = to_documents
+        self.split = split
+        self.create_vectorstore = create_vectorstore
+        self.ttl = ttl
+        self.max_pages = max_pages
+        self.dedup_threshold = dedup_threshold
+        self._pages = OrderedDict()
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def get(self, url):
+        """Return `(vectorstore, status)`, where status says how the page was obtained."""
+        with self._url_lock(url):
+            page = self._pages.get(url)
+            if page is not None and time.time() - page.checked_at < self.ttl:
+                status = "cached"
+            else:
+                page, status = self._fetch(url, page)
+
+            with self._lock:
+                self._pages[url] = page
+                self._pages.move_to_end(url)
+                while len(self._pages) > self.max_pages:
+                    # The URL's lock is kept: another thread may hold it to revalidate the page
+                    _, evicted = self._pages.popitem(last=False)
+                    evicted.vectorstore.delete_collection()
+
+            return page.vectorstore, status
+
+    def _fetch(self, url, page):
+        headers = {}
+        if page is not None and page.etag:
+            headers["If-None-Match"] = page.etag
+        if page is not None and page.last_modified:
+            headers["If-Modified-Since"] = page.last_modified
+
+        res = requests.get(url, headers=headers, timeout=30)
+        if page is not None and res.status_code == 304:
+            page.checked_at = time.time()
+            return page, "not modified"
+
+        res.raise_for_status()
+        res.encoding = res.apparent_encoding
+        splits = self.split(self.to_documents(res.text, url))
+        duplicates = 0
+        if self.dedup_threshold:
+            dedup = NearDuplicateFilter(self.dedup_threshold)
+            splits = list(dedup.filter(splits, key=lambda split: split.page_content))
+            duplicates = dedup.removed
+        ids = chunk_ids(splits)
+        etag, last_modified = res.headers.get("ETag"), res.headers.get("Last-Modified")
+
+        if page is None:
+            vectorstore = self.create_vectorstore(splits, ids, collection_name(url))
+            chunks = {chunk_id: split.metadata for chunk_id, split in zip(ids, splits)}
+            status = f"loaded, {duplicates} near-duplicate chunks dropped" if duplicates else "loaded"
+            return _Page(vectorstore, chunks, etag, last_modified), status
+
+        # Ids hash the text, so only edited chunks are replaced; unchanged text that moved keeps its vector
+        new_chunks = dict(zip(ids, splits))
+        stale = [chunk_id for chunk_id in page.chunks if chunk_id not in new_chunks]
+        fresh = [chunk_id for chunk_id in new_chunks if chunk_id not in page.chunks]
+        moved = [chunk_id for chunk_id, split in new_chunks.items()
+                 if chunk_id in page.chunks and page.chunks[chunk_id] != split.metadata]
+
+        if stale:
+            page.vectorstore.delete(ids=stale)
+        if fresh:
+            page.vectorstore.add_documents([new_chunks[chunk_id] for chunk_id in fresh], ids=fresh)
+        if moved:
+            # The offsets are used to merge overlapping splits, so they must follow the text
+            update_metadatas(page.vectorstore, moved, [new_chunks[chunk_id].metadata for chunk_id in moved])
+
+        page.chunks = {chunk_id: split.metadata for chunk_id, split in new_chunks.items()}
+        page.etag, page.last_modified = etag, last_modified
+        page.checked_at = time.time()
+        return page, f"updated ({len(fresh)} chunks added, {len(stale)} removed, {len(moved)} moved)"
+
+    def _url_lock(self, url):
+        with self._lock:
+            return self._locks.setdefault(url, threading.Lock())
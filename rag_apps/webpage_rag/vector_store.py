@@ -0,0 +1,68 @@
+# SPDX-FileCopyrightText: (c) 2025 Tenstorrent AI ULC
+#
+# SPDX-License-Identifier: Apache-2.0
+"""LangChain vector store backed by the in-process NumPy `VectorIndex`."""
+
+from pathlib import Path
+import sys
+import uuid
+
+from langchain_core.documents import Document
+from langchain_core.vectorstores import VectorStore
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from common.vector_index import VectorIndex  # noqa: E402
+
+
+class NumpyVectorStore(VectorStore):
+    """
+    Drop-in replacement for the `Chroma` vector store for one page or site: the
+    same `add_documents`/`delete`/`delete_collection` calls and retriever, without
+    a Chroma client behind it. Vectors are kept as `dtype` ("float32", "float16"
+    or "int8") and searched exactly by squared L2 distance, like Chroma's default.
+    """
+
+    def __init__(self, embedding, collection_name="langchain", dtype="float16"):
+        self._embedding = embedding
+        self.index = VectorIndex(collection_name, dtype)
+
+    @property
+    def embeddings(self):
+        return self._embedding
+
+    def add_texts(self, texts, metadatas=None, ids=None, **kwargs):
+        texts = list(texts)
+        ids = list(ids) if ids else [str(uuid.uuid4()) for _ in texts]
+        if texts:
+            self.index.upsert(ids, self._embedding.embed_documents(texts), texts, metadatas)
+        return ids
+
+    def update_metadatas(self, ids, metadatas):
+        self.index.update(ids, metadatas=metadatas)
+
+    def delete(self, ids=None, **kwargs):
+        self.index.delete(ids or [])
+
+    def delete_collection(self):
+        self.index = VectorIndex(self.index.name, self.index.dtype)
+
+    def similarity_search_with_score(self, query, k=4, **kwargs):
+        res = self.index.query([self._embedding.embed_query(query)], n_results=k)
+        return [
+            (Document(page_content=document, metadata=metadata or {}, id=chunk_id), distance)
+            for chunk_id, document, metadata, distance in zip(
+                res["ids"][0], res["documents"][0], res["metadatas"][0], res["distances"][0]
+            )
+        ]
+
+    def similarity_search(self, query, k=4, **kwargs):
+        return [document for document, _ in self.similarity_search_with_score(query, k)]
+
+    def _select_relevance_score_fn(self):
+        return self._euclidean_relevance_score_fn
+
+    @classmethod
+    def from_texts(cls, texts, embedding, metadatas=None, ids=None, collection_name="langchain", dtype="float16", **kwargs):
+        store = cls(embedding, collection_name=collection_name, dtype=dtype)
+        store.add_texts(texts, metadatas=metadatas, ids=ids)
+        return store
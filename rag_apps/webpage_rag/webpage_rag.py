@@ -1,42 +1,163 @@
 # SPDX-FileCopyrightText: (c) 2025 Tenstorrent AI ULC
 #
 # SPDX-License-Identifier: Apache-2.0
+from pathlib import Path
 from urllib.parse import urljoin
+import asyncio
+import hashlib
+import os
+import sys
+import uuid
 
 import streamlit as st
 import requests
+from langchain_core.documents import Document
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.document_loaders import WebBaseLoader
 from langchain_community.vectorstores import Chroma
-from langchain_ollama import OllamaEmbeddings
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from common import streaming  # noqa: E402
+from common.client import get_client  # noqa: E402
+from common.context import pack_context  # noqa: E402
+from common.dedup import NearDuplicateFilter  # noqa: E402
+from common.embedding_cache import CachedEmbeddings, EmbeddingCache  # noqa: E402
+from common.embeddings import EmbeddingClient  # noqa: E402
+from common.models import get_models  # noqa: E402
+from common.rerank import CrossEncoderScorer, Reranker, DEFAULT_LAMBDA  # noqa: E402
 
-@st.cache_data
-def get_available_models(base_url):
-    res = requests.get(urljoin(base_url, "/v1/models"), headers={"accept": "application/json"})
-    return res
+from crawler import crawl  # noqa: E402
+from html_extract import extract_page  # noqa: E402
+from page_cache import PageCache, DEFAULT_TTL  # noqa: E402
+from vector_store import NumpyVectorStore  # noqa: E402
+
+
+EMBEDDING_MODEL = "nomic-embed-text"
+OLLAMA_URL = "http://localhost:11434"
+CACHE_DIR = os.environ.get("WEBPAGE_RAG_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "tt_webpage_rag"))
+# "chroma", or the dtype of an in-process NumPy index: "float32", "float16" or "int8"
+VECTOR_INDEX = os.environ.get("WEBPAGE_RAG_VECTOR_INDEX", "chroma")
+# Chunks retrieved per question before packing them into the context token budget
+RETRIEVAL_CANDIDATES = 10
+# Splits at least this similar (estimated Jaccard over word shingles) to an earlier split are dropped
+DEDUP_THRESHOLD = float(os.environ.get("WEBPAGE_RAG_DEDUP_THRESHOLD", 0.9)) or None
 
 
 def load_webpage(url):
-    loader = WebBaseLoader(url)
-    return loader.load()
+    res = requests.get(url, timeout=30)
+    res.raise_for_status()
+    res.encoding = res.apparent_encoding
+    return documents_from_html(res.text, url)
+
+
+def documents_from_html(html, url):
+    """
+    One document per section of the page's main content, without navigation,
+    footers and other boilerplate. The headings above a section are kept in its
+    "section" metadata, next to the page's source, title, description and language.
+    """
+    page = extract_page(html)
+    metadata = {"source": url}
+    if page["title"] is not None:
+        metadata["title"] = page["title"]
+    metadata["description"] = page["description"] or "No description found."
+    metadata["language"] = page["language"] or "No language found."
+    documents, offset = [], 0
+    for section in page["sections"]:
+        # Where the section starts in the page text, so split offsets can be made page-relative
+        section_metadata = {**metadata, "section": " > ".join(section["headings"]), "section_start": offset}
+        documents.append(Document(page_content=section["text"], metadata=section_metadata))
+        offset += len(section["text"]) + 2
+    return documents
 
 
 def split_documents(docs, chunk_size=500, overlap=100):
-    splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=overlap, separators=["\n\n", "\n", ".", " ", ""])
-    return splitter.split_documents(docs)
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=overlap,
+        separators=["\n\n", "\n", ".", " ", ""],
+        add_start_index=True
+    )
+    splits = splitter.split_documents(docs)
+    for split in splits:
+        # Offsets relative to the page rather than the section, so chunks of a page merge in pack_context
+        split.metadata["start_index"] += split.metadata.pop("section_start", 0)
+    return splits
+
+
+@st.cache_resource
+def get_embeddings():
+    # Ollama by default; WEBPAGE_RAG_EMBEDDING_* point it at another server or tune batching
+    client = EmbeddingClient.from_env("WEBPAGE_RAG", base_url=OLLAMA_URL, model=EMBEDDING_MODEL, api="ollama")
+    # Every split and question is looked up on disk before it is sent to the server
+    cache = EmbeddingCache(os.path.join(CACHE_DIR, "embeddings"), client.model)
+    return CachedEmbeddings(client, cache)
+
+
+def new_vectorstore(collection_name="langchain"):
+    if VECTOR_INDEX == "chroma":
+        return Chroma(collection_name=collection_name, embedding_function=get_embeddings())
+    return NumpyVectorStore(get_embeddings(), collection_name=collection_name, dtype=VECTOR_INDEX)
+
+
+def create_vectorstore(splits, ids=None, collection_name="langchain"):
+    vectorstore = new_vectorstore(collection_name)
+    vectorstore.add_documents(splits, ids=ids)
+    return vectorstore
 
 
-def create_vectorstore(splits):
-    embeddings = OllamaEmbeddings(model="nomic-embed-text")
-    return Chroma.from_documents(documents=splits, embedding=embeddings)
+@st.cache_resource
+def get_reranker():
+    # Relevance comes from embedding similarity unless a local cross-encoder is configured
+    model = os.environ.get("WEBPAGE_RAG_RERANK_MODEL")
+    return Reranker(
+        lambda_mult=float(os.environ.get("WEBPAGE_RAG_MMR_LAMBDA", DEFAULT_LAMBDA)),
+        scorer=CrossEncoderScorer(model) if model else None
+    )
 
 
-def combine_docs(docs):
-    return "\n\n".join(doc.page_content for doc in docs)
+@st.cache_resource
+def get_page_cache():
+    return PageCache(
+        to_documents=documents_from_html,
+        split=split_documents,
+        create_vectorstore=create_vectorstore,
+        ttl=int(os.environ.get("WEBPAGE_RAG_TTL_SECONDS", DEFAULT_TTL)),
+        dedup_threshold=DEDUP_THRESHOLD
+    )
 
 
-def call_chat_completion(question, context):
+def index_pages(urls, on_progress=None):
+    """Crawl pages and sitemaps in `urls` into one new vectorstore and return it with the crawl stats."""
+    vectorstore = new_vectorstore(f"site_{uuid.uuid4().hex[:24]}")
+    # One filter for the whole crawl, so near-identical navigation and footers on every page are embedded once
+    dedup = NearDuplicateFilter(DEDUP_THRESHOLD) if DEDUP_THRESHOLD else None
+
+    def add_documents(splits):
+        if dedup is not None:
+            splits = list(dedup.filter(splits, key=lambda split: split.page_content))
+        # Text repeated across pages is stored once
+        unique = {hashlib.sha256(split.page_content.encode("utf-8")).hexdigest(): split for split in splits}
+        if unique:
+            vectorstore.add_documents(list(unique.values()), ids=list(unique))
+        return len(unique)
+
+    stats = asyncio.run(crawl(urls, documents_from_html, split_documents, add_documents, on_progress=on_progress))
+    return vectorstore, stats
+
+
+def combine_docs(docs, max_tokens):
+    """Merge overlapping splits by character offset and fit them into `max_tokens`."""
+    passages = [
+        {"text": doc.page_content, "source": doc.metadata.get("source"), "start": doc.metadata.get("start_index")}
+        for doc in docs
+    ]
+    return pack_context(passages, max_tokens, unit="char")
+
+
+CHAT_ENDPOINT = "/v1/chat/completions"
+
+
+def get_chat_payload(question, context, model_id):
     system_message = {
         "role": "system",
         "content":
@@ -51,53 +172,142 @@ def call_chat_completion(question, context):
     }
     user_message = {"role": "user", "content": question}
 
-    headers = {"Content-Type": "application/json"}
-    payload = {
+    return {
         "model": model_id,
         "messages": [system_message, user_message],
         "max_tokens": 200
     }
 
-    CHAT_ENDPOINT = "/v1/chat/completions"
-    res = requests.post(urljoin(tt_base_url, CHAT_ENDPOINT), headers=headers, json=payload)
+
+def call_chat_completion(question, context, model_id, tt_base_url):
+    headers = {"Content-Type": "application/json"}
+    payload = get_chat_payload(question, context, model_id)
+
+    res = get_client().post(urljoin(tt_base_url, CHAT_ENDPOINT), headers=headers, json=payload)
 
     if res.status_code != 200:
         return f"Error: {res.status_code} - {res.text}"
     return res.json()["choices"][0]["message"]["content"].strip()
 
 
-def answer_question(vectorstore, question):
-    retriever = vectorstore.as_retriever()
-    docs = retriever.invoke(question)
-    context = combine_docs(docs)
-    return call_chat_completion(question, context)
+def stream_chat_completion(question, context, model_id, tt_base_url):
+    payload = get_chat_payload(question, context, model_id)
+    return streaming.stream_chat_completion(urljoin(tt_base_url, CHAT_ENDPOINT), payload)
+
+
+def retrieve(vectorstore, question, k, reranker=None):
+    """
+    Return the `k` splits most similar to `question`. With a `reranker`, more
+    candidates are fetched along with their stored vectors, and a relevant, diverse
+    subset of them is returned in the reranker's order.
+    """
+    if reranker is None:
+        return vectorstore.as_retriever(search_kwargs={"k": k}).invoke(question)
+
+    embedding = get_embeddings().embed_query(question)
+    # Chroma's collection and the NumPy index answer the same query call
+    collection = vectorstore.index if isinstance(vectorstore, NumpyVectorStore) else vectorstore._collection
+    res = collection.query(
+        query_embeddings=[embedding],
+        n_results=reranker.candidates(k),
+        include=["documents", "metadatas", "embeddings"]
+    )
+    documents, metadatas, vectors = res["documents"][0], res["metadatas"][0], res["embeddings"][0]
+    picked = reranker.rerank(question, embedding, documents, vectors, k)
+    return [Document(page_content=documents[i], metadata=metadatas[i] or {}) for i in picked]
+
+
+def answer_question(vectorstore, question, max_context_tokens, model_id, tt_base_url, reranker=None):
+    """Retrieve context for `question` and return a stream of the answer text."""
+    docs = retrieve(vectorstore, question, RETRIEVAL_CANDIDATES, reranker)
+    context = combine_docs(docs, max_context_tokens)
+    return stream_chat_completion(question, context, model_id, tt_base_url)
+
+
+def main():
+    st.title("Chat with Webpage 🌐")
+    st.caption(f"Chat with a webpage using LLM + RAG")
+
+    max_context_tokens = st.sidebar.number_input(
+        "Context token budget",
+        min_value=64,
+        max_value=8192,
+        value=512,
+        step=64,
+        help="Retrieved chunks are deduplicated and packed into this many tokens of context."
+    )
+    rerank = st.sidebar.toggle(
+        "Diverse context (MMR)",
+        value=False,
+        help="Retrieve extra candidates and keep the relevant ones that repeat each other least, "
+             "so the context budget holds more distinct information."
+    )
+
+    tt_base_url = st.text_input("Enter the public URL of your Tenstorrent instance on Koyeb.")
+
+    if tt_base_url:
+        models = get_models(tt_base_url)
+
+        if not models.ids:
+            st.write(f"Error fetching model name from instance: {models.error}")
+            model_id = st.text_input("Enter the name of the model")
+        else:
+            if models.error:
+                st.warning(f"The instance did not answer ({models.error}), showing the models it listed last.", icon="⚠️")
+            model_id = st.selectbox("Select the LLM to use.", models.ids, help=f"These are the available models on {tt_base_url}")
+
+        mode = st.radio("Chat with", ["A webpage", "Several pages or a sitemap"], horizontal=True)
+        vectorstore = None
+
+        if mode == "A webpage":
+            webpage_url = st.text_input("Enter Webpage URL")
+
+            if webpage_url:
+                # Reruns reuse the page's vectorstore; it is only refetched once its TTL expires
+                vectorstore, status = get_page_cache().get(webpage_url)
+                st.success(f"Loaded {webpage_url} successfully! ({status})")
+        else:
+            url_text = st.text_area("Enter page URLs or sitemap.xml URLs, one per line")
+            urls = tuple(line.strip() for line in url_text.splitlines() if line.strip())
+
+            if urls and st.button("Index pages"):
+                progress = st.progress(0.0, text="🕸️ Crawling...")
 
+                def on_progress(stats):
+                    done = stats.fetched + len(stats.failed)
+                    progress.progress(
+                        min(done / max(stats.urls, 1), 1.0),
+                        text=f"🕸️ {stats.fetched}/{stats.urls} pages fetched, {stats.chunks} chunks indexed"
+                    )
 
-# Streamlit UI
-st.title("Chat with Webpage 🌐")
-st.caption(f"Chat with a webpage using LLM + RAG")
+                if previous := st.session_state.pop("site", None):
+                    previous["vectorstore"].delete_collection()
 
-tt_base_url = st.text_input("Enter the public URL of your Tenstorrent instance on Koyeb.")
+                site_vectorstore, stats = index_pages(list(urls), on_progress)
+                st.session_state["site"] = {"urls": urls, "vectorstore": site_vectorstore}
+                duplicates = f", {stats.duplicates} near-duplicate chunks dropped" if stats.duplicates else ""
+                st.success(f"Indexed {stats.fetched} pages ({stats.chunks} chunks{duplicates}) in {stats.seconds:.1f}s")
+                if stats.failed:
+                    st.warning(f"{len(stats.failed)} URLs failed: " + ", ".join(url for url, _ in stats.failed[:5]))
 
-if tt_base_url:
-    model_id_response = get_available_models(tt_base_url)  # Model names will be fetched from Tenstorrent instance
+            site = st.session_state.get("site")
+            if site is not None and site["urls"] == urls:
+                vectorstore = site["vectorstore"]
 
-    if model_id_response.status_code != 200:
-        st.write("Error fetching model name from instance.")
-        model_id = st.text_input("Enter the name of the model")
-    else:
-        available_models = [m['id'] for m in model_id_response.json()['data']]
-        model_id = st.selectbox("Select the LLM to use.", available_models, help=f"These are the available models on {tt_base_url}")
+        if vectorstore is not None:
+            cache_stats = get_embeddings().cache.stats()
+            st.sidebar.caption(
+                f"Embedding cache: {cache_stats['hit_rate']:.0%} hit rate "
+                f"({cache_stats['hits']} hits, {cache_stats['misses']} misses), "
+                f"{cache_stats['bytes_saved'] / 1024:.1f} KiB not re-embedded"
+            )
+            st.sidebar.caption(f"Embedding server: {get_embeddings().embeddings.stats.report()}")
 
-    webpage_url = st.text_input("Enter Webpage URL")
+            question = st.text_input("Ask a question about the webpage.")
+            if question:
+                reranker = get_reranker() if rerank else None
+                st.write_stream(answer_question(vectorstore, question, max_context_tokens, model_id, tt_base_url, reranker))
 
-    if webpage_url:
-        docs = load_webpage(webpage_url)
-        splits = split_documents(docs)
-        vectorstore = create_vectorstore(splits)
-        st.success(f"Loaded {webpage_url} successfully!")
 
-        question = st.text_input("Ask a question about the webpage.")
-        if question:
-            response = answer_question(vectorstore, question)
-            st.write(response)
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# SPDX-FileCopyrightText: (c) 2025 Tenstorrent AI ULC
+#
+# SPDX-License-Identifier: Apache-2.0
+"""
+Measure the latency the shared HTTP clients in common/client.py save per call.
+
+Every way the apps used to reach the inference server is timed against the way they
+reach it now, with the same sequence of calls:
+
+- requests: a bare `requests.get`/`post` per call (pdf_rag, webpage_rag, travel_guide)
+- openai: a new `OpenAI` client per call, as on every Streamlit rerun (weather_agent, chat_memory)
+- async-openai: a new `AsyncOpenAI` client and event loop per call (openai_exchange_rate_agent)
+
+Each call lists the models and then asks for a short chat completion. The table
+reports the latency of the first call, and the median and p99 of the calls after it. Against
+a remote HTTPS server, the difference is the TCP and TLS setup. Against the
+in-process stand-in server (the default), it is only the connection setup on the
+loopback interface.
+
+    python tools/bench_client.py --base-url https://<your instance> --calls 20
+"""
+
+from pathlib import Path
+from urllib.parse import urljoin
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+
+import requests
+from openai import AsyncOpenAI, OpenAI
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from common import client, standin_server  # noqa: E402
+
+MESSAGES = [{"role": "user", "content": "Say hi."}]
+
+
+def requests_call(base_url, model_id):
+    requests.get(urljoin(base_url, "/v1/models"), headers={"accept": "application/json"}).raise_for_status()
+    payload = {"model": model_id, "messages": MESSAGES, "max_tokens": 8}
+    requests.post(urljoin(base_url, "/v1/chat/completions"), json=payload).raise_for_status()
+
+
+def pooled_call(base_url, model_id):
+    http = client.get_client()
+    http.get(urljoin(base_url, "/v1/models"), headers={"accept": "application/json"}).raise_for_status()
+    payload = {"model": model_id, "messages": MESSAGES, "max_tokens": 8}
+    http.post(urljoin(base_url, "/v1/chat/completions"), json=payload).raise_for_status()
+
+
+def openai_call(openai_client, model_id):
+    openai_client.models.list()
+    openai_client.chat.completions.create(model=model_id, messages=MESSAGES, max_tokens=8)
+
+
+async def async_openai_call(openai_client, model_id):
+    await openai_client.models.list()
+    await openai_client.chat.completions.create(model=model_id, messages=MESSAGES, max_tokens=8)
+
+
+async def fresh_async_openai_call(base_url, model_id):
+    # Closed before its event loop is, or its connections outlive the loop and error on garbage collection
+    async with AsyncOpenAI(base_url=urljoin(base_url, "v1"), api_key="null") as openai_client:
+        await async_openai_call(openai_client, model_id)
+
+
+def patterns(base_url, model_id):
+    yield "requests", "per call", lambda: requests_call(base_url, model_id)
+    yield "requests", "shared", lambda: pooled_call(base_url, model_id)
+    yield "openai", "per call", lambda: openai_call(OpenAI(base_url=urljoin(base_url, "v1"), api_key="null"), model_id)
+    yield "openai", "shared", lambda: openai_call(client.get_openai(base_url), model_id)
+    yield "async-openai", "per call", lambda: asyncio.run(fresh_async_openai_call(base_url, model_id))
+    yield "async-openai", "shared", lambda: client.run_async(async_openai_call(client.get_async_openai(base_url), model_id))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", help="Inference server to measure (default: the in-process stand-in server)")
+    parser.add_argument("--calls", type=int, default=20, help="Calls per pattern")
+    args = parser.parse_args()
+
+    server = None
+    if not args.base_url:
+        server = standin_server.start(token_delay=0)
+        args.base_url = server.base_url
+
+    res = client.get_client().get(urljoin(args.base_url, "/v1/models"))
+    res.raise_for_status()
+    model_id = res.json()["data"][0]["id"]
+    print(f"{args.base_url} ({model_id}), shared client speaks {res.http_version}, h2 installed: {client.HTTP2}")
+
+    print(f"{'client':<14}{'connection':<12}{'first ms':>10}{'p50 ms':>9}{'p99 ms':>9}")
+    for name, mode, call in patterns(args.base_url, model_id):
+        latencies = []
+        for _ in range(args.calls):
+            start = time.perf_counter()
+            call()
+            latencies.append(1000 * (time.perf_counter() - start))
+        rest = sorted(latencies[1:]) or latencies
+        print(
+            f"{name:<14}{mode:<12}{latencies[0]:>10.1f}{statistics.median(rest):>9.1f}"
+            f"{rest[min(len(rest) - 1, int(0.99 * len(rest)))]:>9.1f}"
+        )
+
+    if server:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,334 @@
+# SPDX-FileCopyrightText: (c) 2025 Tenstorrent AI ULC
+#
+# SPDX-License-Identifier: Apache-2.0
+"""
+Replay the apps' requests against an OpenAI-compatible server at a target rate.
+
+Each scenario sends the same request shapes as the app it is named after:
+
+- chat: a turn of chat_memory, with the system prompt, `--history` earlier turns
+  and a new question, streamed.
+- rag: a question to pdf_rag or webpage_rag, with the RAG system prompt holding
+  `--context-tokens` of retrieved context, `max_tokens` 200, streamed.
+- tool: the travel_guide round trip. A forced `search_web` tool call is sent
+  without streaming. Then the final answer is streamed with the tool output.
+
+Scenarios start at `--qps` per second for `--duration` seconds, with Poisson
+arrivals unless `--arrival constant` is given. Arrivals are open loop: a slow
+server does not slow down the arrivals, so queueing shows up as latency. The
+report lists throughput, errors, and the p50, p90 and p99 of the time to first
+token and of the latency per scenario and step.
+
+    python tools/loadgen.py --base-url https://<your instance> --qps 2 --duration 60 --mix chat=2,rag=1,tool=1
+"""
+
+from pathlib import Path
+from urllib.parse import urljoin
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from common import client, standin_server  # noqa: E402
+from common.models import get_models  # noqa: E402
+from common.streaming import parse_event  # noqa: E402
+
+# The in-process stand-in server imitates a mid-sized model on one instance
+STANDIN = {"prefill_latency": 0.05, "prefill_rate": 4000, "decode_rate": 30, "reply_tokens": 150, "max_batch": 32}
+
+QUESTIONS = [
+    "What are the main points of the document?",
+    "How do I reset the device to factory settings?",
+    "Which torque should the pump housing bolts be tightened to?",
+    "Summarize the safety instructions in three bullet points.",
+    "What changed between the first and the second version?",
+]
+PLACES = ["coffee shops in Austin, TX", "bookstores in Barcelona", "pizza places in New York City", "museums in Toronto"]
+FILLER = (
+    "The retrieved passage describes the procedure in detail, including the parts involved, "
+    "the order of the steps and the values to check before the system is started again. "
+).split(" ")
+
+
+def filler_text(n_tokens, rng):
+    start = rng.randrange(len(FILLER))
+    return " ".join(FILLER[(start + i) % len(FILLER)] for i in range(n_tokens))
+
+
+# Same messages as chat_memory.py
+def chat_payload(model_id, history, rng):
+    messages = [{"role": "system", "content": "You are a helpful assistant."}]
+    for _ in range(history):
+        messages.append({"role": "user", "content": rng.choice(QUESTIONS)})
+        messages.append({"role": "assistant", "content": filler_text(120, rng)})
+    messages.append({"role": "user", "content": rng.choice(QUESTIONS)})
+    return {"model": model_id, "messages": messages, "stream": True}
+
+
+# Same prompt as pdf_rag.get_chat_payload(); webpage_rag sends the same shape
+def rag_payload(model_id, context_tokens, rng):
+    context = filler_text(context_tokens, rng)
+    system_message = {
+        "role": "system",
+        "content":
+            f"""
+            You are a helpful assistant. \n
+            When answering user questions, use the provided information below to answer the user question accurately.\n
+            Base your responses on the retrieved context, especially for summary or factual queries.\n
+            Provide clear and concise answers.
+
+            {context}
+            """
+    }
+    user_message = {"role": "user", "content": rng.choice(QUESTIONS)}
+    return {"model": model_id, "messages": [system_message, user_message], "max_tokens": 200, "stream": True}
+
+
+# Same request as travel_guide.get_tool_payload()
+def tool_payload(model_id, user_query):
+    search_tool = {
+        "type": "function",
+        "function": {
+            "name": "search_web",
+            "description": "Search the web for type of place the user is looking for and the location to search in.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "query": {
+                        "type": "string",
+                        "description": "What the user is looking for, like 'coffee shops', 'bookstores', 'pizza places'"
+                    },
+                    "location": {
+                        "type": "string",
+                        "description": "The city, region, or place to search in, like 'Austin, TX', 'New York City', or 'Barcelona'"
+                    }
+                },
+                "required": ["query", "location"],
+                "additionalProperties": False
+            }
+        }
+    }
+    return {
+        "model": model_id,
+        "messages": [{"role": "user", "content": user_query}],
+        "tools": [search_tool],
+        "tool_choice": {"type": "function", "function": {"name": "search_web"}},
+    }
+
+
+# Same messages as travel_guide.call_final_response(), with ten search results as context
+def tool_answer_payload(model_id, user_query, tool_call_id, rng):
+    system_message = {
+        "role": "system",
+        "content":
+            """
+            You are a helpful assistant that takes a user's travel-related query (such as 'coffee shops in Austin, TX')\n
+            and uses structured search results to generate a useful and accurate response.\n
+            You will be provided with search context, including titles, addresses, ratings, and short descriptions of relevant places.\n
+            They will be formatted in rows with the following schema: title ||| address ||| rating ||| description\n
+            Your goal is to summarize and recommend the most suitable options clearly and concisely.\n
+            Prioritize clarity, accuracy, and helpfulness. Do not make up any places and do not mix fields from different rows.\n
+            Use only the provided context. If no good results are available, say so clearly.
+            """
+    }
+    context = "\n".join(
+        f"Place {i} ||| {100 + i} Main Street ||| {rng.uniform(3.5, 5):.1f} ||| {filler_text(20, rng)}" for i in range(10)
+    )
+    return {
+        "model": model_id,
+        "messages": [
+            system_message,
+            {"role": "user", "content": user_query},
+            {"role": "tool", "tool_call_id": tool_call_id, "content": context},
+        ],
+        "max_tokens": 200,
+        "stream": True,
+    }
+
+
+async def send(http, url, payload, scenario, step):
+    """Send one request and measure it. Streamed requests also get a time to first token."""
+    started = time.perf_counter()
+    row = {"scenario": scenario, "step": step, "ok": False, "ttft_ms": None, "tokens": 0, "body": None}
+    try:
+        if payload.get("stream"):
+            async with http.stream("POST", url, json=payload) as res:
+                row["status"] = res.status_code
+                if res.status_code != 200:
+                    row["error"] = f"{res.status_code} - {(await res.aread()).decode('utf-8', 'replace')[:200]}"
+                else:
+                    async for line in res.aiter_lines():
+                        if not line.startswith("data:") or line[len("data:"):].strip() == "[DONE]":
+                            continue
+                        deltas, _ = parse_event(line[len("data:"):].strip())
+                        if deltas and row["ttft_ms"] is None:
+                            row["ttft_ms"] = 1000 * (time.perf_counter() - started)
+                        row["tokens"] += len(deltas)
+                    row["ok"] = True
+        else:
+            res = await http.post(url, json=payload)
+            row["status"] = res.status_code
+            if res.status_code != 200:
+                row["error"] = f"{res.status_code} - {res.text[:200]}"
+            else:
+                row["body"] = res.json()
+                row["tokens"] = (row["body"].get("usage") or {}).get("completion_tokens", 0)
+                row["ok"] = True
+    except (httpx.HTTPError, ValueError) as e:
+        row["error"] = str(e) or type(e).__name__
+    row["latency_ms"] = 1000 * (time.perf_counter() - started)
+    return row
+
+
+async def run_chat(http, url, model_id, args, rng):
+    return [await send(http, url, chat_payload(model_id, args.history, rng), "chat", "answer")]
+
+
+async def run_rag(http, url, model_id, args, rng):
+    return [await send(http, url, rag_payload(model_id, args.context_tokens, rng), "rag", "answer")]
+
+
+async def run_tool(http, url, model_id, args, rng):
+    user_query = f"What are the best {rng.choice(PLACES)}?"
+    call = await send(http, url, tool_payload(model_id, user_query), "tool", "tool_call")
+    rows = [call]
+    if call["ok"]:
+        try:
+            tool_call_id = call.pop("body")["choices"][0]["message"]["tool_calls"][0]["id"]
+        except (KeyError, IndexError, TypeError):
+            call["ok"], call["error"] = False, "no tool call in the response"
+        else:
+            rows.append(await send(http, url, tool_answer_payload(model_id, user_query, tool_call_id, rng), "tool", "answer"))
+    return rows
+
+
+SCENARIOS = {"chat": run_chat, "rag": run_rag, "tool": run_tool}
+
+
+def parse_mix(text):
+    weights = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f"unknown scenario {name.strip()!r}, expected one of {', '.join(SCENARIOS)}")
+        weights[name.strip()] = float(weight or 1)
+    return weights
+
+
+async def run_load(args, model_id, rng):
+    url = urljoin(args.base_url, "/v1/chat/completions")
+    names, weights = list(args.mix), list(args.mix.values())
+    rows, runs, skipped = [], [], 0
+
+    async def run_scenario(name):
+        started = time.perf_counter()
+        scenario_rows = await SCENARIOS[name](http, url, model_id, args, rng)
+        rows.extend(scenario_rows)
+        runs.append({
+            "scenario": name, "step": "total", "ok": all(r["ok"] for r in scenario_rows), "ttft_ms": None,
+            "tokens": None, "latency_ms": 1000 * (time.perf_counter() - started),
+        })
+
+    async with client.new_client(max_connections=args.max_in_flight) as http:
+        tasks = set()
+        started = time.perf_counter()
+        next_at = 0.0
+        while True:
+            next_at += rng.expovariate(args.qps) if args.arrival == "poisson" else 1 / args.qps
+            if next_at >= args.duration:
+                break
+            await asyncio.sleep(max(0.0, started + next_at - time.perf_counter()))
+            if len(tasks) >= args.max_in_flight:
+                # The load generator itself is saturated; counting these keeps the report honest
+                skipped += 1
+                continue
+            task = asyncio.create_task(run_scenario(rng.choices(names, weights)[0]))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+
+    return rows, runs, skipped, elapsed
+
+
+def percentiles(values):
+    values = sorted(v for v in values if v is not None)
+    if not values:
+        return "-"
+    return "/".join(f"{values[min(len(values) - 1, int(q * len(values)))]:.0f}" for q in (0.5, 0.9, 0.99))
+
+
+def report(rows, runs, skipped, elapsed, args):
+    print(
+        f"Target {args.qps} scenarios/s for {args.duration}s ({args.arrival}): {len(runs)} started "
+        f"({len(runs) / args.duration:.2f}/s), {skipped} skipped, the last one finished after {elapsed:.1f}s"
+    )
+    # A scenario with one request has the same numbers as its total, so only multi-step totals are listed
+    steps = {r["scenario"] for r in rows if r["step"] != "answer"}
+    rows = rows + [r for r in runs if r["scenario"] in steps]
+    print("Rates are over the whole run, until the last scenario finished.")
+    print(f"{'scenario':<10}{'step':<11}{'requests':>9}{'errors':>8}{'req/s':>8}{'TTFT p50/p90/p99 ms':>22}{'latency p50/p90/p99 ms':>25}{'tok/s':>8}")
+    for key in sorted({(r["scenario"], r["step"]) for r in rows}, key=lambda k: (k[0], k[1] == "total", k[1])):
+        group = [r for r in rows if (r["scenario"], r["step"]) == key]
+        ok = [r for r in group if r["ok"]]
+        print(
+            f"{key[0]:<10}{key[1]:<11}{len(group):>9}{len(group) - len(ok):>8}{len(group) / elapsed:>8.2f}"
+            f"{percentiles(r['ttft_ms'] for r in ok):>22}{percentiles(r['latency_ms'] for r in ok):>25}"
+            f"{'-' if key[1] == 'total' else format(sum(r['tokens'] for r in ok) / elapsed, '.1f'):>8}"
+        )
+
+    errors = {}
+    for r in rows:
+        if r.get("error"):
+            errors[r["error"]] = errors.get(r["error"], 0) + 1
+    for error, count in sorted(errors.items(), key=lambda item: -item[1])[:5]:
+        print(f"{count} x {error}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", help="Inference server to load (default: the in-process stand-in server)")
+    parser.add_argument("--model", help="Model id (default: the first model the server lists)")
+    parser.add_argument("--qps", type=float, default=2.0, help="Scenarios started per second")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to start scenarios for")
+    parser.add_argument("--arrival", choices=["poisson", "constant"], default="poisson")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("chat,rag,tool"), help="Scenario weights, e.g. chat=2,rag=1,tool=1")
+    parser.add_argument("--history", type=int, default=4, help="Earlier turns sent with a chat question")
+    parser.add_argument("--context-tokens", type=int, default=512, help="Retrieved context in a RAG prompt, like the apps' default budget")
+    parser.add_argument("--max-in-flight", type=int, default=256, help="Scenarios running at once; arrivals beyond it are skipped")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", help="JSONL file for one line per request")
+    args = parser.parse_args()
+
+    server = None
+    if not args.base_url:
+        server = standin_server.start(**STANDIN)
+        args.base_url = server.base_url
+        print(f"Stand-in server on {server.base_url}: {STANDIN}")
+
+    model_id = args.model
+    if model_id is None:
+        models = get_models(args.base_url)
+        if models.model_id is None:
+            parser.error(f"could not fetch the model list from {args.base_url}: {models.error}")
+        model_id = models.model_id
+
+    rows, runs, skipped, elapsed = asyncio.run(run_load(args, model_id, random.Random(args.seed)))
+    report(rows, runs, skipped, elapsed, args)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            for row in rows:
+                f.write(json.dumps({key: value for key, value in row.items() if key != "body"}) + "\n")
+
+    if server:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()